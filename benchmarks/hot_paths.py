@@ -0,0 +1,236 @@
+# benchmarks/hot_paths.py
+"""
+Micro-benchmarks for the evaluation hot paths.
+
+    python -m benchmarks.hot_paths --save bench.json
+    python -m benchmarks.hot_paths --baseline bench.json --fail-on-regression 0.10
+    python -m benchmarks.hot_paths --memory
+
+Every benchmark reseeds `random` before each timed repeat, so the same work
+is measured on every run. Results are per-call latency (mean/std/min over
+the repeats) and calls/sec. With --memory each call's tracemalloc peak is
+also recorded and checked against MEMORY_BUDGETS.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+from core.datasets import Datasets
+from core.formulas import calculate_damage
+from core.talents import compute_combo_hits
+from simulation import memory
+from simulation.artifact import simulate_artifact
+from simulation.dp_policy import ResinDPSolver
+from simulation.talent_books import simulate_talent_book_run
+
+SEED = 1234
+
+# Peak bytes allocated by one call (tracemalloc); --memory fails above these
+MEMORY_BUDGETS = {
+    "calculate_damage": 1024,
+    "compute_combo_hits": 8 * 1024,
+    "compute_total_stats": 4 * 1024,
+    "expected_damage_output[Hu Tao E12N1C]": 8 * 1024,
+    "expected_damage_output[Furina QE summons]": 32 * 1024,
+    "simulate_artifact": 8 * 1024,
+    "simulate_talent_book_run": 1024,
+}
+
+# The standard artifact set from the exploration notebook
+ARTIFACTS = {
+    "Flower": {"main_stat": "Flat HP", "main_stat_value": 4780,
+               "substats": {"CRIT Rate%": 10.5, "CRIT DMG%": 30.0, "HP%": 5.8, "ATK%": 5.8}, "upgrades": 5},
+    "Feather": {"main_stat": "Flat ATK", "main_stat_value": 311,
+                "substats": {"CRIT Rate%": 10.5, "CRIT DMG%": 30.0, "HP%": 5.8, "ATK%": 5.8}, "upgrades": 5},
+    "Sands": {"main_stat": "HP%", "main_stat_value": 46.6,
+              "substats": {"CRIT Rate%": 10.5, "CRIT DMG%": 30.0, "Flat HP": 298, "ATK%": 5.8}, "upgrades": 5},
+    "Goblet": {"main_stat": "Pyro DMG Bonus", "main_stat_value": 46.6,
+               "substats": {"CRIT Rate%": 10.5, "CRIT DMG%": 30.0, "HP%": 5.8, "ATK%": 5.8}, "upgrades": 5},
+    "Circlet": {"main_stat": "CRIT DMG%", "main_stat_value": 62.2,
+                "substats": {"CRIT Rate%": 23.0, "HP%": 5.8, "ATK%": 5.8, "Flat HP": 298}, "upgrades": 5},
+}
+
+
+def build_benchmarks(datasets):
+    """Return {name: zero-arg callable} for every hot path."""
+    m = datasets.multipliers
+    hu_tao = datasets.make_character("Hu Tao", weapon_name="Homa", artifacts=ARTIFACTS,
+                                     aa_level=10, skill_level=10, burst_level=10, combo="E12N1C")
+    furina_artifacts = dict(ARTIFACTS, Goblet=dict(ARTIFACTS["Goblet"], main_stat="Hydro DMG Bonus"))
+    furina = datasets.make_character("Furina", weapon_name="Splendor", artifacts=furina_artifacts,
+                                     aa_level=10, skill_level=10, burst_level=10, combo="QE")
+    # the DP benchmarks time solve() only; building the solver samples the drop models
+    dp_character = datasets.make_character("Hu Tao", weapon_name="Homa", artifacts=ARTIFACTS,
+                                           aa_level=6, skill_level=6, burst_level=6, combo="E12N1C")
+    dp_solvers = {budget: ResinDPSolver(dp_character, m, resin_budget=budget) for budget in (300, 400)}
+
+    return {
+        "calculate_damage": lambda: calculate_damage(
+            base_stat=2500.0, talent_multiplier=242.57, crit_rate=0.7, crit_dmg=2.0,
+            dmg_bonus=0.466, enemy_level=100, character_level=90, enemy_resistance=0.1
+        ),
+        "compute_combo_hits": lambda: compute_combo_hits(m, hu_tao, "12N1C Q"),
+        "compute_total_stats": hu_tao.compute_total_stats,
+        "expected_damage_output[Hu Tao E12N1C]": lambda: hu_tao.expected_damage_output(
+            combo="E12N1C", multipliers=m, enemy_level=100, enemy_resistance=0.1
+        ),
+        "expected_damage_output[Furina QE summons]": lambda: furina.expected_damage_output(
+            combo="QE", multipliers=m, enemy_level=100, enemy_resistance=0.1
+        ),
+        "simulate_artifact": lambda: simulate_artifact("Sands"),
+        "simulate_talent_book_run": lambda: simulate_talent_book_run(domain_level=4),
+        "ResinDPSolver.solve[Hu Tao 300 resin]": dp_solvers[300].solve,
+        "ResinDPSolver.solve[Hu Tao 400 resin]": dp_solvers[400].solve,
+    }
+
+
+def time_call(fn, repeats=7, min_time=0.05):
+    """
+    Calibrate a loop count so one repeat takes ~min_time, then time `repeats`
+    repeats with a fixed seed each. Returns per-call latency statistics.
+    """
+    number = 1
+    while True:
+        random.seed(SEED)
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - t0 >= min_time:
+            break
+        number *= 2
+
+    per_call = []
+    for _ in range(repeats):
+        random.seed(SEED)
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        per_call.append((time.perf_counter() - t0) / number)
+
+    mean = statistics.mean(per_call)
+    return {
+        "calls_per_repeat": number,
+        "repeats": repeats,
+        "mean_s": mean,
+        "std_s": statistics.stdev(per_call) if repeats > 1 else 0.0,
+        "min_s": min(per_call),
+        "calls_per_sec": 1.0 / mean,
+    }
+
+
+def measure_memory(fn):
+    """Peak and retained bytes of one (warmed-up) call."""
+    with memory.tracking():
+        random.seed(SEED)
+        fn()
+        memory.reset()
+        random.seed(SEED)
+        with memory.trial():
+            fn()
+        rec = memory.stats()["trials"][0]
+    return {"peak_bytes": rec["peak_bytes"], "retained_bytes": rec["retained_bytes"]}
+
+
+def check_budgets(report, budgets=MEMORY_BUDGETS):
+    """Return {name: (peak, budget)} for every benchmark over its memory budget."""
+    over = {}
+    for name, res in report["results"].items():
+        budget = budgets.get(name)
+        if budget is not None and "peak_bytes" in res and res["peak_bytes"] > budget:
+            over[name] = (res["peak_bytes"], budget)
+    return over
+
+
+def run_benchmarks(names=None, repeats=7, min_time=0.05, with_memory=False):
+    benchmarks = build_benchmarks(Datasets())
+    results = {}
+    # Summon.total_damage prints a debug line per summon; keep it out of the timings' output
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for name, fn in benchmarks.items():
+            if names and not any(n in name for n in names):
+                continue
+            results[name] = time_call(fn, repeats=repeats, min_time=min_time)
+            if with_memory:
+                results[name].update(measure_memory(fn))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": SEED,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline):
+    """Return {name: current_mean / baseline_mean} for benchmarks present in both."""
+    ratios = {}
+    for name, res in current["results"].items():
+        base = baseline["results"].get(name)
+        if base:
+            ratios[name] = res["mean_s"] / base["mean_s"]
+    return ratios
+
+
+def format_table(report, ratios=None):
+    lines = [f"{'benchmark':<44} {'mean/call':>12} {'± std':>10} {'calls/sec':>12} {'vs base':>8} {'peak B':>8}"]
+    for name, res in report["results"].items():
+        ratio = f"{ratios[name]:.2f}x" if ratios and name in ratios else ""
+        peak = res.get("peak_bytes", "")
+        lines.append(
+            f"{name:<44} {res['mean_s'] * 1e6:>10.2f}µs {res['std_s'] * 1e6:>8.2f}µs "
+            f"{res['calls_per_sec']:>12,.0f} {ratio:>8} {peak:>8}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the GIROS evaluation hot paths.")
+    parser.add_argument("-k", "--filter", action="append", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds per timed repeat")
+    parser.add_argument("--memory", action="store_true", help="measure peak bytes per call and enforce MEMORY_BUDGETS")
+    parser.add_argument("--save", help="write results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--fail-on-regression", type=float, default=None,
+                        help="exit 1 if any benchmark is slower than baseline by this fraction (e.g. 0.10)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.filter, repeats=args.repeats, min_time=args.min_time, with_memory=args.memory)
+    ratios = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            ratios = compare(report, json.load(f))
+        report["vs_baseline"] = ratios
+
+    print(format_table(report, ratios))
+    if args.save:
+        with open(args.save, "w", encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    failed = False
+    if args.memory:
+        over = check_budgets(report)
+        if over:
+            print("Over memory budget: " + ", ".join(f"{n} {p}B > {b}B" for n, (p, b) in over.items()), file=sys.stderr)
+            failed = True
+
+    if ratios and args.fail_on_regression is not None:
+        slow = {n: r for n, r in ratios.items() if r > 1 + args.fail_on_regression}
+        if slow:
+            print("Regressions: " + ", ".join(f"{n} {r:.2f}x" for n, r in slow.items()), file=sys.stderr)
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,5 +2,12 @@
 from .models import Character, Weapon
 from .loaders import load_characters, load_weapons
 from .talents import load_talent_multipliers, compute_combo_hits
-from .character_buffs import apply_skill_buff
-from .formulas import calculate_damage
+from .character_buffs import apply_modifiers, register_modifier, Modifier
+from .formulas import calculate_damage, calculate_damage_gradient
+from . import profiling
+from .gradients import damage_gradient
+from .team import Team
+from .enemies import damage_grid, enemy_profile, ENEMY_LIBRARY
+from .reactions import reaction_sweep
+from .distribution import combo_distribution
+from .weapons import rank_weapons
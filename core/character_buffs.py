@@ -1,120 +1,257 @@
 # core/character_buffs.py
+"""
+Declarative character buffs.
+
+Each buff is a Modifier registered per character: which talent table entry
+scales it, the stat it reads (`source`), the stat it raises (`target`), the
+combo token that casts it (`trigger`) and how long it lasts. Passives
+(trigger=None) are always active; they carry the derived-stat conversions
+such as Furina's HP-based Salon bonus. Coefficients are compiled once per
+(character, talent levels, multiplier table), and apply_modifiers is a pure
+stage: it returns a new stat dict built on top of compute_total_stats(), so
+nothing on the character is mutated or reset.
+
+apply_modifiers resolves everything in one pass over the stat dict, in
+dependency order: a modifier that reads a stat runs after every modifier
+that writes it (flat HP before HP→ATK, HP→ATK before anything reading ATK).
+
+    active, combo = combo_modifiers(character, "E12N1C Q", multipliers)
+    stats = apply_modifiers(character.compute_total_stats(), active)
+"""
+
+import copy
+
+import numpy as np
 
 TALENT_MULTIPLIERS = None  # This gets populated via init
 
+LEVEL_ATTRS = {"AA": "aa_level", "Skill": "skill_level", "Burst": "burst_level"}
+TARGETS = ("flat_atk", "flat_hp", "flat_def", "dmg_bonus", "crit_rate", "crit_dmg", "elemental_mastery",
+           "energy_recharge", "summon_dmg_bonus")
+
+# stat dict keys a target writes; a source in this set must wait for the writer
+WRITES = {
+    "flat_atk": ("flat_bonus", "total_atk"),
+    "flat_hp": ("flat_bonus", "total_hp"),
+    "flat_def": ("flat_bonus", "total_def"),
+    "dmg_bonus": ("elemental_dmg_bonus",),
+}
+
+
 def init_buffs(multipliers):
     global TALENT_MULTIPLIERS
     TALENT_MULTIPLIERS = multipliers
+    _compiled.clear()
+
+
+class Modifier:
+    """
+    A talent buff:
+      amount = table[character][skill][level][key] / 100 × stats[source]
+    added to `target` (see TARGETS). With source=None the scaled value itself
+    is added (e.g. a DMG Bonus%). `fn`, if given, maps the source stat to
+    the amount instead (non-linear conversions; the coefficient is then a
+    plain multiplier). `self_cast` buffs apply to the rest of the combo that
+    casts them and consume their trigger token; `team` buffs also reach
+    other party members. Without a trigger the modifier is a passive.
+    """
+
+    def __init__(self, name, skill, key, target, source=None, trigger=None, duration=None,
+                 self_cast=False, team=False, fn=None):
+        if target not in TARGETS:
+            raise ValueError(f"Unknown modifier target {target!r}; expected one of {TARGETS}")
+        self.name = name
+        self.skill = skill
+        self.key = key
+        self.target = target
+        self.source = source
+        self.trigger = trigger
+        self.duration = duration
+        self.self_cast = self_cast
+        self.team = team
+        self.fn = fn
+        self._shared = None
+
+    @property
+    def passive(self):
+        return self.trigger is None
+
+    def shared(self):
+        """Source-less copy, for an amount already resolved against the caster."""
+        if self.source is None:
+            return self
+        if self._shared is None:
+            self._shared = copy.copy(self)
+            self._shared.source = self._shared.fn = None
+        return self._shared
+
+    def writes(self):
+        return WRITES.get(self.target, (self.target,))
+
+    def coefficient(self, table, character):
+        if self.key is None:
+            return 1.0
+        level = getattr(character, LEVEL_ATTRS[self.skill])
+        entry = (
+            table
+              .get(character.name, {})
+              .get(self.skill, {})
+              .get(level, {})
+              .get(self.key, {})
+        )
+        return entry.get("value", 0.0) / 100.0
+
+    def __repr__(self):
+        origin = f"{self.skill} {self.key}" if self.key else "passive"
+        return f"<Modifier: {self.name} ({origin}) -> {self.target}>"
+
+
+def furina_salon_bonus(total_hp):
+    """Furina passive: +0.7% Salon Member DMG per 1 000 max HP, capped at 28%."""
+    # numpy so stacked (per-weapon) HP totals work too; same values as int() / min()
+    return np.minimum(np.floor_divide(total_hp, 1000) * 0.007, 0.28)
+
+
+MODIFIERS = {}
+_compiled = {}  # id(table) -> (table, {(name, levels): ((modifier, coefficient), ...)})
+
+
+def register_modifier(character_name, modifier):
+    MODIFIERS.setdefault(character_name, []).append(modifier)
+    _compiled.clear()
+
+
+register_modifier("Hu Tao", Modifier(
+    "Guide to Afterlife", skill="Skill", key="ATK_Bonus%HP", source="total_hp", target="flat_atk",
+    trigger="E", duration=9.0, self_cast=True))
+register_modifier("Furina", Modifier(
+    "Let the People Rejoice", skill="Burst", key="Fanfare DMG Bonus%", target="dmg_bonus",
+    trigger="Q", duration=18.0, team=True))
+register_modifier("Bennett", Modifier(
+    "Fantastic Voyage", skill="Burst", key="InspirationBuff", source="base_atk", target="flat_atk",
+    trigger="Q", duration=12.0, team=True))
+register_modifier("Furina", Modifier(
+    "Unheard Confession", skill=None, key=None, source="total_hp", target="summon_dmg_bonus",
+    fn=furina_salon_bonus))
 
-def hu_tao_skill_buff(character):
-    # recompute full stats so total_hp is up-to-date
-    stats = character.compute_total_stats()
-    hp = stats["total_hp"]
-    skill_level = character.skill_level
-    entry = (
-        TALENT_MULTIPLIERS
-          .get(character.name, {})
-          .get("Skill", {})
-          .get(skill_level, {})
-          .get("ATK_Bonus%HP", {})
-    )
-    scaling_percent = entry.get("value", 0.0) / 100.0
-    atk_bonus = hp * scaling_percent
-
-    if not hasattr(character, "_artifact_bonuses"):
-        character._artifact_bonuses = {
-                "percent_bonus": {"hp": 0.0, "atk": 0.0, "def": 0.0},
-                "flat_bonus": {"hp": 0.0, "atk": 0.0, "def": 0.0},
-                "crit_rate": 0.0,
-                "crit_dmg": 0.0,
-                "elemental_mastery": 0.0,
-                "energy_recharge": 0.0,
-                "healing_bonus": 0.0,
-                "elemental_dmg_bonus": {}
-            }
-    character._artifact_bonuses["flat_bonus"]["atk"] += atk_bonus
-
-def furina_burst_buff(character):
+
+def compile_modifiers(character, multipliers=None):
+    """((modifier, coefficient), ...) for the character's current talent levels."""
+    mods = MODIFIERS.get(character.name)
+    if not mods:
+        return ()
+    table = multipliers if multipliers is not None else TALENT_MULTIPLIERS
+    # the table is kept alongside its id so the id cannot be reused while cached
+    cached = _compiled.get(id(table))
+    if cached is None or cached[0] is not table:
+        cached = _compiled[id(table)] = (table, {})
+    key = (character.name, character.aa_level, character.skill_level, character.burst_level)
+    out = cached[1].get(key)
+    if out is None:
+        out = cached[1][key] = tuple((m, m.coefficient(table, character)) for m in mods)
+    return out
+
+
+def combo_modifiers(character, combo, multipliers=None):
     """
-    After she casts Q, give a flat + (scaling from talent) % damage bonus to
-    all damage types. We'll just write it onto character.dmg_bonus here.
+    Passives plus the self-cast buffs `combo` triggers, and the combo with
+    each trigger token removed once (the cast itself deals no damage here).
     """
-    if character.name != "Furina":
-        return False
-
-    # grab the BUFF entry dict, then pull its "value"
-    lvl = character.burst_level
-    buff_entry = (
-        TALENT_MULTIPLIERS
-          .get("Furina", {})
-          .get("Burst", {})
-          .get(lvl, {})
-          .get("Fanfare DMG Bonus%", {})
-    )# or whatever your CSV column is called
-    raw_val = buff_entry.get("value", 0.0)
-    bonus = raw_val / 100.0
-
-    # either add it to her universal dmg_bonus:
-    character.dmg_bonus += bonus
-
-    # or add it on every element:
-    for elem in character.elemental_dmg_bonus:
-        character.elemental_dmg_bonus[elem] += bonus
-
-    return True
-
-def bennett_burst_buff(character):
+    active = []
+    for modifier, coef in compile_modifiers(character, multipliers):
+        if modifier.passive:
+            active.append((modifier, coef))
+        elif modifier.self_cast and combo and modifier.trigger in combo:
+            active.append((modifier, coef))
+            combo = combo.replace(modifier.trigger, "", 1)
+    return active, combo
+
+
+def trigger_modifiers(character, trigger, multipliers=None, team_only=False):
+    """Compiled buffs cast by `trigger` ("E" / "Q")."""
+    return [(m, c) for m, c in compile_modifiers(character, multipliers)
+            if m.trigger == trigger and (m.team or not team_only)]
+
+
+def cast_modifiers(character, combo, multipliers=None):
+    """Team buffs whose trigger token appears in `combo`."""
+    return [(m, c) for m, c in compile_modifiers(character, multipliers)
+            if m.team and m.trigger and combo and m.trigger in combo]
+
+
+def share_modifiers(stats, active):
     """
-    After Bennett casts Q, give a flat ATK bonus:
-      bonus_atk = (base_atk + weapon_base_atk) * (TeamBuff% from multipliers)
+    `active` resolved against the caster's `stats`: source-less copies
+    carrying the final amount, so applying them to another member's stats
+    does not re-read that member's own source stat.
     """
-    if character.name != "Bennett":
-        return False
-
-    # pull the TeamBuff% value for his Burst at current level
-    lvl = character.burst_level
-    raw = TALENT_MULTIPLIERS \
-          .get("Bennett", {}) \
-          .get("Burst", {}) \
-          .get(lvl, {}) \
-          .get("InspirationBuff", 0.0)
-    buff_pct = raw / 100.0
-
-    # compute his “base ATK” (character.base_stats['atk'] already excludes weapon)
-    base_atk = character.base_stats["atk"] + (character.weapon.base_atk if character.weapon else 0)
-    flat_bonus = base_atk * buff_pct
-
-    # stash it into the artifact_bonuses flat ATK slot
-    if not hasattr(character, "_artifact_bonuses"):
-        character._artifact_bonuses = {
-            "percent_bonus": {"hp":0.0, "atk":0.0, "def":0.0},
-            "flat_bonus":    {"hp":0.0, "atk":0.0, "def":0.0},
-            "crit_rate":0.0, "crit_dmg":0.0,
-            "elemental_mastery":0.0, "energy_recharge":0.0,
-            "healing_bonus":0.0, "elemental_dmg_bonus":{}
-        }
-    character._artifact_bonuses["flat_bonus"]["atk"] += flat_bonus
-
-    return True
-
-BUFF_FUNCTIONS = {
-    "Hu Tao": hu_tao_skill_buff,
-    # Add more characters here as needed
-}
-BURST_BUFFS = {
-    "Furina": furina_burst_buff,
-    "Bennett": bennett_burst_buff,
-}
-def apply_skill_buff(character) -> bool:
-    """Return True if we actually applied a buff (i.e. Hu Tao's E)."""
-    if character.name in BUFF_FUNCTIONS:
-        BUFF_FUNCTIONS[character.name](character)
-        return True
-    return False
-
-def apply_burst_buff(character) -> bool:
-    """Called once per 'Q' in your combo string."""
-    fn = BURST_BUFFS.get(character.name)
-    if fn:
-        return fn(character)
-    return False
\ No newline at end of file
+    return [(m.shared(), modifier_amount(stats, m, c)) for m, c in active]
+
+
+def passive_modifiers(character, multipliers=None):
+    """Compiled always-on conversions (no trigger)."""
+    return [(m, c) for m, c in compile_modifiers(character, multipliers) if m.passive]
+
+
+def modifier_amount(stats, modifier, coef):
+    if modifier.source is None:
+        return coef
+    value = stats[modifier.source]
+    return coef * (modifier.fn(value) if modifier.fn else value)
+
+
+def _resolve_order(modifiers):
+    pending = list(range(len(modifiers)))
+    order = []
+    while pending:
+        ready = [i for i in pending
+                 if not any(modifiers[i].source in modifiers[j].writes() for j in pending if j != i)]
+        if not ready:
+            names = ", ".join(modifiers[i].name for i in pending)
+            raise ValueError(f"Cyclic stat conversions between: {names}")
+        order.extend(ready)
+        pending = [i for i in pending if i not in ready]
+    return tuple(order)
+
+
+_orders = {}  # tuple of modifiers -> evaluation order
+
+
+def order_modifiers(active):
+    """
+    `active` in dependency order: every modifier after all modifiers that
+    write the stat it reads. Registration order is kept otherwise.
+    """
+    if len(active) < 2:
+        return active
+    key = tuple(m for m, _ in active)
+    order = _orders.get(key)
+    if order is None:
+        order = _orders[key] = _resolve_order(key)
+    return [active[i] for i in order]
+
+
+def apply_modifiers(stats, active):
+    """
+    New stat dict with every (modifier, coefficient) in `active` added, in
+    one dependency-ordered pass: each source is read after the modifiers
+    that raise it. The incoming `stats` is left untouched.
+    """
+    if not active:
+        return stats
+    out = dict(stats)
+    out["flat_bonus"] = dict(stats["flat_bonus"])
+    out["elemental_dmg_bonus"] = dict(stats["elemental_dmg_bonus"])
+    for modifier, coef in order_modifiers(active):
+        amount = modifier_amount(out, modifier, coef)
+        target = modifier.target
+        if target in ("flat_atk", "flat_hp", "flat_def"):
+            stat = target[5:]
+            out["flat_bonus"][stat] += amount
+            out[f"total_{stat}"] += amount
+        elif target == "dmg_bonus":
+            for elem in out["elemental_dmg_bonus"]:
+                out["elemental_dmg_bonus"][elem] += amount
+        else:
+            out[target] = out.get(target, 0.0) + amount
+    return out
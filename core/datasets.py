@@ -0,0 +1,72 @@
+# core/datasets.py
+import csv
+import os
+
+from core.models import Character, Weapon
+from core.talents import load_talent_multipliers
+from core.defaults import load_default_combos
+from core.character_buffs import init_buffs
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+class Datasets:
+    """
+    Read-only character/weapon/multiplier tables, loaded once and shared by
+    every character built from them (no per-character CSV reads).
+    """
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+
+        with open(os.path.join(data_dir, "genshin_characters_v1.csv"), newline='', encoding='utf-8-sig') as f:
+            self.character_rows = {row["character_name"]: row for row in csv.DictReader(f)}
+
+        with open(os.path.join(data_dir, "genshin_weapons_v6.csv"), newline='', encoding='utf-8-sig') as f:
+            self.weapon_rows = list(csv.DictReader(f))
+
+        self.multipliers = load_talent_multipliers(os.path.join(data_dir, "talent_multipliers.csv"))
+        self.default_combos = load_default_combos(os.path.join(data_dir, "character_defaults.csv"))
+
+        # Hu Tao's E buff reads the multipliers from core.character_buffs
+        init_buffs(self.multipliers)
+
+    def find_weapon(self, weapon_name):
+        """Same matching as make_clean_character: first case-insensitive substring hit."""
+        needle = weapon_name.lower()
+        for row in self.weapon_rows:
+            if needle in row["weapon_name"].lower():
+                return Weapon.load_from_csv_row(row)
+        raise ValueError(f"Weapon '{weapon_name}' not found.")
+
+    def make_character(
+        self,
+        name,
+        weapon_name=None,
+        artifacts=None,
+        aa_level=1, skill_level=1, burst_level=1,
+        combo=None, skill_type="AA"
+    ):
+        """
+        Equivalent of core.utils.character_factory, built from the preloaded tables.
+        """
+        row = self.character_rows.get(name)
+        if row is None:
+            raise ValueError(f"Character '{name}' not found.")
+        char = Character.load_from_csv_row(row)
+
+        if weapon_name:
+            char.weapon = self.find_weapon(weapon_name)
+        if artifacts:
+            # copy the slot mapping so simulators never write into the caller's dict
+            char.artifacts.update(artifacts)
+
+        char.aa_level = aa_level
+        char.skill_level = skill_level
+        char.burst_level = burst_level
+        defaults = self.default_combos.get(name, {})
+        char.default_combo = combo or defaults.get("combo") or char.default_combo
+        char.default_skill = skill_type
+
+        char.sync_stats(char.compute_total_stats())
+        return char
@@ -0,0 +1,230 @@
+# core/distribution.py
+"""
+Full damage distribution of a combo, not just its expectation.
+
+Every hit is a small discrete distribution: non-crit / crit with
+probability CR (and, for reaction-tagged hits, reacted / not reacted with
+probability reaction_rate). Its mean is exactly the calculate_damage
+expectation, so the distribution's mean matches expected_damage_output
+(as long as CR ≤ 1; higher crit rates are clipped here).
+
+Two ways to combine the hits:
+
+  "fft"     Each outcome's mass is split between the two neighbouring
+            points of a grid with step h (the mean is preserved exactly).
+            The hits' characteristic functions are multiplied, identical
+            hits by raising to their count, and inverted with one FFT.
+            Every sample path moves by at most h per hit, so percentiles
+            are exact to ±n_hits·h.
+  "sample"  Vectorized Monte Carlo: per group of identical hits a
+            binomial / multinomial draw of outcomes, so the cost does not
+            grow with the hit count. Percentiles and exceedance
+            probabilities come with 95% confidence intervals.
+
+method="auto" uses the FFT while n_hits·h stays below `tol` × the mean
+on at most `max_bins` points, and samples otherwise (long rotations).
+
+    dist = combo_distribution(hu_tao, multipliers, combo="E12N1C Q")
+    dist.percentile(0.9), dist.exceedance(2_000_000), dist.exceedance_bounds(2_000_000)
+"""
+import math
+
+import numpy as np
+
+from core.formulas import calculate_damage
+from core.reactions import amplifying_multiplier, em_bonus
+
+DEFAULT_BINS = 2 ** 16
+MAX_BINS = 2 ** 20
+DEFAULT_SAMPLES = 200_000
+Z95 = 1.959963984540054
+
+
+# ── hits ──
+def _outcomes(noncrit, crit_rate, crit_dmg, react=None, rate=1.0):
+    """(values, probabilities) of one hit."""
+    cr = min(max(crit_rate, 0.0), 1.0)
+    values, probs = [noncrit, noncrit * (1 + crit_dmg)], [1 - cr, cr]
+    if react is not None:
+        values = [v for v in values] + [v * react for v in values]
+        probs = [p * (1 - rate) for p in probs] + [p * rate for p in probs]
+    kept = [(v, p) for v, p in zip(values, probs) if p > 0]
+    return tuple(v for v, _ in kept), tuple(p for _, p in kept)
+
+
+def combo_hits(
+        character,
+        multipliers,
+        combo=None,
+        crit_rate=None,
+        crit_dmg=None,
+        character_level=90,
+        enemy_level=100,
+        enemy_resistance=0.1,
+        reaction_rate=1.0,
+        stats=None,
+        buffs=None
+):
+    """
+    {(values, probabilities): count} over the combo's hits
+    (core.hits.combo_damage_hits, as expected_damage_output scores them).
+    """
+    from core.hits import combo_damage_hits
+
+    stats, _, damage_hits = combo_damage_hits(character, multipliers, combo=combo, crit_rate=crit_rate,
+                                              crit_dmg=crit_dmg, stats=stats, buffs=buffs)
+    enemy = dict(character_level=character_level, enemy_level=enemy_level, enemy_resistance=enemy_resistance)
+    amp = 1 + em_bonus(stats["elemental_mastery"])
+
+    hits = {}
+    for hit in damage_hits:
+        noncrit = calculate_damage(base_stat=hit.base_stat, talent_multiplier=hit.multiplier, crit_rate=0.0,
+                                   crit_dmg=0.0, dmg_bonus=hit.dmg_bonus, **enemy)
+        react = None
+        if hit.reaction is not None:
+            react = amplifying_multiplier(hit.reaction, hit.element) * amp
+        outcome = _outcomes(noncrit, hit.crit_rate, hit.crit_dmg, react, reaction_rate)
+        hits[outcome] = hits.get(outcome, 0) + hit.count
+    return hits
+
+
+# ── distributions ──
+class GridDistribution:
+    """Exact-up-to-discretization distribution on a uniform grid (FFT method)."""
+
+    method = "fft"
+
+    def __init__(self, step, pmf, n_hits, mean):
+        self.step = step
+        self.pmf = pmf
+        self.cdf = np.cumsum(pmf)
+        self.n_hits = n_hits
+        self.mean = mean
+        self.error = n_hits * step  # max shift of any sample path
+
+    def percentile(self, q):
+        i = int(np.searchsorted(self.cdf, q * self.cdf[-1]))
+        return min(i, len(self.pmf) - 1) * self.step
+
+    def percentile_bounds(self, q):
+        p = self.percentile(q)
+        return max(0.0, p - self.error), p + self.error
+
+    def _survival(self, threshold):
+        i = math.ceil(threshold / self.step - 1e-9)
+        if i <= 0:
+            return 1.0
+        if i >= len(self.pmf):
+            return 0.0
+        return float(max(0.0, self.cdf[-1] - self.cdf[i - 1]))
+
+    def exceedance(self, threshold):
+        """P(damage ≥ threshold)."""
+        return self._survival(threshold)
+
+    def exceedance_bounds(self, threshold):
+        return self._survival(threshold + self.error), self._survival(threshold - self.error)
+
+
+class SampledDistribution:
+    """Monte Carlo distribution with 95% confidence intervals (sampler method)."""
+
+    method = "sample"
+
+    def __init__(self, samples, mean):
+        self.samples = np.sort(samples)
+        self.n = len(samples)
+        self.mean = mean  # exact; the sample mean is self.samples.mean()
+
+    def percentile(self, q):
+        return float(np.quantile(self.samples, q))
+
+    def percentile_bounds(self, q):
+        # distribution-free order-statistic interval
+        half = Z95 * math.sqrt(self.n * q * (1 - q))
+        lo = max(0, math.floor(self.n * q - half))
+        hi = min(self.n - 1, math.ceil(self.n * q + half))
+        return float(self.samples[lo]), float(self.samples[hi])
+
+    def exceedance(self, threshold):
+        return float(self.n - np.searchsorted(self.samples, threshold, side="left")) / self.n
+
+    def exceedance_bounds(self, threshold):
+        # Wilson score interval
+        p, n = self.exceedance(threshold), self.n
+        centre = (p + Z95 ** 2 / (2 * n)) / (1 + Z95 ** 2 / n)
+        half = Z95 * math.sqrt(p * (1 - p) / n + Z95 ** 2 / (4 * n * n)) / (1 + Z95 ** 2 / n)
+        return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def fft_distribution(hits, bins=DEFAULT_BINS):
+    """Convolve the hits' distributions on `bins` grid points."""
+    top = sum(max(values) * count for (values, _), count in hits.items())
+    n_hits = sum(hits.values())
+    mean = sum(count * sum(v * p for v, p in zip(*outcome)) for outcome, count in hits.items())
+    if top <= 0:
+        return GridDistribution(1.0, np.array([1.0]), n_hits, 0.0)
+    if bins <= n_hits + 1:
+        raise ValueError(f"bins must exceed n_hits + 1 = {n_hits + 1}, got {bins}")
+    # splitting rounds every hit up by less than one point, so the indices of
+    # a sample path sum to at most top / step + n_hits = bins - 1: the
+    # circular convolution never wraps
+    step = top / (bins - 1 - n_hits)
+    phi = np.ones(bins // 2 + 1, dtype=complex)
+    for (values, probs), count in hits.items():
+        pos = np.asarray(values) / step
+        low = np.floor(pos).astype(int)
+        w = pos - low
+        p = np.asarray(probs)
+        hit = np.zeros(bins)
+        np.add.at(hit, low, p * (1 - w))
+        np.add.at(hit, low + 1, p * w)
+        phi *= np.fft.rfft(hit) ** count
+    pmf = np.fft.irfft(phi, n=bins)
+    pmf = np.clip(pmf, 0.0, None)
+    return GridDistribution(step, pmf / pmf.sum(), n_hits, mean)
+
+
+def sample_distribution(hits, samples=DEFAULT_SAMPLES, seed=0):
+    """Vectorized sampler: one binomial / multinomial draw per group of identical hits."""
+    rng = np.random.default_rng(seed)
+    total = np.zeros(samples)
+    mean = 0.0
+    for (values, probs), count in hits.items():
+        values = np.asarray(values)
+        mean += count * float(values @ np.asarray(probs))
+        if len(values) == 1:
+            total += count * values[0]
+        elif len(values) == 2:
+            k = rng.binomial(count, probs[1], size=samples)
+            total += (count - k) * values[0] + k * values[1]
+        else:
+            total += rng.multinomial(count, probs, size=samples) @ values
+    return SampledDistribution(total, mean)
+
+
+def combo_distribution(character, multipliers, combo=None, method="auto", bins=DEFAULT_BINS,
+                       max_bins=MAX_BINS, tol=1e-3, samples=DEFAULT_SAMPLES, seed=0, **kwargs):
+    """
+    Damage distribution of `combo` (see module docstring). Keyword
+    arguments are those of combo_hits (crit overrides, enemy, reaction_rate,
+    stats, buffs).
+    """
+    if method not in ("auto", "fft", "sample"):
+        raise ValueError(f"Unknown method {method!r}; expected 'auto', 'fft' or 'sample'")
+    hits = combo_hits(character, multipliers, combo=combo, **kwargs)
+    if method == "auto":
+        n_hits = sum(hits.values())
+        top = sum(max(values) * count for (values, _), count in hits.items())
+        mean = sum(count * sum(v * p for v, p in zip(*outcome)) for outcome, count in hits.items())
+        # smallest power of two keeping the percentile error n_hits * h within tol * mean,
+        # with h = top / (bins - 1 - n_hits)
+        needed = n_hits * top / (tol * mean) + n_hits + 1 if mean > 0 else bins
+        if needed <= max_bins:
+            bins = max(bins, 1 << math.ceil(math.log2(needed)))
+            method = "fft"
+        else:
+            method = "sample"
+    if method == "fft":
+        return fft_distribution(hits, bins)
+    return sample_distribution(hits, samples, seed)
@@ -0,0 +1,123 @@
+# core/enemies.py
+"""
+Enemy profiles and damage over many enemies at once.
+
+calculate_damage is a product of factors, and only two of them depend on
+the enemy: DEF (level, DEF reduction / ignore) and RES (per element). So
+damage_grid scores the combo's hits once (core.hits.combo_damage_hits, as
+expected_damage_output does) but keeps each hit's enemy-independent part
+summed per element (and amplifying reaction multiplier, for tagged hits;
+see core.reactions):
+
+    raw[element, amp] = Σ base × multiplier × (1 + CR·CD) × (1 + DMG bonus)
+
+and the damage vector is then
+    def_factor[enemy] × Σ raw[e, amp] × res_factor[enemy, e] × reaction_factor(amp, EM).
+
+A profile is a dict:
+    {"name": "Abyss 12-3", "level": 100, "res": {"default": 0.1, "Physical": 0.3},
+     "def_reduction": 0.0, "def_ignore": 0.0}
+
+    profiles = [ENEMY_LIBRARY[k] for k in ("abyss_9", "abyss_12")] + [enemy_profile("dummy", level=90)]
+    damage = damage_grid(char, multipliers, profiles)      # numpy vector, one entry per profile
+"""
+import numpy as np
+
+from core.reactions import amplifying_multiplier, reaction_factor
+
+DEFAULT_RES = 0.1
+
+
+def enemy_profile(name, level=100, res=DEFAULT_RES, def_reduction=0.0, def_ignore=0.0):
+    """
+    A profile dict. `res` is one RES for every element, or a dict of
+    per-element RES with an optional "default" for the rest.
+    """
+    if isinstance(res, dict):
+        res = dict(res)
+        res.setdefault("default", DEFAULT_RES)
+    else:
+        res = {"default": float(res)}
+    return {"name": name, "level": level, "res": res, "def_reduction": def_reduction, "def_ignore": def_ignore}
+
+
+# Representative targets; Abyss levels are approximate last-chamber levels
+ENEMY_LIBRARY = {
+    "dummy_90": enemy_profile("Lv90 dummy", level=90),
+    "abyss_9": enemy_profile("Abyss 9", level=82),
+    "abyss_10": enemy_profile("Abyss 10", level=85),
+    "abyss_11": enemy_profile("Abyss 11", level=90),
+    "abyss_12": enemy_profile("Abyss 12", level=100),
+    "ruin_guard": enemy_profile("Ruin Guard", level=90, res={"default": 0.1, "Physical": 0.7}),
+    "pyro_slime": enemy_profile("Pyro Slime", level=90, res={"default": 0.1, "Pyro": float("inf")}),
+    "res_shred": enemy_profile("Lv100, -40% RES", level=100, res=-0.3),
+    "def_shred": enemy_profile("Lv100, 30% DEF shred", level=100, def_reduction=0.3),
+}
+
+
+def resolve_profiles(enemies):
+    """Profiles from a list of profile dicts and / or ENEMY_LIBRARY keys."""
+    out = []
+    for enemy in enemies:
+        if isinstance(enemy, str):
+            if enemy not in ENEMY_LIBRARY:
+                raise ValueError(f"Unknown enemy {enemy!r}; expected one of {sorted(ENEMY_LIBRARY)}")
+            enemy = ENEMY_LIBRARY[enemy]
+        out.append(enemy)
+    return out
+
+
+# ── factors ──
+def def_factors(profiles, character_level=90):
+    level = np.array([p["level"] for p in profiles], dtype=float)
+    reduction = np.array([p.get("def_reduction", 0.0) for p in profiles], dtype=float)
+    ignore = np.array([p.get("def_ignore", 0.0) for p in profiles], dtype=float)
+    return (character_level + 100) / ((1 - reduction) * (1 - ignore) * (level + 100) + character_level + 100)
+
+
+def res_factors(profiles, element):
+    """calculate_damage's piecewise RES multiplier, per profile, for one element."""
+    res = np.array([p["res"].get(element, p["res"].get("default", DEFAULT_RES)) for p in profiles], dtype=float)
+    with np.errstate(divide="ignore"):
+        high = 1 / (4 * res + 1)
+    return np.where(res < 0, 1 - res / 2, np.where(res < 0.75, 1 - res, high))
+
+
+# ── combo walk ──
+def _raw(base_stat, talent_multiplier, crit_rate, crit_dmg, dmg_bonus):
+    return base_stat * talent_multiplier/100 * (1 + crit_rate * crit_dmg) * (1 + dmg_bonus)
+
+
+def combo_raw_damage(character, multipliers, combo=None, crit_rate=None, crit_dmg=None, stats=None, buffs=None):
+    """
+    ({(element, amplifying multiplier or None): Σ enemy-independent damage},
+    EM) for one combo, over the hits of core.hits.combo_damage_hits.
+    """
+    from core.hits import combo_damage_hits
+
+    stats, _, hits = combo_damage_hits(character, multipliers, combo=combo, crit_rate=crit_rate,
+                                       crit_dmg=crit_dmg, stats=stats, buffs=buffs)
+    raw = {}
+    for hit in hits:
+        key = (hit.element, amplifying_multiplier(hit.reaction, hit.element) if hit.reaction else None)
+        term = hit.count * _raw(hit.base_stat, hit.multiplier, hit.crit_rate, hit.crit_dmg, hit.dmg_bonus)
+        raw[key] = raw.get(key, 0.0) + term
+    return raw, stats["elemental_mastery"]
+
+
+def damage_grid(character, multipliers, enemies, combo=None, crit_rate=None, crit_dmg=None,
+                character_level=90, stats=None, buffs=None, reaction_rate=1.0):
+    """
+    Expected combo damage against every enemy in `enemies` (profile dicts
+    or ENEMY_LIBRARY keys), as a numpy vector. The combo and the stat
+    totals are evaluated once; only the DEF and RES factors vary.
+    """
+    profiles = resolve_profiles(enemies)
+    raw, em = combo_raw_damage(character, multipliers, combo=combo, crit_rate=crit_rate, crit_dmg=crit_dmg,
+                               stats=stats, buffs=buffs)
+    damage = np.zeros(len(profiles))
+    for (element, amp), value in raw.items():
+        if amp is not None:
+            value *= reaction_factor(amp, em, reaction_rate)
+        damage += value * res_factors(profiles, element)
+    return damage * def_factors(profiles, character_level)
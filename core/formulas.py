@@ -73,6 +73,67 @@ def calculate_damage(
 
     return damage
 
+def calculate_damage_gradient(
+    base_stat,
+    talent_multiplier,
+    crit_rate,
+    crit_dmg,
+    dmg_bonus,
+    enemy_level,
+    character_level,
+    enemy_resistance,
+    def_ignore=0.0,
+    def_reduction=0.0,
+    reaction_multiplier=1.0,
+    em=0,
+    reaction_type=None
+):
+    """
+    calculate_damage plus its partial derivatives, from the same factors.
+
+    Returns:
+    - (damage, partials): partials maps "base_stat", "crit_rate", "crit_dmg",
+      "dmg_bonus" and "em" to d(damage)/d(parameter), in the parameter's own
+      units (e.g. crit_rate as a 0-1 fraction).
+    """
+    base_damage = base_stat * talent_multiplier/100
+    crit_multiplier = 1 + crit_rate * crit_dmg
+    dmg_bonus_multiplier = 1 + dmg_bonus
+    def_multiplier = (character_level + 100) / (
+        (1 - def_reduction) * (1 - def_ignore) * (enemy_level + 100) + character_level + 100
+    )
+
+    if enemy_resistance < 0:
+        res_multiplier = 1 - (enemy_resistance / 2)
+    elif enemy_resistance < 0.75:
+        res_multiplier = 1 - enemy_resistance
+    else:
+        res_multiplier = 1 / (4 * enemy_resistance + 1)
+
+    # d(reaction_bonus_multiplier)/d(em)
+    if reaction_type == 'amplifying':
+        reaction_bonus_multiplier = reaction_multiplier * (1 + 2.78 * em / (em + 1400))
+        d_reaction = reaction_multiplier * 2.78 * 1400 / (em + 1400) ** 2
+    elif reaction_type == 'transformative':
+        reaction_bonus_multiplier = reaction_multiplier * (1 + 16 * em / (em + 2000))
+        d_reaction = reaction_multiplier * 16 * 2000 / (em + 2000) ** 2
+    else:
+        reaction_bonus_multiplier = 1.0
+        d_reaction = 0.0
+
+    constant = talent_multiplier/100 * def_multiplier * res_multiplier
+    damage = base_damage * crit_multiplier * dmg_bonus_multiplier * def_multiplier * res_multiplier * reaction_bonus_multiplier
+
+    scale = constant * reaction_bonus_multiplier
+    partials = {
+        "base_stat": scale * crit_multiplier * dmg_bonus_multiplier,
+        "crit_rate": base_stat * scale * crit_dmg * dmg_bonus_multiplier,
+        "crit_dmg": base_stat * scale * crit_rate * dmg_bonus_multiplier,
+        "dmg_bonus": base_stat * scale * crit_multiplier,
+        "em": base_stat * constant * crit_multiplier * dmg_bonus_multiplier * d_reaction,
+    }
+    return damage, partials
+
 def calculate_heal(
     base_hp: float,
     heal_pct: float,
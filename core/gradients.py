@@ -0,0 +1,136 @@
+# core/gradients.py
+"""
+Analytical stat weights for Character.expected_damage_output.
+
+damage_gradient scores the same hits as expected_damage_output
+(core.hits.combo_damage_hits) and, in the same pass, applies the chain rule
+through calculate_damage_gradient and the stat totals of compute_total_stats:
+
+    total_atk = base_atk * (1 + ATK%) + flat ATK  (+ ratio * total_hp with Hu Tao's E)
+    total_hp  = base_hp  * (1 + HP%)  + flat HP
+
+The gradient maps artifact stat names to d(damage) / d(one unit of the stat
+as written on an artifact), e.g. one point of "ATK%" or one point of
+"Flat ATK". Keys follow compute_total_stats' stat names ("Pyro DMG Bonus"
+for elemental bonus). Stats it ignores, and piecewise-constant terms such
+as Furina's salon bonus, have zero weight.
+
+    damage, grad = damage_gradient(char, multipliers, combo="E12N1C Q")
+    gain = score_artifact(grad, new_piece) - score_artifact(grad, old_piece)
+"""
+from core.formulas import calculate_damage_gradient
+from core.reactions import amplifying_multiplier, reaction_factor_gradient
+
+STAT_NAMES = (
+    'Flat HP', 'Flat ATK', 'Flat DEF', 'HP%', 'ATK%', 'DEF%', 'Elemental Mastery',
+    'Energy Recharge%', 'CRIT Rate%', 'CRIT DMG%', 'Healing Bonus%',
+)
+
+# Mean 5★ substat roll per stat (average of the four roll tiers)
+AVERAGE_ROLLS = {
+    'Flat HP': 253.94, 'Flat ATK': 16.54, 'Flat DEF': 19.68, 'HP%': 4.96, 'ATK%': 4.96,
+    'DEF%': 6.20, 'Elemental Mastery': 19.82, 'Energy Recharge%': 5.51, 'CRIT Rate%': 3.31,
+    'CRIT DMG%': 6.61,
+}
+
+
+def damage_gradient(
+        character,
+        multipliers,
+        combo=None,
+        crit_rate=None,
+        crit_dmg=None,
+        character_level=90,
+        enemy_level=100,
+        enemy_resistance=0.1,
+        reaction_rate=1.0
+):
+    """
+    (damage, gradient) for one combo. `damage` equals
+    character.expected_damage_output(...) with the same arguments, and the
+    character is left in the same state that call leaves it in.
+    """
+    from core.hits import combo_damage_hits
+
+    # — same buffs and hits as expected_damage_output —
+    stats, active, hits = combo_damage_hits(character, multipliers, combo=combo, crit_rate=crit_rate,
+                                            crit_dmg=crit_dmg)
+
+    # d(total_atk)/d(total_hp) through HP -> flat ATK conversions (Hu Tao's E)
+    hp_to_atk = sum(coef for m, coef in active if m.source == "total_hp" and m.target == "flat_atk")
+
+    acc = {"atk": 0.0, "hp": 0.0, "crit_rate": 0.0, "crit_dmg": 0.0, "em": 0.0, "bonus": {}}
+    total_dmg = 0.0
+
+    for hit in hits:
+        dmg, d = calculate_damage_gradient(
+            base_stat=hit.base_stat,
+            talent_multiplier=hit.multiplier,
+            crit_rate=hit.crit_rate,
+            crit_dmg=hit.crit_dmg,
+            dmg_bonus=hit.dmg_bonus,
+            character_level=character_level,
+            enemy_level=enemy_level,
+            enemy_resistance=enemy_resistance
+        )
+        if hit.reaction is not None:
+            # reacted hit = plain hit × factor(EM)
+            factor, d_factor = reaction_factor_gradient(amplifying_multiplier(hit.reaction, hit.element),
+                                                        stats["elemental_mastery"], reaction_rate)
+            acc["em"] += hit.count * dmg * d_factor
+            dmg *= factor
+            d = {k: v * factor for k, v in d.items()}
+        total_dmg += hit.count * dmg
+        acc["hp" if hit.scaling == "HP" else "atk"] += hit.count * d["base_stat"]
+        # an explicit crit_rate / crit_dmg argument replaces the character's
+        # (summons always use their own)
+        if hit.summon or not crit_rate:
+            acc["crit_rate"] += hit.count * d["crit_rate"]
+        if hit.summon or not crit_dmg:
+            acc["crit_dmg"] += hit.count * d["crit_dmg"]
+        acc["bonus"][hit.element] = acc["bonus"].get(hit.element, 0.0) + hit.count * d["dmg_bonus"]
+
+    # — chain rule into artifact stat units —
+    d_hp = acc["hp"] + hp_to_atk * acc["atk"]
+    grad = dict.fromkeys(STAT_NAMES, 0.0)
+    grad['Flat ATK'] = acc["atk"]
+    grad['ATK%'] = acc["atk"] * stats["base_atk"] / 100
+    grad['Flat HP'] = d_hp
+    grad['HP%'] = d_hp * stats["base_hp"] / 100
+    grad['CRIT Rate%'] = acc["crit_rate"] / 100
+    grad['CRIT DMG%'] = acc["crit_dmg"] / 100
+    grad['Elemental Mastery'] = acc["em"]
+    for element in stats["elemental_dmg_bonus"]:
+        grad[f"{element} DMG Bonus"] = acc["bonus"].get(element, 0.0) / 100
+    return total_dmg, grad
+
+
+def score_artifact(gradient, artifact):
+    """First-order damage contribution of an artifact: Σ weight × stat value."""
+    if not artifact:
+        return 0.0
+    score = gradient.get(artifact["main_stat"], 0.0) * artifact["main_stat_value"]
+    for stat, value in artifact["substats"].items():
+        score += gradient.get(stat, 0.0) * value
+    return score
+
+
+def sensitivity_report(character, multipliers, combo=None, **kwargs):
+    """
+    Stat weights as rows sorted by value per average substat roll:
+    {"stat", "per_unit", "per_roll", "pct_per_roll"} (per_roll is None for
+    stats that are never substats).
+    """
+    damage, grad = damage_gradient(character, multipliers, combo=combo, **kwargs)
+    rows = []
+    for stat, weight in grad.items():
+        roll = AVERAGE_ROLLS.get(stat)
+        per_roll = weight * roll if roll is not None else None
+        rows.append({
+            "stat": stat,
+            "per_unit": weight,
+            "per_roll": per_roll,
+            "pct_per_roll": 100 * per_roll / damage if per_roll is not None and damage else None,
+        })
+    rows.sort(key=lambda r: r["per_roll"] if r["per_roll"] is not None else -1.0, reverse=True)
+    return damage, rows
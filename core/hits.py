@@ -0,0 +1,100 @@
+# core/hits.py
+"""
+The one combo walk behind every damage evaluation.
+
+combo_damage_hits resolves the combo's buffs (self-cast triggers, passives
+and the party's `buffs`) in one modifier pass, then yields every damaging
+hit with the stats it is scored with:
+
+  - Furina's E summons (if the combo has an E): one Hit per summon, with
+    `count` = its ticks over 30 s, scored on her passive (Salon bonus), the
+    party buffs and, when Q comes before E in the combo, her Burst buff
+    (once, if the party buffs already carry it). That E is then removed
+    from the combo.
+  - the remaining hits of compute_combo_hits, with BUFF entries stacked onto
+    the DMG bonus of the hits after them.
+
+expected_damage_output, damage_gradient, combo_raw_damage (damage_grid,
+rank_weapons) and combo_hits (combo_distribution) only differ in what they
+do with each Hit. Stat values may be numpy vectors (core.weapons).
+
+    stats, active, hits = combo_damage_hits(hu_tao, multipliers, combo="E12N1C Q")
+    total = sum(hit.count * calculate_damage(hit.base_stat, hit.multiplier, hit.crit_rate, hit.crit_dmg,
+                                             hit.dmg_bonus, 100, 90, 0.1) for hit in hits)
+"""
+from collections import namedtuple
+
+from core.character_buffs import apply_modifiers, combo_modifiers, passive_modifiers, trigger_modifiers
+
+# scaling: "HP" / "ATK" / "Physical" (base_stat is total_hp or total_atk);
+# reaction: amplifying reaction name or None; summon: True for Furina's
+# summons, whose crit stays the character's own whatever crit override applies
+Hit = namedtuple("Hit", "scaling base_stat multiplier crit_rate crit_dmg dmg_bonus element reaction count summon")
+
+
+def _furina_summon_hits(character, multipliers, apply_q, own_stats, buffs):
+    from core.summons import FURINA_SUMMONS, Summon
+
+    buffs = list(buffs or ())
+    mods = passive_modifiers(character, multipliers) + buffs
+    if apply_q:
+        # her own Fanfare is among the party buffs when a Team shares it
+        mods += [(m, c) for m, c in trigger_modifiers(character, "Q", multipliers)
+                 if all(m.shared() is not b for b, _ in buffs)]
+    stats = apply_modifiers(own_stats, mods)
+    table = multipliers[character.name]["Skill"][character.skill_level]
+    bonus = stats["elemental_dmg_bonus"].get("Hydro", 0.0) + stats.get("summon_dmg_bonus", 0.0)
+    for hit_key, interval, duration in FURINA_SUMMONS:
+        entry = table.get(hit_key, {})
+        scaling = entry.get("scaling", "")
+        if scaling not in ("HP", "ATK"):
+            raise ValueError(f"Unexpected scaling {scaling!r} on {hit_key!r}")
+        ticks = Summon(character, multipliers, "Skill", hit_key, character.skill_level, "Hydro",
+                       interval, duration).ticks()
+        yield Hit(scaling, stats["total_hp"] if scaling == "HP" else stats["total_atk"], entry.get("value", 0.0),
+                  stats["crit_rate"], stats["crit_dmg"], bonus, "Hydro", None, ticks, True)
+
+
+def _hits(character, multipliers, combo, original_combo, crit_rate, crit_dmg, own_stats, stats, buffs):
+    from core.talents import compute_combo_hits
+
+    if character.name == "Furina" and "E" in original_combo:
+        # only apply the Q buff if Q was before E in the original combo
+        apply_q = "Q" in original_combo and original_combo.index("Q") < original_combo.index("E")
+        yield from _furina_summon_hits(character, multipliers, apply_q, own_stats, buffs)
+        # strip that one E so the hits loop won't re-process it
+        combo = combo.replace("E", "", 1)
+
+    cr = crit_rate or stats["crit_rate"]
+    cd = crit_dmg or stats["crit_dmg"]
+    hp, atk, elemental = stats["total_hp"], stats["total_atk"], stats["elemental_dmg_bonus"]
+    percent_dmg = 0.0
+    for mult, scaling, reaction in compute_combo_hits(multipliers, character, combo, with_reactions=True):
+        # BUFF entries stack onto the DMG bonus of the hits after them
+        if scaling == "BUFF":
+            percent_dmg += mult
+            continue
+        element = character.vision if scaling != "Physical" else "Physical"
+        yield Hit(scaling, hp if scaling == "HP" else atk, mult, cr, cd, elemental.get(element, 0.0) + percent_dmg,
+                  element, reaction, 1, False)
+
+
+def combo_damage_hits(character, multipliers, combo=None, crit_rate=None, crit_dmg=None, stats=None, buffs=None):
+    """
+    (buffed stats, active modifiers, iterator of Hit) for one combo.
+    `stats` are the character's compute_total_stats() totals if the caller
+    already has them; the character is synced to its own, un-buffed totals.
+    `buffs` are shared (modifier, amount) party buffs (core.team).
+    The buffs are resolved here; the hits are produced as they are read.
+    """
+    combo = combo if combo is not None else character.default_combo
+    original_combo = combo
+
+    own_stats = stats if stats is not None else character.compute_total_stats()
+    character.sync_stats(own_stats)
+    active, combo = combo_modifiers(character, combo, multipliers)
+    if buffs:
+        active = active + list(buffs)
+    stats = apply_modifiers(own_stats, active)
+    return stats, active, _hits(character, multipliers, combo, original_combo, crit_rate, crit_dmg,
+                                own_stats, stats, buffs)
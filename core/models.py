@@ -1,6 +1,5 @@
 # core/models.py
 from core.formulas import calculate_damage
-from core.character_buffs import apply_skill_buff
 import re
 
 class Weapon:
@@ -108,82 +107,57 @@ class Character:
             multipliers=None,
             enemy_level=100,
             enemy_resistance=0.1,
+            stats=None,
+            buffs=None,
+            enemies=None,
+            reaction_rate=1.0,
             **kwargs
     ):
-        from core.talents import compute_combo_hits
-        from core.formulas import calculate_damage
-        from core.summons import simulate_furina_e_summons
-
-        # Keep original combo around for Furina E-summons logic
-        original_combo = combo if combo is not None else self.default_combo
-
-        # Store original ATK for Hu Tao buff revert
-        original_atk = self.base_stats['atk']
-
-        # Clear any existing Hu Tao flat-ATK buff & reset talent buffs
-        if hasattr(self, "_artifact_bonuses"):
-            self._artifact_bonuses["flat_bonus"]["atk"] = 0
-        self._talent_buffs = {"percent_dmg": 0.0}
+        """
+        Expected damage of `combo`. `stats` are this character's
+        compute_total_stats() totals when the caller already aggregated them;
+        otherwise they are aggregated here, once, and shared by every stage.
+        `buffs` are (modifier, amount) pairs from teammates (see core.team).
+        With `enemies` (profiles or core.enemies.ENEMY_LIBRARY keys) the
+        result is a numpy vector, one damage per enemy, from a single pass.
+        Hits in segments tagged "@v" / "@m" vaporize / melt on
+        `reaction_rate` of their hits (see core.reactions).
+        """
+        if enemies is not None:
+            from core.enemies import damage_grid
+            return damage_grid(self, multipliers, enemies, combo=combo, crit_rate=crit_rate, crit_dmg=crit_dmg,
+                               character_level=character_level, stats=stats, buffs=buffs,
+                               reaction_rate=reaction_rate)
 
-        # — Hu Tao E buff (if present) —
-        e_buffed = False
-        if self.name == "Hu Tao" and combo and "E" in combo:
-            if apply_skill_buff(self):
-                e_buffed = True
-                combo = combo.replace("E", "", 1)
+        from core.formulas import calculate_damage
+        from core.hits import combo_damage_hits
+        from core.reactions import amplifying_multiplier, reaction_factor
 
-        # Re-sync after any buff changes
-        self.sync_stats(self.compute_total_stats())
+        # Self-cast buffs (Hu Tao's E) and passive conversions are applied to
+        # a private copy of the stat totals in one ordered pass; the character
+        # only ever holds its own, un-buffed stats. Furina's E summons come
+        # first, then every remaining hit of the combo
+        stats, _, hits = combo_damage_hits(self, multipliers, combo=combo, crit_rate=crit_rate,
+                                           crit_dmg=crit_dmg, stats=stats, buffs=buffs)
 
         total_dmg = 0.0
-
-        # — Furina: include full 30 s E-summons if combo had an E —
-        if self.name == "Furina" and "E" in original_combo:
-            # only apply Q buff if Q was before E in the original combo
-            apply_q = False
-            if "Q" in original_combo:
-                apply_q = original_combo.index("Q") < original_combo.index("E")
-
-            total_dmg += simulate_furina_e_summons(
-                character=self,
-                multipliers=multipliers,
-                apply_q_buff=apply_q
-            )
-            # strip that one E so hits loop won’t re-process it
-            combo = combo.replace("E", "", 1)
-
-        # — Now process all remaining hits in combo —
-        hits = compute_combo_hits(multipliers, self, combo)
-        for mult, scaling in hits:
-            # BUFF entries stack onto self._talent_buffs
-            if scaling == "BUFF":
-                self._talent_buffs["percent_dmg"] += mult
-                continue
-
-            # pick correct base stat
-            base_stat = self.total_hp if scaling == "HP" else self.total_atk
-
-            # assume element = vision for Skill/Burst, else Physical
-            element = self.vision if scaling != "Physical" else "Physical"
-
-            # collect all % dmg buffs
-            bonus = self.elemental_dmg_bonus.get(element, 0.0)
-            bonus += self._talent_buffs["percent_dmg"]
-
-            total_dmg += calculate_damage(
-                base_stat=base_stat,
-                talent_multiplier=mult,
-                crit_rate=crit_rate or self.crit_rate,
-                crit_dmg=crit_dmg or self.crit_dmg,
-                dmg_bonus=bonus,
+        for hit in hits:
+            dmg = calculate_damage(
+                base_stat=hit.base_stat,
+                talent_multiplier=hit.multiplier,
+                crit_rate=hit.crit_rate,
+                crit_dmg=hit.crit_dmg,
+                dmg_bonus=hit.dmg_bonus,
                 character_level=character_level,
                 enemy_level=enemy_level,
                 enemy_resistance=enemy_resistance
             )
 
-        # Revert Hu Tao’s E buff if applied
-        if e_buffed:
-            self.base_stats['atk'] = original_atk
+            # tagged hits: expected amplifying reaction factor
+            if hit.reaction is not None:
+                dmg *= reaction_factor(amplifying_multiplier(hit.reaction, hit.element),
+                                       stats["elemental_mastery"], reaction_rate)
+            total_dmg += hit.count * dmg
 
         return total_dmg
 
@@ -313,10 +287,10 @@ class Character:
             crit_dmg += self.special_stat_value
         elif self.special_stat_type.endswith("DMG Bonus"):
             element = self.special_stat_type.replace(" DMG Bonus", "")
-            if element in self.elemental_dmg_bonus:
-                self.elemental_dmg_bonus[element] += self.special_stat_value
+            if element in elemental_dmg_bonus:
+                elemental_dmg_bonus[element] += self.special_stat_value
         elif "Healing Bonus" in self.special_stat_type:
-            self.healing_bonus += self.special_stat_value
+            healing_bonus += self.special_stat_value
         elif self.special_stat_type == "Elemental Mastery":
             elemental_mastery += self.special_stat_value
         elif self.special_stat_type == "Energy Recharge%":
@@ -0,0 +1,192 @@
+# core/profiling.py
+"""
+Opt-in call counters and wall-time accumulators for the hot paths.
+
+Nothing is wrapped until profiling is enabled, so the disabled cost is zero:
+enable() swaps the functions listed in HOT_PATHS for timing wrappers on their
+modules/classes and disable() puts the originals back.
+
+    from core import profiling
+    with profiling.profiling(sample_every=10):
+        simulate_with_metric(...)
+    print(profiling.report())
+
+or set GIROS_PROFILE=1 (or =N to time one call in N) to profile the whole
+process and print the table to stderr at exit.
+
+Only the outermost call of a re-entrant function is counted (deepcopy recurses
+through its own module-level name). With sample_every=N every call is counted
+but only one in N is timed; total time is extrapolated from the timed ones.
+Not thread-safe.
+"""
+import atexit
+import contextlib
+import functools
+import importlib
+import os
+import sys
+import time
+
+# "module:attribute" — attribute may be Class.method. Names imported into other
+# modules (from x import f) are listed for each importing module.
+HOT_PATHS = [
+    "copy:deepcopy",
+    "core.models:Character.compute_total_stats",
+    "core.models:Character.sync_stats",
+    "core.models:Character.expected_damage_output",
+    "core.talents:compute_combo_hits",
+    "core.formulas:calculate_damage",
+    "core.summons:calculate_damage",
+    "core.summons:Summon.total_damage",
+    "core.summons:simulate_furina_e_summons",
+    "core.summons:HealEffect.total_heal",
+    "core.hits:apply_modifiers",
+    "core.gradients:damage_gradient",
+    "core.enemies:damage_grid",
+    "core.distribution:combo_distribution",
+    "simulation.artifact:simulate_artifact",
+    "simulation.simulator:simulate_artifact",
+    "simulation.talent_books:simulate_multiple_talent_runs",
+    "simulation.simulator:simulate_multiple_talent_runs",
+    "simulation.simulator:simulate_artifact_farm",
+    "simulation.simulator:simulate_talent_farm",
+    "simulation.simulator:simulate_artifact_farm_heal",
+    "simulation.simulator:simulate_talent_farm_heal",
+]
+
+_stats = {}        # label -> [calls, timed_calls, seconds]
+_patched = []      # (owner, attr, original)
+_sample_every = 1
+_started = None
+_stopped = None
+
+
+def _label(fn):
+    fn = getattr(fn, "__func__", fn)
+    return f"{getattr(fn, '__module__', '?')}.{getattr(fn, '__qualname__', repr(fn))}"
+
+
+def _wrap(fn):
+    label = _label(fn)
+    rec = _stats.setdefault(label, [0, 0, 0.0])
+    depth = [0]
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if depth[0]:
+            return fn(*args, **kwargs)
+        rec[0] += 1
+        depth[0] += 1
+        try:
+            if rec[0] % _sample_every:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                rec[2] += time.perf_counter() - t0
+                rec[1] += 1
+        finally:
+            depth[0] -= 1
+
+    return wrapper
+
+
+def _resolve(path):
+    module_name, attr_path = path.split(":")
+    owner = importlib.import_module(module_name)
+    *parents, attr = attr_path.split(".")
+    for name in parents:
+        owner = getattr(owner, name)
+    return owner, attr
+
+
+def is_enabled():
+    return bool(_patched)
+
+
+def enable(sample_every: int = 1, paths=None):
+    """Wrap every hot path (idempotent). sample_every=N times one call in N."""
+    global _sample_every, _started, _stopped
+    _sample_every = max(1, int(sample_every))
+    if _patched:
+        return
+    if _started is None:
+        _started = time.perf_counter()
+    _stopped = None
+    wrappers = {}  # share one wrapper per function so re-exports aggregate
+    for path in paths or HOT_PATHS:
+        owner, attr = _resolve(path)
+        original = vars(owner)[attr] if isinstance(owner, type) else getattr(owner, attr)
+        if original not in wrappers:
+            wrappers[original] = _wrap(original)
+        setattr(owner, attr, wrappers[original])
+        _patched.append((owner, attr, original))
+
+
+def disable():
+    """Restore the original functions; collected stats are kept until reset()."""
+    global _stopped
+    if _patched:
+        _stopped = time.perf_counter()
+    while _patched:
+        owner, attr, original = _patched.pop()
+        setattr(owner, attr, original)
+
+
+def reset():
+    global _started, _stopped
+    for rec in _stats.values():
+        rec[:] = [0, 0, 0.0]
+    _started = time.perf_counter() if _patched else None
+    _stopped = None
+
+
+def stats():
+    """{label: {"calls", "timed", "total_s", "mean_s"}} for every function that was called."""
+    out = {}
+    for label, (calls, timed, seconds) in _stats.items():
+        if not calls:
+            continue
+        mean = seconds / timed if timed else 0.0
+        out[label] = {"calls": calls, "timed": timed, "total_s": mean * calls, "mean_s": mean}
+    return out
+
+
+def report():
+    """Summary table sorted by (extrapolated) total time."""
+    rows = sorted(stats().items(), key=lambda kv: kv[1]["total_s"], reverse=True)
+    wall = (_stopped or time.perf_counter()) - _started if _started else 0.0
+    lines = [f"{'function':<58} {'calls':>10} {'total s':>10} {'mean µs':>10} {'% wall':>7}"]
+    for label, s in rows:
+        pct = 100 * s["total_s"] / wall if wall else 0.0
+        lines.append(f"{label:<58} {s['calls']:>10,} {s['total_s']:>10.3f} {s['mean_s'] * 1e6:>10.1f} {pct:>6.1f}%")
+    lines.append(f"wall: {wall:.3f}s, sampling 1/{_sample_every} (nested hot paths overlap)")
+    return "\n".join(lines)
+
+
+@contextlib.contextmanager
+def profiling(sample_every: int = 1, print_summary: bool = False):
+    """Enable profiling for the block; optionally print the table to stderr on exit."""
+    already = is_enabled()
+    if not already:
+        reset()
+    enable(sample_every)
+    try:
+        yield
+    finally:
+        if not already:
+            disable()
+        if print_summary:
+            print(report(), file=sys.stderr)
+
+
+def _enable_from_env():
+    value = os.environ.get("GIROS_PROFILE", "")
+    if not value or value == "0":
+        return
+    enable(sample_every=int(value) if value.isdigit() else 1)
+    atexit.register(lambda: print(report(), file=sys.stderr))
+
+
+_enable_from_env()
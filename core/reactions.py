@@ -0,0 +1,87 @@
+# core/reactions.py
+"""
+Amplifying reactions (vaporize / melt) for tagged combo hits.
+
+A combo segment tagged "@v" / "@m" (see core.talents.REACTION_TAGS) marks
+its hits as reacted. A reacted hit is the plain hit times
+
+    (1 - rate) + rate × multiplier × (1 + 2.78·EM / (EM + 1400))
+
+where `rate` is the share of tagged hits that actually react and the
+multiplier follows the hit's element (Pyro vaporize 1.5×, Hydro 2×, ...),
+the same factor calculate_damage applies for reaction_type="amplifying".
+
+reaction_sweep walks the combo once and returns damage over a grid of EM
+totals × reaction rates:
+
+    dmg = reaction_sweep(hu_tao, multipliers, em_values=range(0, 401, 40),
+                         reaction_rates=(0.5, 0.75, 1.0), combo="E12N1C@v Q@v")
+    dmg.shape    # (11, 3)
+"""
+import numpy as np
+
+AMPLIFYING = {
+    ("vaporize", "Pyro"): 1.5,
+    ("vaporize", "Hydro"): 2.0,
+    ("melt", "Pyro"): 2.0,
+    ("melt", "Cryo"): 1.5,
+}
+
+
+def amplifying_multiplier(reaction, element):
+    multiplier = AMPLIFYING.get((reaction, element))
+    if multiplier is None:
+        raise ValueError(f"{element} hits cannot trigger {reaction}")
+    return multiplier
+
+
+def em_bonus(em):
+    """Amplifying EM bonus; works on scalars and numpy arrays."""
+    return 2.78 * em / (em + 1400)
+
+
+def reaction_factor(multiplier, em, rate=1.0):
+    """Expected damage factor of a tagged hit over the plain hit."""
+    return (1 - rate) + rate * multiplier * (1 + em_bonus(em))
+
+
+def reaction_factor_gradient(multiplier, em, rate=1.0):
+    """(reaction_factor, d reaction_factor / d EM)."""
+    return reaction_factor(multiplier, em, rate), rate * multiplier * 2.78 * 1400 / (em + 1400) ** 2
+
+
+def reaction_sweep(
+        character,
+        multipliers,
+        em_values,
+        reaction_rates=(1.0,),
+        combo=None,
+        crit_rate=None,
+        crit_dmg=None,
+        character_level=90,
+        enemy_level=100,
+        enemy_resistance=0.1,
+        stats=None,
+        buffs=None
+):
+    """
+    Combo damage as a (len(em_values), len(reaction_rates)) array. EM
+    values are totals, replacing the build's own EM; everything else comes
+    from one combo walk. Untagged hits are the same in every cell.
+    """
+    from core.enemies import combo_raw_damage, def_factors, enemy_profile, res_factors
+
+    terms, _ = combo_raw_damage(character, multipliers, combo=combo, crit_rate=crit_rate, crit_dmg=crit_dmg,
+                                stats=stats, buffs=buffs)
+    enemy = [enemy_profile("target", level=enemy_level, res=enemy_resistance)]
+    em = np.asarray(em_values, dtype=float)[:, None]
+    rate = np.asarray(reaction_rates, dtype=float)[None, :]
+
+    damage = np.zeros((em.shape[0], rate.shape[1]))
+    for (element, multiplier), raw in terms.items():
+        value = raw * res_factors(enemy, element)[0]
+        if multiplier is None:
+            damage += value
+        else:
+            damage += value * reaction_factor(multiplier, em, rate)
+    return damage * def_factors(enemy, character_level)[0]
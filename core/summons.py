@@ -2,11 +2,12 @@
 import math
 import copy
 from core.formulas    import calculate_damage
-from core.character_buffs import furina_burst_buff
+from core.character_buffs import apply_modifiers, passive_modifiers, trigger_modifiers
 from core.formulas import calculate_heal
 
 class Summon:
-    def __init__(self, character, multipliers, skill_key, hit_key, level, element, interval, duration):
+    def __init__(self, character, multipliers, skill_key, hit_key, level, element, interval, duration,
+                 extra_bonus=0.0):
         self.c         = character
         self.multipliers = multipliers
         self.skill_key = skill_key
@@ -15,12 +16,13 @@ class Summon:
         self.element   = element
         self.interval  = interval
         self.duration  = duration
+        self.extra_bonus = extra_bonus  # summon-only DMG bonus (Furina's Salon passive)
 
     def ticks(self):
         # at least one hit, even if interval > duration
         return max(1, math.floor(self.duration / self.interval))
 
-    def total_damage(self):
+    def total_damage(self, character_level=90, enemy_level=100, enemy_resistance=0.1):
         entry = self.multipliers[self.c.name][self.skill_key][self.level] \
             .get(self.hit_key, {})
         raw = entry.get("value", 0.0)
@@ -42,13 +44,7 @@ class Summon:
               f"scaling={scale}, base_stat={base_stat:.2f}, tm={tm:.4f}, "
               f"ticks={ticks}")
 
-        bonus = self.c.elemental_dmg_bonus.get(self.element, 0.0)
-
-        # —— Furina passive: every 1 000 HP gives +0.7% Salon-Member DMG, capped at 28% ——
-        if self.c.name == "Furina":
-            hp_chunks = int(self.c.total_hp // 1000)
-            salon_bonus = min(hp_chunks * 0.007, 0.28)
-            bonus += salon_bonus
+        bonus = self.c.elemental_dmg_bonus.get(self.element, 0.0) + self.extra_bonus
 
         cr, cd = self.c.crit_rate, self.c.crit_dmg
 
@@ -60,51 +56,50 @@ class Summon:
                 crit_rate=cr,
                 crit_dmg=cd,
                 dmg_bonus=bonus,
-                character_level=90,
-                enemy_level=100,
-                enemy_resistance=0.1
+                character_level=character_level,
+                enemy_level=enemy_level,
+                enemy_resistance=enemy_resistance
             )
         return dmg
 
-def simulate_furina_e_summons(character, multipliers, apply_q_buff: bool = False):
+# Furina E: (hit key, interval, duration). The one-off bubble hits once; the
+# Salon Members fire on their native cooldown plus a 0.5 s global cooldown.
+FURINA_GLOBAL_CD = 0.5
+FURINA_SUMMONS = (
+    ("OusiaBubble",              9999,                    0.1),
+    ("GentilhommeUsher",         2.9 + FURINA_GLOBAL_CD,  30.0),
+    ("SurintendanteChevalmarin", 1.19 + FURINA_GLOBAL_CD, 30.0),
+    ("MademoiselleCrabaletta",   4.8 + FURINA_GLOBAL_CD,  30.0),
+)
+
+def simulate_furina_e_summons(character, multipliers, apply_q_buff: bool = False, stats=None, buffs=None,
+                              character_level=90, enemy_level=100, enemy_resistance=0.1):
     """
     Total damage from her E summons over their 30 s lifetime.
     If apply_q_buff=True, we first cast Q and apply its team buff.
+    `stats` are the character's compute_total_stats() totals if the caller
+    already has them; `buffs` are the party's shared buffs.
     """
     lvl = character.skill_level
 
-    # work on a deep copy so we never pollute the caller
-    char = copy.deepcopy(character)
-    char.sync_stats(char.compute_total_stats())
+    # work on a copy so we never pollute the caller
+    char = copy.copy(character)
+    if stats is None:
+        stats = char.compute_total_stats()
 
-    # optionally apply her Burst buff
+    # passives (Salon bonus from max HP) and, optionally, her Burst buff
+    # (level-scaled DMG bonus on every element), resolved in one pass
+    buffs = list(buffs or ())
+    mods = passive_modifiers(char, multipliers) + buffs
     if apply_q_buff:
-        # this will add the proper level-scaling dmg bonus into char.elemental_dmg_bonus
-        furina_burst_buff(char)
+        # skipped when her own Fanfare already came in with the party buffs
+        mods += [(m, c) for m, c in trigger_modifiers(char, "Q", multipliers)
+                 if all(m.shared() is not b for b, _ in buffs)]
+    stats = apply_modifiers(stats, mods)
+    char.sync_stats(stats)
 
     total = 0.0
-
-    # one-off bubble
-    bubble = Summon(
-        character=char,
-        multipliers=multipliers,
-        skill_key="Skill",
-        hit_key="OusiaBubble",
-        level=lvl,
-        element="Hydro",
-        interval=9999,
-        duration=0.1
-    )
-    total += bubble.total_damage()
-
-    # continuous summons
-    GLOBAL_CD = 0.5
-    native_intervals = {
-        "GentilhommeUsher":       2.9,
-        "SurintendanteChevalmarin": 1.19,
-        "MademoiselleCrabaletta":   4.8,
-    }
-    for hit_key, base_cd in native_intervals.items():
+    for hit_key, interval, duration in FURINA_SUMMONS:
         s = Summon(
             character=char,
             multipliers=multipliers,
@@ -112,10 +107,11 @@ def simulate_furina_e_summons(character, multipliers, apply_q_buff: bool = False
             hit_key=hit_key,
             level=lvl,
             element="Hydro",
-            interval=base_cd + GLOBAL_CD,
-            duration=30.0
+            interval=interval,
+            duration=duration,
+            extra_bonus=stats.get("summon_dmg_bonus", 0.0)
         )
-        total += s.total_damage()
+        total += s.total_damage(character_level, enemy_level, enemy_resistance)
 
     return total
 
@@ -131,13 +127,13 @@ class HealEffect:
     def ticks(self):
         return max(1, math.floor(self.duration / self.interval))
 
-    def total_heal(self):
+    def total_heal(self, stats=None):
         entries = self.multipliers[self.c.name][self.skill_key][self.level]
         pct_entries  = [e for k,e in entries.items() if "Heal%"     in k]
         flat_entries = [e for k,e in entries.items() if "HealFlat" in k]
 
         # sync so total_hp and healing_bonus are current
-        self.c.sync_stats(self.c.compute_total_stats())
+        self.c.sync_stats(stats if stats is not None else self.c.compute_total_stats())
         hp = self.c.total_hp
         hb = self.c.healing_bonus
 
@@ -31,33 +31,39 @@ def load_talent_multipliers(path="data/talent_multipliers.csv"):
     return multipliers
 
 import re
+from functools import lru_cache
 
+# Segment suffixes marking reacted hits: "12N1C@v Q@vape" vaporizes every hit
+# of both segments. See core.reactions for the multipliers.
+REACTION_TAGS = {
+    "v": "vaporize", "vape": "vaporize", "vaporize": "vaporize",
+    "m": "melt", "melt": "melt",
+}
 
-def compute_combo_hits(
-    multipliers: defaultdict,
-    character,        # your Character instance
-    combo: str
-):
+
+@lru_cache(maxsize=1024)
+def compile_combo_plan(combo: str):
     """
-    Returns a list of (mult, scaling_stat) tuples for every hit.
-    E.g. "12N2C Q" → 12×(N1,N2,C) + Q  yield something like:
-      [(.45,"ATK"), (.57,"ATK"), (.66,"ATK"),  # 12 repeats of N1/N2/C
-       ...,
-       (2.33,"HP")]                              # Q
+    Parse a combo string once into its hit sequence: a tuple of
+    (skill, token, reaction) triples, e.g. "2N2 Q@v" → (("AA","N1",None),
+    ("AA","N2",None), ("AA","N1",None), ("AA","N2",None),
+    ("Burst","Q","vaporize")). Depends only on the string, so plans are
+    cached and shared by every character.
     """
-    hits = []
+    plan = []
     for seg in combo.split():
+        seg, _, tag = seg.partition("@")
+        reaction = None
+        if tag:
+            reaction = REACTION_TAGS.get(tag.lower())
+            if reaction is None:
+                raise ValueError(f"Unknown reaction tag {tag!r}; expected one of {sorted(REACTION_TAGS)}")
         m = re.match(r"^(\d*)(.+)$", seg)
         count = int(m.group(1) or 1)
         body  = m.group(2)
 
-        # pick AA vs Burst & level
-        if "Q" in body:
-            skill = "Burst"
-            lvl   = character.burst_level
-        else:
-            skill = "AA"
-            lvl   = character.aa_level
+        # pick AA vs Burst
+        skill = "Burst" if "Q" in body else "AA"
 
         # expand body into tokens ["N1","N2","C"] or ["Q"]
         tokens = []
@@ -79,14 +85,34 @@ def compute_combo_hits(
                     tokens.append("C")
                 i = j
 
-        # look up each token count×
-        for _ in range(count):
-            for tok in tokens:
-                entry = multipliers[character.name][skill][lvl].get(tok)
-                if not entry:
-                    continue
-                # entry == {"value": float, "scaling": "HP"/"ATK"/"BUFF"}
-                hits.append((entry["value"], entry["scaling"]))
-    return hits
+        plan += [(skill, tok, reaction) for tok in tokens] * count
+    return tuple(plan)
 
 
+def compute_combo_hits(
+    multipliers: defaultdict,
+    character,        # your Character instance
+    combo: str,
+    with_reactions: bool = False
+):
+    """
+    Returns a list of (mult, scaling_stat) tuples for every hit, or
+    (mult, scaling_stat, reaction) with `with_reactions`.
+    E.g. "12N2C Q" → 12×(N1,N2,C) + Q  yield something like:
+      [(.45,"ATK"), (.57,"ATK"), (.66,"ATK"),  # 12 repeats of N1/N2/C
+       ...,
+       (2.33,"HP")]                              # Q
+    """
+    levels = {"AA": character.aa_level, "Burst": character.burst_level}
+    table = multipliers[character.name]
+    hits = []
+    for skill, tok, reaction in compile_combo_plan(combo):
+        entry = table[skill][levels[skill]].get(tok)
+        if not entry:
+            continue
+        # entry == {"value": float, "scaling": "HP"/"ATK"/"BUFF"}
+        if with_reactions:
+            hits.append((entry["value"], entry["scaling"], reaction))
+        else:
+            hits.append((entry["value"], entry["scaling"]))
+    return hits
@@ -0,0 +1,107 @@
+# core/team.py
+"""
+Party evaluation.
+
+A Team holds up to four Characters, with distinct names, and their rotation
+combos. Party buffs (Modifier.team, e.g. Bennett's and Furina's Bursts) cast
+in a member's combo are resolved once per rotation against the caster's
+stats, and every member, the caster included, gets them in the same pass as
+its own buffs. A one-member Team therefore equals
+Character.expected_damage_output only for members without party buffs.
+
+Each member's totals are aggregated once and kept; after changing a member
+in place, build a new Team (or use with_member) instead of re-evaluating.
+
+    team = Team([hu_tao, bennett, furina], multipliers,
+                combos={"Bennett": "Q", "Furina": "Q E"})
+    team.evaluate()     # {"members": {"Hu Tao": ..., ...}, "buffs": [...], "total": ...}
+"""
+from core.character_buffs import cast_modifiers, share_modifiers
+
+MAX_MEMBERS = 4
+
+
+def _check_names(members):
+    # results are keyed by member name
+    names = [m.name for m in members]
+    for name in names:
+        if names.count(name) > 1:
+            raise ValueError(f"Duplicate team member {name!r}; a team holds each character once")
+
+
+class Team:
+    def __init__(self, members, multipliers, combos=None):
+        members = list(members)
+        if not 1 <= len(members) <= MAX_MEMBERS:
+            raise ValueError(f"A team has 1 to {MAX_MEMBERS} members, got {len(members)}")
+        _check_names(members)
+        self.members = members
+        self.multipliers = multipliers
+        if combos is None:
+            combos = {}
+        if isinstance(combos, dict):
+            combos = [combos.get(m.name) for m in members]
+        if len(combos) != len(members):
+            raise ValueError("combos must have one entry per member")
+        self.combos = [c if c is not None else m.default_combo for m, c in zip(members, combos)]
+        self._stats = [None] * len(members)
+
+    def __repr__(self):
+        return f"<Team: {', '.join(m.name for m in self.members)}>"
+
+    def with_member(self, index, member, combo=None):
+        """A copy with `member` in slot `index`; the other members' totals are reused."""
+        team = Team.__new__(Team)
+        team.members = list(self.members)
+        team.multipliers = self.multipliers
+        team.combos = list(self.combos)
+        team._stats = list(self._stats)
+        team.members[index] = member
+        _check_names(team.members)
+        team.combos[index] = combo if combo is not None else member.default_combo
+        team._stats[index] = None
+        return team
+
+    # ── stats and buffs ──
+    def member_stats(self, index):
+        stats = self._stats[index]
+        if stats is None:
+            stats = self._stats[index] = self.members[index].compute_total_stats()
+        return stats
+
+    def party_buffs(self):
+        """[(caster index, shared (modifier, amount) pairs)] for this rotation."""
+        out = []
+        for i, (member, combo) in enumerate(zip(self.members, self.combos)):
+            cast = cast_modifiers(member, combo, self.multipliers)
+            if cast:
+                out.append((i, share_modifiers(self.member_stats(i), cast)))
+        return out
+
+    # ── evaluation ──
+    def evaluate(self, **kwargs):
+        """
+        Every member's combo damage in one call, with party buffs applied.
+        Keyword arguments (enemy_level, enemy_resistance, ...) go to each
+        member's expected_damage_output.
+        """
+        party = self.party_buffs()
+        buffs = [pair for _, shared in party for pair in shared]
+        damage = {}
+        for i, (member, combo) in enumerate(zip(self.members, self.combos)):
+            damage[member.name] = member.expected_damage_output(
+                combo=combo,
+                multipliers=self.multipliers,
+                stats=self.member_stats(i),
+                buffs=buffs,
+                **kwargs
+            )
+        return {
+            "members": damage,
+            "buffs": [f"{self.members[caster].name}: {m.name}" for caster, shared in party for m, _ in shared],
+            "total": sum(damage.values()),
+        }
+
+    def damage(self, **kwargs):
+        """Total party damage for one rotation."""
+        return self.evaluate(**kwargs)["total"]
@@ -0,0 +1,117 @@
+# core/weapons.py
+"""
+Weapon ranking over the whole catalog in one batched pass.
+
+A weapon only changes two things in compute_total_stats: its base ATK
+(added to the character's) and its substat. So the character's totals are
+aggregated once without a weapon, every compatible weapon becomes one row
+of stacked numpy stat vectors, and the combo is walked once over those
+vectors (core.enemies.combo_raw_damage; modifiers and calculate_damage's
+factors broadcast). Passives are not modelled, as in Weapon itself, and
+"Physical DMG Bonus" substats are ignored like compute_total_stats does.
+
+    ranking = rank_weapons(hu_tao, datasets.multipliers, datasets.weapon_rows, combo="E12N1C Q")
+    ranking[:3]    # [("Staff of Homa", 61234.5), ...], best first
+"""
+import copy
+
+import numpy as np
+
+from core.enemies import combo_raw_damage, def_factors, enemy_profile, res_factors
+from core.models import Weapon
+from core.reactions import reaction_factor
+
+# Weapon.substat_type -> (stat dict key, percent_bonus key or None)
+SUBSTAT_KEYS = {
+    "HP%": ("percent_bonus", "hp"),
+    "ATK%": ("percent_bonus", "atk"),
+    "DEF%": ("percent_bonus", "def"),
+    "CRIT Rate": ("crit_rate", None),
+    "CRIT DMG": ("crit_dmg", None),
+    "Elemental Mastery": ("elemental_mastery", None),
+    "Energy Recharge%": ("energy_recharge", None),
+}
+
+
+def compatible_weapons(weapons, weapon_type):
+    """
+    Weapon objects of `weapon_type` from Weapon objects and / or CSV rows.
+    Rows Weapon.load_from_csv_row rejects (1–2★ weapons without a
+    substat) are skipped.
+    """
+    out = []
+    for weapon in weapons:
+        if isinstance(weapon, dict):
+            if weapon["type"] != weapon_type:
+                continue
+            try:
+                weapon = Weapon.load_from_csv_row(weapon)
+            except ValueError:
+                continue
+        if weapon.type == weapon_type:
+            out.append(weapon)
+    return out
+
+
+def stack_weapon_stats(stats, weapons):
+    """
+    compute_total_stats totals for every weapon at once: `stats` are the
+    weapon-less totals, scalar entries become one value per weapon.
+    """
+    out = dict(stats)
+    pct = {k: np.full(len(weapons), v, dtype=float) for k, v in stats["percent_bonus"].items()}
+    for key in ("crit_rate", "crit_dmg", "elemental_mastery", "energy_recharge"):
+        out[key] = np.full(len(weapons), stats[key], dtype=float)
+    weapon_atk = np.array([w.base_atk for w in weapons], dtype=float)
+    for i, weapon in enumerate(weapons):
+        key, sub = SUBSTAT_KEYS.get(weapon.substat_type, (None, None))
+        if key == "percent_bonus":
+            pct[sub][i] += weapon.substat_value
+        elif key is not None:
+            out[key][i] += weapon.substat_value
+
+    flat = stats["flat_bonus"]
+    out["percent_bonus"] = pct
+    out["weapon_base_atk"] = weapon_atk
+    out["base_atk"] = stats["base_atk"] + weapon_atk
+    out["total_hp"] = stats["base_hp"] * (1 + pct["hp"]) + flat["hp"]
+    out["total_atk"] = out["base_atk"] * (1 + pct["atk"]) + flat["atk"]
+    out["total_def"] = stats["base_def"] * (1 + pct["def"]) + flat["def"]
+    return out
+
+
+def weapon_damage(character, multipliers, weapons, combo=None, artifacts=None, character_level=90,
+                  enemy_level=100, enemy_resistance=0.1, reaction_rate=1.0, buffs=None):
+    """
+    Expected combo damage with each of `weapons` (Weapon objects) equipped,
+    as a numpy vector. `artifacts` replaces the given slots.
+    """
+    probe = copy.copy(character)
+    probe.weapon = None
+    if artifacts:
+        probe.artifacts = {**character.artifacts, **artifacts}
+    stats = stack_weapon_stats(probe.compute_total_stats(), weapons)
+
+    raw, em = combo_raw_damage(probe, multipliers, combo=combo, stats=stats, buffs=buffs)
+    enemy = [enemy_profile("target", level=enemy_level, res=enemy_resistance)]
+    damage = np.zeros(len(weapons))
+    for (element, amp), value in raw.items():
+        if amp is not None:
+            value = value * reaction_factor(amp, em, reaction_rate)
+        damage += value * res_factors(enemy, element)[0]
+    return damage * def_factors(enemy, character_level)[0]
+
+
+def rank_weapons(character, multipliers, weapons, combo=None, artifacts=None, **kwargs):
+    """
+    [(weapon name, damage)] for every weapon in `weapons` (Weapon objects
+    or genshin_weapons_v6.csv rows, e.g. Datasets.weapon_rows) matching the
+    character's weapon type, best first. Keyword arguments go to
+    weapon_damage.
+    """
+    catalog = compatible_weapons(weapons, character.weapon_type)
+    if not catalog:
+        return []
+    damage = weapon_damage(character, multipliers, catalog, combo=combo, artifacts=artifacts, **kwargs)
+    order = np.argsort(-damage, kind="stable")
+    return [(catalog[i].name, float(damage[i])) for i in order]
@@ -23,7 +23,7 @@ MAIN_STAT_VALUES_5_STAR = {
 }
 
 # Same as your code
-def generate_artifact_main_stat(artifact_type):
+def generate_artifact_main_stat(artifact_type, rng=random):
     if artifact_type == "Flower":
         return "Flat HP", MAIN_STAT_VALUES_5_STAR["Flat HP"]
     elif artifact_type == "Feather":
@@ -64,10 +64,10 @@ def generate_artifact_main_stat(artifact_type):
     else:
         raise ValueError("Unsupported artifact type")
 
-    main_stat = random.choices(list(weights.keys()), weights=list(weights.values()), k=1)[0]
+    main_stat = rng.choices(list(weights.keys()), weights=list(weights.values()), k=1)[0]
     return main_stat, MAIN_STAT_VALUES_5_STAR[main_stat]
 
-def generate_substats(exclude_stat=None):
+def generate_substats(exclude_stat=None, rng=random):
     weights = {
         'Flat HP': 6,
         'Flat ATK': 6,
@@ -84,10 +84,10 @@ def generate_substats(exclude_stat=None):
     if exclude_stat in weights:
         weights.pop(exclude_stat)
 
-    substats = random.sample(list(weights.keys()), k=4)
+    substats = rng.sample(list(weights.keys()), k=4)
     return substats
 
-def simulate_artifact_rolls(substats, num_upgrades):
+def simulate_artifact_rolls(substats, num_upgrades, rng=random, tier_rng=None):
     value_ranges = {
         'Flat HP': [209.13, 239, 268.88, 298.75],
         'Flat ATK': [13.62, 15.56, 17.51, 19.45],
@@ -101,25 +101,32 @@ def simulate_artifact_rolls(substats, num_upgrades):
         'CRIT DMG%': [5.44, 6.22, 6.99, 7.77],
     }
 
+    tier_rng = tier_rng or rng
     rolls = {}
     upgrades = {}
     for stat in substats:
-        initial = random.choice(value_ranges[stat])
+        initial = tier_rng.choice(value_ranges[stat])
         rolls[stat] = initial
         upgrades[stat] = 0  # no upgrades yet
 
     for _ in range(num_upgrades):
-        stat = random.choice(substats)
-        rolls[stat] += random.choice(value_ranges[stat])
+        stat = rng.choice(substats)
+        rolls[stat] += tier_rng.choice(value_ranges[stat])
         upgrades[stat] += 1
 
     return rolls, upgrades
 
-def simulate_artifact(artifact_type="Sands"):
-    main_stat_name, main_stat_value = generate_artifact_main_stat(artifact_type)
-    starts_with_3 = random.random() < 0.8
-
-    all_substats = generate_substats(exclude_stat=main_stat_name)
+def simulate_artifact(artifact_type="Sands", rng=random, tier_rng=None):
+    """
+    Roll one +20 artifact. Draws come from `rng` (default: the global
+    `random` module); roll-tier values come from `tier_rng` if given, which
+    lets simulation.crn substitute antithetic/stratified tier samplers.
+    """
+    tier_rng = tier_rng or rng
+    main_stat_name, main_stat_value = generate_artifact_main_stat(artifact_type, rng)
+    starts_with_3 = rng.random() < 0.8
+
+    all_substats = generate_substats(exclude_stat=main_stat_name, rng=rng)
     base_substats = all_substats[:3] if starts_with_3 else all_substats[:4]
 
     # Initialize rolls and upgrade counters
@@ -139,13 +146,13 @@ def simulate_artifact(artifact_type="Sands"):
     rolls = {}
     upgrades = {}
     for stat in base_substats:
-        rolls[stat] = random.choice(value_ranges[stat])
+        rolls[stat] = tier_rng.choice(value_ranges[stat])
         upgrades[stat] = 0
 
     if starts_with_3:
         # First upgrade at +4: add new stat
         new_stat = all_substats[3]
-        rolls[new_stat] = random.choice(value_ranges[new_stat])
+        rolls[new_stat] = tier_rng.choice(value_ranges[new_stat])
         upgrades[new_stat] = 0
         upgrade_candidates = base_substats + [new_stat]
         remaining_upgrades = 4
@@ -154,8 +161,8 @@ def simulate_artifact(artifact_type="Sands"):
         remaining_upgrades = 5
 
     for _ in range(remaining_upgrades):
-        stat = random.choice(upgrade_candidates)
-        rolls[stat] += random.choice(value_ranges[stat])
+        stat = rng.choice(upgrade_candidates)
+        rolls[stat] += tier_rng.choice(value_ranges[stat])
         upgrades[stat] += 1
 
     return {
@@ -0,0 +1,448 @@
+# simulation/batch.py
+"""
+Batch scenario runner.
+
+Reads a JSONL scenario file (one scenario per line), runs every trial through
+the simulators on a worker pool and streams one JSON line per finished trial.
+
+    python -m simulation.batch scenarios.jsonl -o results.jsonl --workers 4
+    python -m simulation.batch scenarios.jsonl --cache     # reuse identical scenarios
+    python -m simulation.batch scenarios.jsonl --trace steps.parquet   # every step, columnar
+    python -m simulation.batch scenarios.jsonl --store     # aggregates into the run store
+
+Scenario keys (all optional except "character"):
+    {
+      "id": "hutao-greedy",
+      "character": "Hu Tao", "weapon": "Homa", "artifacts": {...},
+      "levels": {"aa": 1, "skill": 1, "burst": 1}, "combo": "E12N1C Q",
+      "policy": "greedy_swap",          # simulate_with_metric policy,
+                                        # "minmaxer"/"planner" (simulate_with_policy)
+                                        # or "artifact_vs_talent"
+      "policy_args": {"threshold": 50, "primary": "artifact", "threshold_stats": {...}},
+      "metric": "damage",               # or "heal"
+      "team": ["Bennett", {"character": "Furina", "combo": "Q E"}],
+                                        # teammates (names or character specs);
+                                        # the metric becomes party damage
+      "resin_budget": 600, "trials": 100, "seed": 0, "domain_level": 4
+    }
+
+With a cache (simulation.cache.ResultCache) a scenario whose configuration,
+data and code are unchanged replays its stored rows (marked "cached": true)
+instead of running. Rows are stored once every trial of a scenario finished
+without error. Scenario ids should be unique within a file.
+
+With a trace (simulation.traces.TraceWriter) every simulated step is also
+written as one row of a columnar trace, tagged with the scenario id and
+trial. Workers return flattened rows and the parent writes them, so the
+trace is a single file. Cached scenarios do not re-run and add no rows.
+
+With a store (simulation.store.ResultStore) every scenario whose trials all
+finished without error is recorded as one run: its metadata plus the
+mean / std / stderr of every numeric result field over the trials.
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from core.datasets import Datasets, DATA_DIR
+from core.summons import HealEffect
+from core.team import Team
+from simulation import memory
+from simulation.montecarlo import trial_seed
+from simulation.policies import MinMaxerPolicy, PlannerPolicy
+from simulation.traces import flatten_step
+from simulation.simulator import (
+    iter_with_metric,
+    iter_with_policy,
+    simulate_artifact_farm_heal,
+    simulate_talent_farm_heal,
+    compare_artifact_vs_talent_strategy,
+)
+
+RESIN_POLICIES = {
+    "minmaxer": MinMaxerPolicy,
+    "planner": PlannerPolicy,
+}
+
+_DATASETS = None  # per-process tables, filled by _init_worker
+
+
+def damage_metric(multipliers):
+    def metric(char):
+        return char.expected_damage_output(
+            combo=char.default_combo,
+            multipliers=multipliers,
+            enemy_level=100,
+            enemy_resistance=0.1
+        )
+    metric.screen_metric = "damage"
+    return metric
+
+
+def heal_metric(multipliers):
+    def metric(char):
+        # one Burst: ticks every 2 s for 12 s
+        he = HealEffect(char, multipliers, "Burst", char.burst_level, interval=2.0, duration=12.0)
+        return he.total_heal()
+    metric.screen_metric = "heal"
+    return metric
+
+
+def team_damage_metric(multipliers, teammates):
+    """Party rotation damage with the simulated character in the first slot."""
+    team = None
+
+    def metric(char):
+        nonlocal team
+        # teammates never change: their totals are aggregated once and reused
+        team = Team([char, *teammates], multipliers) if team is None else team.with_member(0, char)
+        return team.damage(enemy_level=100, enemy_resistance=0.1)
+    return metric
+
+
+METRICS = {
+    "damage": damage_metric,
+    "heal": heal_metric,
+}
+
+
+def scenario_metric(scenario, datasets):
+    """The scenario's metric function; with "team" it scores the whole party."""
+    name = scenario.get("metric", "damage")
+    if scenario.get("team"):
+        if name != "damage":
+            raise ValueError(f"Team scenarios use the damage metric, got {name!r}")
+        teammates = [build_character(spec if isinstance(spec, dict) else {"character": spec}, datasets)
+                     for spec in scenario["team"]]
+        return team_damage_metric(datasets.multipliers, teammates)
+    return METRICS[name](datasets.multipliers)
+
+
+def read_scenarios(path):
+    """Yield scenarios one line at a time; blank lines and '#' comments are skipped."""
+    with open(path, encoding='utf-8') as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            scenario = json.loads(line)
+            scenario.setdefault("id", f"scenario-{lineno}")
+            yield scenario
+
+
+def iter_tasks(scenarios):
+    for scenario in scenarios:
+        for trial in range(int(scenario.get("trials", 1))):
+            yield scenario, trial
+
+
+def build_character(scenario, datasets):
+    levels = scenario.get("levels", {})
+    return datasets.make_character(
+        scenario["character"],
+        weapon_name=scenario.get("weapon"),
+        artifacts=scenario.get("artifacts"),
+        aa_level=levels.get("aa", 1),
+        skill_level=levels.get("skill", 1),
+        burst_level=levels.get("burst", 1),
+        combo=scenario.get("combo"),
+        skill_type=scenario.get("skill", "AA"),
+    )
+
+
+def summarize_steps(steps):
+    """Consume a step iterator keeping only counters and the last record."""
+    n_steps, resin_spent, last = 0, 0, None
+    for last in steps:
+        n_steps += 1
+        resin_spent += last["resin_spent"]
+    return n_steps, resin_spent, last
+
+
+def _collect_steps(steps, rows, run, trial):
+    for i, step in enumerate(steps):
+        rows.append(flatten_step(step, run=run, trial=trial, step=i))
+        yield step
+
+
+def run_trial(scenario, trial, datasets, trace=False):
+    """
+    Run one trial of a scenario and return a small JSON-serialisable summary.
+    With `trace`, the flattened step rows are returned under "_trace".
+    """
+    multipliers = datasets.multipliers
+    policy = scenario.get("policy", "greedy_swap")
+    budget = int(scenario.get("resin_budget", 300))
+    domain_level = int(scenario.get("domain_level", 4))
+    seed = trial_seed(int(scenario.get("seed", 0)), trial)
+
+    random.seed(seed)
+    start = time.perf_counter()
+    out = {
+        "scenario": scenario["id"],
+        "trial": trial,
+        "seed": seed,
+        "character": scenario["character"],
+        "policy": policy,
+        "resin_budget": budget,
+    }
+    trace_rows = []
+
+    if policy == "artifact_vs_talent":
+        summary = compare_artifact_vs_talent_strategy(
+            character_factory=lambda: build_character(scenario, datasets),
+            multipliers=multipliers,
+            resin_budget=budget,
+            domain_level=domain_level
+        )
+        out.update({
+            "artifact_delta": summary["artifact_delta"],
+            "talent_delta": summary["talent_delta"],
+            "winner": "artifact" if summary["artifact_delta"] > summary["talent_delta"] else "talent",
+        })
+
+    elif policy in RESIN_POLICIES:
+        char = build_character(scenario, datasets)
+        metric_fn = scenario_metric(scenario, datasets)
+        metric_start = metric_fn(char)
+        steps = iter_with_policy(
+            char,
+            resin_budget=budget,
+            policy=RESIN_POLICIES[policy](multipliers),
+            domain_level=domain_level
+        )
+        if trace:
+            steps = _collect_steps(steps, trace_rows, scenario["id"], trial)
+        n_steps, resin_spent, _ = summarize_steps(steps)
+        out.update({
+            "metric_start": metric_start,
+            "metric_end": metric_fn(char),
+            "steps": n_steps,
+            "resin_spent": resin_spent,
+        })
+
+    else:
+        char = build_character(scenario, datasets)
+        metric_fn = scenario_metric(scenario, datasets)
+        metric_start = metric_fn(char)
+        steps = iter_with_metric(
+            character=char,
+            resin_budget=budget,
+            multipliers=multipliers,
+            metric_fn=metric_fn,
+            artifact_runner=simulate_artifact_farm_heal,
+            talent_runner=simulate_talent_farm_heal,
+            domain_level=domain_level,
+            policy=policy,
+            **scenario.get("policy_args", {})
+        )
+        if trace:
+            steps = _collect_steps(steps, trace_rows, scenario["id"], trial)
+        n_steps, resin_spent, last = summarize_steps(steps)
+        out.update({
+            "metric_start": metric_start,
+            "metric_end": last["metric_after"] if last else metric_start,
+            "steps": n_steps,
+            "resin_spent": resin_spent,
+        })
+
+    if policy != "artifact_vs_talent":
+        out["talent_levels"] = {"AA": char.aa_level, "Skill": char.skill_level, "Burst": char.burst_level}
+        out["metric_gain"] = out["metric_end"] - out["metric_start"]
+    out["elapsed_s"] = time.perf_counter() - start
+    if trace:
+        out["_trace"] = trace_rows
+    return out
+
+
+def _init_worker(data_dir):
+    global _DATASETS
+    _DATASETS = Datasets(data_dir)
+    if memory.is_enabled():
+        # the multiplier table is a defaultdict: lookups of missing levels grow it
+        memory.watch("multipliers", _DATASETS.multipliers)
+
+
+def _run_task(scenario, trial, trace=False):
+    # simulators print progress/debug lines; keep them out of the JSONL stream
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            with memory.trial(f"{scenario.get('id')}:{trial}"):
+                return run_trial(scenario, trial, _DATASETS, trace=trace)
+        except Exception as e:
+            return {"scenario": scenario.get("id"), "trial": trial, "error": f"{type(e).__name__}: {e}"}
+
+
+def scenario_config(scenario):
+    """The parts of a scenario that determine its results (everything but the id)."""
+    return {k: v for k, v in scenario.items() if k != "id"}
+
+
+def _uncached(scenarios, cache, data_dir, emit, collecting):
+    """Replay cached scenarios through `emit`; yield the ones that must run."""
+    from simulation.cache import data_hash
+    data = data_hash(data_dir)
+    for scenario in scenarios:
+        key = cache.key(scenario_config(scenario), data)
+        rows = cache.get(key)
+        if rows is not None:
+            for row in rows:
+                emit(dict(row, scenario=scenario["id"], cached=True))
+            continue
+        collecting[scenario["id"]] = (key, int(scenario.get("trials", 1)), [])
+        yield scenario
+
+
+TRIAL_FIELDS = ("trial", "seed", "resin_budget")  # per-trial metadata, not results
+
+
+def store_scenario(store, scenario, rows, data_dir=DATA_DIR):
+    """Record a finished scenario's trial results as one run in a ResultStore."""
+    from simulation.store import summarize
+    store.add_run(
+        "batch",
+        summarize(rows, skip=TRIAL_FIELDS),
+        config=scenario_config(scenario),
+        data_dir=data_dir,
+        name=scenario["id"],
+        character=scenario["character"],
+        policy=scenario.get("policy", "greedy_swap"),
+        metric=scenario.get("metric", "damage"),
+        resin_budget=int(scenario.get("resin_budget", 300)),
+        trials=len(rows),
+        seed=int(scenario.get("seed", 0)),
+    )
+
+
+def _tracked(scenarios, stored):
+    for scenario in scenarios:
+        stored[scenario["id"]] = (scenario, [])
+        yield scenario
+
+
+def run_batch(scenarios, out, workers=None, data_dir=DATA_DIR, cache=None, trace=None, store=None):
+    """
+    Run every (scenario, trial) and write one JSON line per result to `out`
+    as soon as it finishes. At most a few tasks per worker are in flight, so
+    memory stays flat however long the scenario stream is. `trace` is an
+    optional simulation.traces.TraceWriter for the step rows, `store` an
+    optional simulation.store.ResultStore for per-scenario aggregates.
+    """
+    written = 0
+    collecting = {}  # scenario id -> (cache key, trials, rows) while it runs
+    stored = {}  # scenario id -> (scenario, rows) while it runs, with a store
+
+    def emit(result):
+        nonlocal written
+        out.write(json.dumps(result) + "\n")
+        out.flush()
+        written += 1
+
+    def record(result):
+        rows = result.pop("_trace", None)
+        if rows and trace is not None:
+            for row in rows:
+                trace.write_row(row)
+        emit(result)
+        if result.get("scenario") in stored:
+            scenario, rows = stored[result["scenario"]]
+            rows.append(result)
+            if "error" in result:
+                del stored[result["scenario"]]
+            elif len(rows) == int(scenario.get("trials", 1)):
+                store_scenario(store, scenario, rows, data_dir)
+                del stored[result["scenario"]]
+        pending_rows = collecting.get(result.get("scenario"))
+        if pending_rows is None:
+            return
+        key, trials, rows = pending_rows
+        rows.append(result)
+        if "error" in result:
+            del collecting[result["scenario"]]
+        elif len(rows) == trials:
+            cache.put(key, sorted(rows, key=lambda r: r["trial"]))
+            del collecting[result["scenario"]]
+
+    if cache is not None:
+        scenarios = _uncached(scenarios, cache, data_dir, emit, collecting)
+    if store is not None:
+        scenarios = _tracked(scenarios, stored)
+    tasks = iter_tasks(scenarios)
+
+    if workers == 1:
+        _init_worker(data_dir)
+        for scenario, trial in tasks:
+            record(_run_task(scenario, trial, trace is not None))
+        if store is not None:
+            store.flush()
+        return written
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = 4 * workers
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data_dir,)) as pool:
+        pending = set()
+        for scenario, trial in tasks:
+            pending.add(pool.submit(_run_task, scenario, trial, trace is not None))
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    record(fut.result())
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                record(fut.result())
+    if store is not None:
+        store.flush()
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run GIROS resin scenarios and stream JSONL results.")
+    parser.add_argument("scenarios", help="JSONL file, one scenario per line")
+    parser.add_argument("-o", "--output", help="result file (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--cache", nargs="?", const="", default=None, metavar="DIR",
+                        help="reuse/store results in the on-disk result cache (default dir: .giros_cache)")
+    parser.add_argument("--store", nargs="?", const="", default=None, metavar="PATH",
+                        help="record per-scenario aggregates in the SQLite run store (default: .giros_runs.sqlite)")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="also write every step to a columnar trace (.parquet / .arrow, needs pyarrow)")
+    args = parser.parse_args(argv)
+
+    cache = None
+    if args.cache is not None:
+        from simulation.cache import ResultCache, CACHE_DIR
+        cache = ResultCache(args.cache or CACHE_DIR)
+
+    store = None
+    if args.store is not None:
+        from simulation.store import ResultStore, STORE_PATH
+        store = ResultStore(args.store or STORE_PATH)
+
+    trace = None
+    if args.trace:
+        from simulation.traces import TraceWriter
+        trace = TraceWriter(args.trace)
+
+    out = open(args.output, "w", encoding='utf-8') if args.output else sys.stdout
+    try:
+        n = run_batch(read_scenarios(args.scenarios), out, workers=args.workers, data_dir=args.data_dir,
+                      cache=cache, trace=trace, store=store)
+    finally:
+        if args.output:
+            out.close()
+        if trace is not None:
+            trace.close()
+        if store is not None:
+            store.close()
+    print(f"{n} results written", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
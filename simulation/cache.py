@@ -0,0 +1,279 @@
+# simulation/cache.py
+"""
+Content-addressed on-disk cache for expensive simulation results.
+
+A result is stored under sha256(config + data hash + code hash), so a cached
+entry is only found again when the character setup, artifacts, policy,
+budget, trials and seed all match, and when the data CSVs/multiplier table
+and the core/simulation sources are unchanged. Entries are zlib-compressed
+pickles under <dir>/<2 hex>/<key>. Reads touch the file's mtime, and when the
+directory grows past `max_bytes` the least recently used entries are removed
+first.
+
+    cache = ResultCache()
+    summary = cached_compare_artifact_vs_talent(cache, character_factory, multipliers,
+                                                resin_budget=300, seed=7)
+"""
+import copy
+import hashlib
+import json
+import os
+import pickle
+import random
+import tempfile
+import zlib
+
+from simulation.checkpoint import restore_character
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.environ.get("GIROS_CACHE_DIR", os.path.join(REPO_DIR, ".giros_cache"))
+CODE_DIRS = ("core", "simulation")
+
+_file_hashes = {}  # path -> ((mtime_ns, size), digest)
+_code_hash = None
+
+
+def _hash_file(path):
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _file_hashes.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    _file_hashes[path] = (stamp, digest)
+    return digest
+
+
+def _hash_files(paths):
+    h = hashlib.sha256()
+    for path in sorted(paths):
+        h.update(os.path.basename(path).encode())
+        h.update(_hash_file(path).encode())
+    return h.hexdigest()
+
+
+def data_hash(data_dir=None):
+    """Hash of every CSV in the data directory (re-read only when a file changes)."""
+    from core.datasets import DATA_DIR
+    data_dir = data_dir or DATA_DIR
+    return _hash_files(
+        os.path.join(data_dir, name) for name in os.listdir(data_dir) if name.endswith(".csv")
+    )
+
+
+def code_hash():
+    """Hash of the core/ and simulation/ sources, computed once per process."""
+    global _code_hash
+    if _code_hash is None:
+        paths = []
+        for d in CODE_DIRS:
+            root = os.path.join(REPO_DIR, d)
+            paths += [os.path.join(root, n) for n in os.listdir(root) if n.endswith(".py")]
+        _code_hash = _hash_files(paths)
+    return _code_hash
+
+
+def canonical_json(obj):
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), default=repr)
+
+
+def multipliers_hash(multipliers):
+    """Hash of a talent multiplier table's contents."""
+    return hashlib.sha256(canonical_json(multipliers).encode()).hexdigest()
+
+
+def character_fingerprint(character):
+    """Everything about a Character that the simulators read."""
+    weapon = character.weapon
+    return {
+        "name": character.name,
+        "vision": character.vision,
+        "base_stats": character.base_stats,
+        "special_stat": [character.special_stat_type, character.special_stat_value],
+        "weapon": None if weapon is None else
+        [weapon.name, weapon.base_atk, weapon.substat_type, weapon.substat_value],
+        "levels": [character.aa_level, character.skill_level, character.burst_level],
+        "combo": character.default_combo,
+        "skill": character.default_skill,
+        "artifacts": character.artifacts,
+        "books": character.book_inventory,
+    }
+
+
+def _callable_key(fn, override=None):
+    if override is not None:
+        return override
+    name = f"{getattr(fn, '__module__', '?')}.{getattr(fn, '__qualname__', repr(fn))}"
+    # lambdas share one name, closures one name per enclosing function
+    # whatever values they captured
+    if "<lambda>" in name or "<locals>" in name:
+        raise ValueError(f"Cannot derive a stable cache key for {name}; pass an explicit key.")
+    return name
+
+
+class ResultCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, config, data=None):
+        """Content hash of `config` plus the data and code versions."""
+        payload = {"config": config, "data": data or data_hash(), "code": code_hash()}
+        return hashlib.sha256(canonical_json(payload).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            self.misses += 1
+            return default
+        except (zlib.error, pickle.UnpicklingError, EOFError):
+            # truncated / foreign file: drop it and recompute
+            os.remove(path)
+            self.misses += 1
+            return default
+        os.utime(path)  # LRU: most recently read entries are evicted last
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        blob = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(blob)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self.evict()
+
+    def get_or_compute(self, config, compute, data=None):
+        key = self.key(config, data)
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def entries(self):
+        """[(mtime, size, path)] for every stored entry."""
+        out = []
+        if not os.path.isdir(self.directory):
+            return out
+        for shard in os.listdir(self.directory):
+            shard_dir = os.path.join(self.directory, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if name.startswith(".tmp-"):
+                    continue
+                path = os.path.join(shard_dir, name)
+                st = os.stat(path)
+                out.append((st.st_mtime_ns, st.st_size, path))
+        return out
+
+    def size_bytes(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for _, _, path in self.entries():
+            os.remove(path)
+
+    def stats(self):
+        entries = self.entries()
+        return {"entries": len(entries), "bytes": sum(s for _, s, _ in entries),
+                "hits": self.hits, "misses": self.misses}
+
+
+# ── Cached simulator entry points ───────────────────────────────────────────
+def cached_compare_artifact_vs_talent(cache, character_factory, multipliers, resin_budget=300,
+                                      domain_level=4, seed=0):
+    """compare_artifact_vs_talent_strategy, seeded with `seed` and cached on disk."""
+    from simulation.simulator import compare_artifact_vs_talent_strategy
+
+    config = {
+        "fn": "compare_artifact_vs_talent_strategy",
+        "character": character_fingerprint(character_factory()),
+        "multipliers": multipliers_hash(multipliers),
+        "resin_budget": resin_budget,
+        "domain_level": domain_level,
+        "seed": seed,
+    }
+
+    def compute():
+        random.seed(seed)
+        return compare_artifact_vs_talent_strategy(character_factory, multipliers,
+                                                   resin_budget=resin_budget, domain_level=domain_level)
+
+    return cache.get_or_compute(config, compute)
+
+
+def cached_simulate_with_metric(cache, character, resin_budget, multipliers, metric_fn,
+                                artifact_runner, talent_runner, seed=0, metric_key=None, **kwargs):
+    """
+    simulate_with_metric, seeded with `seed` and cached on disk. On a hit the
+    character is left in the same end state an actual run would leave it in.
+    `metric_key` names the metric when metric_fn is a lambda or a closure
+    (e.g. batch.damage_metric(...)), and must differ between closures over
+    different values. Other keyword arguments are simulate_with_metric's
+    policy arguments; they are part of the key, so they must be JSON values.
+    """
+    from simulation.simulator import simulate_with_metric
+
+    for name, value in kwargs.items():
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Cannot derive a stable cache key for {name}={type(value).__name__}; "
+                             "only JSON-serialisable policy arguments can be cached.") from None
+
+    config = {
+        "fn": "simulate_with_metric",
+        "character": character_fingerprint(character),
+        "multipliers": multipliers_hash(multipliers),
+        "resin_budget": resin_budget,
+        "metric": _callable_key(metric_fn, metric_key),
+        "artifact_runner": _callable_key(artifact_runner),
+        "talent_runner": _callable_key(talent_runner),
+        "seed": seed,
+        **kwargs,
+    }
+
+    def compute():
+        random.seed(seed)
+        steps = simulate_with_metric(character, resin_budget, multipliers, metric_fn,
+                                     artifact_runner, talent_runner, **kwargs)
+        return {"steps": steps, "character": copy.deepcopy(character)}
+
+    result = cache.get_or_compute(config, compute)
+    restore_character(character, copy.deepcopy(result["character"]))
+    return result["steps"]
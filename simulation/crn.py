@@ -0,0 +1,230 @@
+# simulation/crn.py
+"""
+Common random numbers and variance reduction for strategy comparisons.
+
+Each trial gets a DropStreams: one generator for artifact drops (slot, main
+stat, substats, upgrade targets), one for roll tiers and one for talent book
+drops. Every competing strategy replays a fork() of the same trial's streams,
+so the k-th artifact and the k-th book run are identical across strategies,
+and the observed difference measures the strategies rather than the luck.
+
+Roll tiers (which of the four values a substat roll gets) can additionally be
+drawn
+  - "antithetic": trials 2k and 2k+1 share a tier stream and the odd one uses
+    u → 1 - u, i.e. tier t → 3 - t;
+  - "stratified": each block of `strata` trials shares a tier stream and the
+    d-th tier draw of the block is Latin-hypercube stratified across it.
+Each trial's tiers stay uniform, so means are unbiased in every mode.
+
+    strategies = policy_strategies(factory, multipliers, metric_fn,
+                                   {"greedy": {"policy": "greedy_swap"},
+                                    "artifacts": {"policy": "artifact_only"}})
+    result = compare_strategies(strategies, p_correct=0.99)
+    result["pairs"]["greedy - artifacts"]   # paired mean / stderr / CI / variance reduction
+"""
+import copy
+import math
+import random
+from statistics import NormalDist
+
+from simulation.montecarlo import ranking_confidence, run_adaptive, run_trials
+
+TIER_MODES = ("plain", "antithetic", "stratified")
+
+
+class TierSampler:
+    """Roll-tier draws from transformed uniforms: choice(seq) = seq[floor(u * len(seq))]."""
+
+    def __init__(self, rng, antithetic=False, stratum=0, strata=1):
+        self.rng = rng
+        self.antithetic = antithetic
+        self.stratum = stratum
+        self.strata = strata
+
+    def uniform(self):
+        if self.strata > 1:
+            # one shared permutation + jitter per draw index, so the block's
+            # trials fall in distinct strata of every draw
+            perm = self.rng.sample(range(self.strata), self.strata)
+            u = (perm[self.stratum] + self.rng.random()) / self.strata
+        else:
+            u = self.rng.random()
+        return 1.0 - u if self.antithetic else u
+
+    def choice(self, seq):
+        return seq[min(int(self.uniform() * len(seq)), len(seq) - 1)]
+
+
+class DropStreams:
+    """Per-trial generators for artifact drops, roll tiers and book drops."""
+
+    def __init__(self, seed=0, trial=0, tiers="plain", strata=8):
+        if tiers not in TIER_MODES:
+            raise ValueError(f"Unknown tier mode {tiers!r}; expected one of {TIER_MODES}")
+        self.artifacts = random.Random(f"{seed}:{trial}:artifacts")
+        self.books = random.Random(f"{seed}:{trial}:books")
+        if tiers == "antithetic":
+            self.tiers = TierSampler(random.Random(f"{seed}:{trial // 2}:tiers"), antithetic=trial % 2 == 1)
+        elif tiers == "stratified":
+            self.tiers = TierSampler(random.Random(f"{seed}:{trial // strata}:tiers"),
+                                     stratum=trial % strata, strata=strata)
+        else:
+            self.tiers = TierSampler(random.Random(f"{seed}:{trial}:tiers"))
+
+    def fork(self):
+        """An independent copy positioned at the same point of every stream."""
+        return copy.deepcopy(self)
+
+    def artifact_kwargs(self):
+        return {"rng": self.artifacts, "tier_rng": self.tiers}
+
+    def book_kwargs(self):
+        return {"rng": self.books}
+
+    def getstate(self):
+        return (self.artifacts.getstate(), self.tiers.rng.getstate(), self.books.getstate())
+
+    def setstate(self, state):
+        artifacts, tiers, books = state
+        self.artifacts.setstate(artifacts)
+        self.tiers.rng.setstate(tiers)
+        self.books.setstate(books)
+
+
+# ── Paired driver ───────────────────────────────────────────────────────────
+def pair_key(a, b):
+    return f"{a} - {b}"
+
+
+def paired_trial(strategies, seed=0, tiers="plain", strata=8, common=True):
+    """
+    Trial function for run_trials/run_adaptive. Runs every strategy
+    (`{name: fn(streams) -> float}`) on the trial's streams and returns each
+    value plus every pairwise difference "a - b". With common=False each
+    strategy gets its own independent streams (the baseline CRN is compared to).
+    """
+    names = list(strategies)
+
+    def trial(index):
+        base = DropStreams(seed, index, tiers=tiers, strata=strata)
+        values = {}
+        for i, name in enumerate(names):
+            streams = base.fork() if common else DropStreams(f"{seed}:{name}", index, tiers=tiers, strata=strata)
+            values[name] = strategies[name](streams)
+        for i, a in enumerate(names):
+            for b in names[i + 1:]:
+                values[pair_key(a, b)] = values[a] - values[b]
+        return values
+
+    return trial
+
+
+def paired_summary(stats, names, confidence=0.95):
+    """
+    Per-pair mean difference, its stderr/CI and the variance reduction
+    versus treating the two strategies as independent samples:
+    (var_a + var_b) / var_diff ≈ how many times fewer trials pairing needs.
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    out = {}
+    for i, a in enumerate(names):
+        for b in names[i + 1:]:
+            key = pair_key(a, b)
+            diff_var = stats.variance(key)
+            indep_var = stats.variance(a) + stats.variance(b)
+            se = stats.stderr(key)
+            mean = stats.mean[key]
+            out[key] = {
+                "mean": mean,
+                "stderr": se,
+                "ci": (mean - z * se, mean + z * se),
+                "p_a_better": NormalDist().cdf(mean / se) if se > 0 else float(mean > 0),
+                "correlation": (indep_var - diff_var) / (2 * math.sqrt(stats.variance(a) * stats.variance(b)))
+                if stats.variance(a) > 0 and stats.variance(b) > 0 else 0.0,
+                "variance_reduction": indep_var / diff_var if diff_var > 0 else math.inf,
+            }
+    return out
+
+
+def compare_strategies(strategies, trials=None, seed=0, tiers="plain", strata=8, common=True,
+                       confidence=0.95, checkpoint=None, **adaptive):
+    """
+    Compare strategies on common random numbers. With `trials` a fixed number
+    of trials runs; otherwise run_adaptive decides (its stopping arguments,
+    e.g. p_correct=0.99 or ci_width, go in **adaptive) and the ranking
+    confidence uses the paired differences.
+
+    Returns {"trials", "ranking", "p_correct", "strategies": summary, "pairs": paired_summary}.
+    """
+    names = list(strategies)
+    if tiers == "antithetic" and adaptive.get("batch_size", 200) % 2:
+        raise ValueError("antithetic tiers need an even batch_size")
+    trial_fn = paired_trial(strategies, seed=seed, tiers=tiers, strata=strata, common=common)
+
+    if trials is not None:
+        stats = run_trials(trial_fn, trials, seed=seed, checkpoint=checkpoint)
+        ranking, p = ranking_confidence(stats, names, paired=True)
+        n = trials
+    else:
+        result = run_adaptive(trial_fn, keys=names, seed=seed, confidence=confidence, checkpoint=checkpoint,
+                              paired=True, **adaptive)
+        stats, ranking, p, n = result["stats"], result["ranking"], result["p_correct"], result["trials"]
+
+    summary = stats.summary()
+    return {
+        "trials": n,
+        "ranking": ranking,
+        "p_correct": p,
+        "strategies": {k: summary[k] for k in names},
+        "pairs": paired_summary(stats, names, confidence),
+    }
+
+
+# ── Strategy builders ───────────────────────────────────────────────────────
+def policy_strategies(character_factory, multipliers, metric_fn, policies, resin_budget=300,
+                      domain_level=4, artifact_runner=None, talent_runner=None):
+    """
+    {name: fn(streams) -> metric gain} for simulate_with_metric policies,
+    e.g. policies={"greedy": {"policy": "greedy_swap"},
+                   "switch": {"policy": "threshold_then_switch", "threshold": 50}}.
+    """
+    from simulation.simulator import iter_with_metric, simulate_artifact_farm_heal, simulate_talent_farm_heal
+
+    artifact_runner = artifact_runner or simulate_artifact_farm_heal
+    talent_runner = talent_runner or simulate_talent_farm_heal
+
+    def make(kwargs):
+        def run(streams):
+            char = character_factory()
+            start = metric_fn(char)
+            last = None
+            for last in iter_with_metric(char, resin_budget, multipliers, metric_fn, artifact_runner,
+                                         talent_runner, domain_level=domain_level, streams=streams, **kwargs):
+                pass
+            return (last["metric_after"] if last else start) - start
+        return run
+
+    return {name: make(kwargs) for name, kwargs in policies.items()}
+
+
+def artifact_vs_talent_strategies(character_factory, multipliers, resin_budget=300, domain_level=4):
+    """{"artifact": fn, "talent": fn} built from the two halves of compare_artifact_vs_talent_strategy."""
+    from simulation.simulator import simulate_artifact_farm, simulate_talent_farm
+    from simulation.batch import damage_metric
+
+    metric = damage_metric(multipliers)
+
+    def artifact(streams):
+        char = character_factory()
+        start = metric(char)
+        for _ in range(resin_budget // 20):
+            simulate_artifact_farm(char, resin_spent=20, multipliers=multipliers, **streams.artifact_kwargs())
+        char.sync_stats(char.compute_total_stats())
+        return metric(char) - start
+
+    def talent(streams):
+        char = character_factory()
+        return simulate_talent_farm(char, resin_spent=resin_budget, domain_level=domain_level,
+                                    multipliers=multipliers, **streams.book_kwargs())["dps_gain"]
+
+    return {"artifact": artifact, "talent": talent}
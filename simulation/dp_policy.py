@@ -0,0 +1,291 @@
+# simulation/dp_policy.py
+"""
+Expected-metric-optimal resin policy by backward induction.
+
+State (per 20-resin step):
+    steps left,
+    artifact quality q: the sum over slots of each piece's quality bin
+        (0 = the starting piece, 1..bins = quantile bins of drops that beat it),
+    AA / Skill / Burst levels,
+    book inventory in Teaching equivalents (Guide = 3, Philosophy = 9),
+        rounded to multiples of `book_bin` and capped at `max_inventory`.
+
+Transitions come from the drop models themselves. The solver samples
+simulate_artifact per slot and simulate_talent_book_run:
+  - artifact_farm: a uniformly random slot drops a piece whose bin follows
+    the sampled distribution; it is kept only if its bin is higher. A
+    quality q is read as its most even spread over the slots (bins raised
+    round-robin), which is what that slot's current bin is taken to be.
+  - talent_farm: one domain run adds a sampled number of Teaching
+    equivalents. Talents are then levelled greedily while affordable, like
+    simulate_talent_farm does.
+The metric is taken to factorise into a talent part and an artifact part:
+metric(q, levels) = metric(starting pieces, levels) × metric(q, starting
+levels) / metric(starting build), with q represented by the median sampled
+piece of each slot's bin. That needs one evaluation per level triple and
+one per quality, instead of one per (per-slot bins, levels) pair.
+
+Artifact quality is a linear stat-weight score: the metric gain per unit of
+each stat, measured once on the starting build. solve() runs the backward
+induction over every state up front (numpy arrays over quality × levels ×
+inventory, one layer per step), so a character's state is read off in
+O(slots) and DPResinPolicy.choose_activity is an array lookup.
+
+    policy = solve_resin_policy(character, multipliers, resin_budget=400)
+    simulate_with_policy(character, 400, policy)
+"""
+import bisect
+import copy
+import itertools
+import random
+from collections import Counter
+
+import numpy as np
+
+from simulation.artifact import simulate_artifact
+from simulation.policies import ResinPolicy
+from simulation.talent_books import simulate_talent_book_run
+
+SLOTS = ("Flower", "Feather", "Sands", "Goblet", "Circlet")
+TALENTS = ("aa", "skill", "burst")
+MAX_LEVEL = 10
+UPGRADE_COSTS = {1: 3, 2: 6, 3: 12, 4: 18, 5: 27, 6: 36, 7: 54, 8: 108, 9: 144}
+BOOK_VALUE = {"Teachings": 1, "Guides": 3, "Philosophies": 9}
+
+# One average 5★ substat roll per stat, used to probe the metric's stat weights
+PROBE_ROLLS = {
+    'Flat HP': 253.94, 'Flat ATK': 16.54, 'Flat DEF': 19.68, 'HP%': 4.96, 'ATK%': 4.96,
+    'DEF%': 6.20, 'Elemental Mastery': 19.82, 'Energy Recharge%': 5.51, 'CRIT Rate%': 3.31,
+    'CRIT DMG%': 6.61, 'Healing Bonus%': 3.82,
+}
+
+
+def inventory_value(book_inventory):
+    return sum(BOOK_VALUE[k] * v for k, v in book_inventory.items())
+
+
+def _default_metric(multipliers):
+    from simulation.batch import damage_metric
+    return damage_metric(multipliers)
+
+
+class ResinDPSolver:
+    def __init__(self, character, multipliers, metric_fn=None, resin_budget=300, domain_level=4,
+                 bins=3, book_bin=6, samples=2000, seed=0, max_inventory=300):
+        self.multipliers = multipliers
+        self.metric_fn = metric_fn or _default_metric(multipliers)
+        self.steps = resin_budget // 20
+        self.bins = bins
+        self.book_bin = book_bin
+        self.max_inventory = max_inventory
+        rng = random.Random(seed)
+
+        self.base = copy.deepcopy(character)
+        self.base.sync_stats(self.base.compute_total_stats())
+        self.weights = self._stat_weights()
+
+        # artifact model: per slot, P(drop lands in bin b) and a representative piece per bin
+        self.edges, self.start_scores, self.bin_probs, self.representatives = {}, {}, {}, {}
+        for slot in SLOTS:
+            equipped = self.base.artifacts.get(slot)
+            start = self.score(equipped) if equipped else float("-inf")
+            drops = sorted(((self.score(a), i, a) for i, a in
+                            enumerate(simulate_artifact(slot, rng=rng) for _ in range(samples))),
+                           key=lambda t: (t[0], t[1]))
+            better = [d for d in drops if d[0] > start]
+            chunks = [better[len(better) * b // bins: len(better) * (b + 1) // bins] for b in range(bins)]
+            chunks = [c for c in chunks if c]
+            self.start_scores[slot] = start
+            self.edges[slot] = [c[0][0] for c in chunks[1:]]
+            self.bin_probs[slot] = [len(c) / samples for c in chunks]
+            self.representatives[slot] = [equipped] + [c[len(c) // 2][2] for c in chunks]
+
+        # book model: distribution of Teaching equivalents per domain run
+        counts = Counter(self.round_books(inventory_value(simulate_talent_book_run(domain_level, rng=rng)))
+                         for _ in range(samples))
+        self.book_probs = [(v, n / samples) for v, n in sorted(counts.items())]
+
+        # state axes: quality, level triples from the starting levels up, inventories
+        self.max_quality = sum(len(self.bin_probs[slot]) for slot in SLOTS)
+        self.spreads = [self.spread(q) for q in range(self.max_quality + 1)]
+        self.level_bounds = [(lv, max(lv, MAX_LEVEL)) for lv in (getattr(self.base, f"{t}_level")
+                                                                  for t in TALENTS)]
+        self.levels = list(itertools.product(*(range(lo, hi + 1) for lo, hi in self.level_bounds)))
+        self.level_index = {lv: i for i, lv in enumerate(self.levels)}
+        self.inventories = sorted({self.round_books(b * book_bin) for b in range(max_inventory // book_bin + 2)})
+        self.inventory_index = {v: i for i, v in enumerate(self.inventories)}
+
+        self.tables = []
+        self.expected_value = None
+
+    # ── scoring ──
+    def _stat_weights(self):
+        base = self.metric_fn(self.base)
+        weights = {}
+        for stat, roll in PROBE_ROLLS.items():
+            probe = copy.deepcopy(self.base)
+            probe.artifacts["_probe"] = {"main_stat": stat, "main_stat_value": roll, "substats": {}}
+            probe.sync_stats(probe.compute_total_stats())
+            weights[stat] = (self.metric_fn(probe) - base) / roll
+        return weights
+
+    def score(self, artifact):
+        """Linear stat-weight quality of an artifact (main stat + substats)."""
+        w = self.weights
+        total = w.get(artifact["main_stat"], 0.0) * artifact["main_stat_value"]
+        for stat, value in artifact["substats"].items():
+            total += w.get(stat, 0.0) * value
+        return total
+
+    def round_books(self, value):
+        return min(self.max_inventory, int(round(value / self.book_bin)) * self.book_bin)
+
+    def bin_of(self, slot, artifact):
+        if artifact is None:
+            return 0
+        s = self.score(artifact)
+        if s <= self.start_scores[slot]:
+            return 0
+        return 1 + bisect.bisect_right(self.edges[slot], s)
+
+    def spread(self, quality):
+        """Per-slot bins for `quality`, raised round-robin (lowest bin first)."""
+        bins = [0] * len(SLOTS)
+        for _ in range(quality):
+            open_slots = [i for i, slot in enumerate(SLOTS) if bins[i] < len(self.bin_probs[slot])]
+            bins[min(open_slots, key=lambda i: bins[i])] += 1
+        return tuple(bins)
+
+    # ── model ──
+    def _evaluate(self, bins, levels):
+        char = copy.deepcopy(self.base)
+        for slot, b in zip(SLOTS, bins):
+            char.artifacts[slot] = self.representatives[slot][b]
+        char.aa_level, char.skill_level, char.burst_level = levels
+        char.sync_stats(char.compute_total_stats())
+        return self.metric_fn(char)
+
+    def metric_parts(self):
+        """(metric per level triple, artifact factor per quality); see the module docstring."""
+        start = tuple(lo for lo, _ in self.level_bounds)
+        talent = np.array([self._evaluate(self.spreads[0], lv) for lv in self.levels])
+        base = talent[self.level_index[start]]
+        quality = np.array([self._evaluate(bins, start) for bins in self.spreads])
+        factor = quality / base if base else np.ones(len(self.spreads))
+        return talent, factor
+
+    def artifact_transitions(self):
+        """P(quality q → q') for one artifact_farm step."""
+        n = self.max_quality + 1
+        out = np.zeros((n, n))
+        for q, bins in enumerate(self.spreads):
+            for i, slot in enumerate(SLOTS):
+                probs = self.bin_probs[slot]
+                out[q, q] += (1.0 - sum(probs)) / len(SLOTS)
+                for b, p in enumerate(probs, 1):
+                    out[q, q + max(0, b - bins[i])] += p / len(SLOTS)
+        return out
+
+    def spend_books(self, level_index, inventory, talent, memo):
+        """Greedy level-ups after a domain run, as in simulate_talent_farm."""
+        key = (level_index, inventory)
+        if key not in memo:
+            lv = self.levels[level_index]
+            gains = {}
+            for i in range(3):
+                cost = UPGRADE_COSTS.get(lv[i])
+                if lv[i] >= MAX_LEVEL or cost is None or inventory < cost:
+                    continue
+                gains[i] = self.level_index[lv[:i] + (lv[i] + 1,) + lv[i + 1:]]
+            if gains:
+                best = max(gains, key=lambda i: talent[gains[i]])
+                memo[key] = self.spend_books(gains[best], inventory - UPGRADE_COSTS[lv[best]], talent, memo)
+            else:
+                memo[key] = (level_index, self.inventory_index[self.round_books(inventory)])
+        return memo[key]
+
+    def talent_transitions(self, talent):
+        """[(probability, next level index, next inventory index)] per book outcome, as (levels × inventory) arrays."""
+        n_levels, n_inv = len(self.levels), len(self.inventories)
+        spent_levels = np.empty((n_levels, n_inv), dtype=np.intp)
+        spent_inv = np.empty((n_levels, n_inv), dtype=np.intp)
+        memo = {}
+        for li in range(n_levels):
+            for ii, inv in enumerate(self.inventories):
+                spent_levels[li, ii], spent_inv[li, ii] = self.spend_books(li, inv, talent, memo)
+        out = []
+        for books, p in self.book_probs:
+            after = [self.inventory_index[self.round_books(inv + books)] for inv in self.inventories]
+            out.append((p, spent_levels[:, after], spent_inv[:, after]))
+        return out
+
+    # ── backward induction ──
+    def solve(self):
+        """
+        Solve every (steps, quality, levels, inventory) state. tables[s - 1]
+        is True where artifact_farm is the better action with s steps left.
+        """
+        talent, factor = self.metric_parts()
+        arts = self.artifact_transitions()
+        tals = self.talent_transitions(talent)
+
+        values = np.broadcast_to(factor[:, None, None] * talent[None, :, None],
+                                 (len(factor), len(self.levels), len(self.inventories)))
+        self.tables = []
+        for _ in range(self.steps):
+            art = np.tensordot(arts, values, axes=(1, 0))
+            tal = sum(p * values[:, levels, inv] for p, levels, inv in tals)
+            self.tables.append(art >= tal)
+            values = np.maximum(art, tal)
+
+        _, q, levels, inventory = self.state_of(self.base, self.steps)
+        self.expected_value = float(values[q, self.level_index[levels], self.inventory_index[inventory]])
+        return self
+
+    def state_of(self, character, steps):
+        quality = sum(self.bin_of(slot, character.artifacts.get(slot)) for slot in SLOTS)
+        levels = tuple(min(max(getattr(character, f"{t}_level"), lo), hi)
+                       for t, (lo, hi) in zip(TALENTS, self.level_bounds))
+        inventory = self.round_books(inventory_value(character.book_inventory))
+        return steps, quality, levels, inventory
+
+    def action(self, state):
+        """Array lookup in the solved tables; None once no steps are left."""
+        steps, quality, levels, inventory = state
+        if steps <= 0:
+            return None
+        farm = self.tables[steps - 1][quality, self.level_index[levels], self.inventory_index[inventory]]
+        return "artifact_farm" if farm else "talent_farm"
+
+
+class DPResinPolicy(ResinPolicy):
+    """
+    ResinPolicy backed by a solved ResinDPSolver table. Counts its own
+    steps, so create one (or call reset()) per run. evaluate_upgrade always
+    continues: the simulators already keep only improving pieces.
+    """
+
+    def __init__(self, solver, multipliers=None):
+        super().__init__(multipliers if multipliers is not None else solver.multipliers)
+        self.solver = solver
+        self.reset()
+
+    def reset(self):
+        self.steps_left = self.solver.steps
+
+    def choose_activity(self, character):
+        if self.steps_left <= 0:
+            return None
+        action = self.solver.action(self.solver.state_of(character, self.steps_left))
+        self.steps_left -= 1
+        return action
+
+    def evaluate_upgrade(self, before_dps, after_dps, resin_cost):
+        return True
+
+
+def solve_resin_policy(character, multipliers, metric_fn=None, resin_budget=300, domain_level=4, **kwargs):
+    """Solve the DP for `character` and return a ready-to-use DPResinPolicy."""
+    solver = ResinDPSolver(character, multipliers, metric_fn=metric_fn, resin_budget=resin_budget,
+                           domain_level=domain_level, **kwargs).solve()
+    return DPResinPolicy(solver, multipliers)
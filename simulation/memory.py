@@ -0,0 +1,205 @@
+# simulation/memory.py
+"""
+Opt-in memory accounting for simulations (tracemalloc + RSS samples).
+
+The simulators mark their stages with `memory.stage(name)`:
+    "artifact_generation"  rolling the new artifact
+    "what_if"              deepcopies + metric evaluation of candidate upgrades
+    "result_recording"     building / collecting the per-step records
+and the Monte Carlo driver wraps each trial in `memory.trial()`.
+
+While disabled both return one shared no-op context manager, so the hooks
+cost a function call. Enable with GIROS_MEMORY=1, enable()/disable(), or
+
+    with memory.tracking():
+        run_trials(...)
+    print(memory.report())
+
+Per stage: calls, the largest peak above the stage's starting point, and the
+bytes still allocated when it exited (retained). Per trial: the same peak
+and retained numbers plus RSS at the end of the trial. Tables registered with
+watch() (e.g. the defaultdict multiplier table, which grows on lookups of
+missing levels; the batch and Monte Carlo drivers register it) have their
+leaf count sampled at every trial end.
+"""
+import atexit
+import contextlib
+import os
+import sys
+import tracemalloc
+
+_enabled = False
+_owns_tracing = False  # enable() started tracemalloc, so disable() stops it
+_stack = []      # open stage/trial frames
+_stages = {}     # name -> {"calls", "peak_bytes", "retained_bytes"}
+_trials = []     # per-trial dicts
+_watched = {}    # name -> object whose leaf count is sampled per trial
+
+
+class _Null:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _Null()
+
+
+class _Frame:
+    __slots__ = ("name", "start", "peak", "kind")
+
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        cur, peak = tracemalloc.get_traced_memory()
+        if _stack:
+            _stack[-1].peak = max(_stack[-1].peak, peak)
+        tracemalloc.reset_peak()
+        self.start = cur
+        self.peak = cur
+
+    def __enter__(self):
+        _stack.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        cur, peak = tracemalloc.get_traced_memory()
+        _stack.pop()
+        self.peak = max(self.peak, peak)
+        if _stack:
+            _stack[-1].peak = max(_stack[-1].peak, self.peak)
+        peak_bytes = self.peak - self.start
+        retained = cur - self.start
+
+        if self.kind == "stage":
+            rec = _stages.setdefault(self.name, {"calls": 0, "peak_bytes": 0, "retained_bytes": 0})
+            rec["calls"] += 1
+            rec["peak_bytes"] = max(rec["peak_bytes"], peak_bytes)
+            rec["retained_bytes"] += retained
+        else:
+            _trials.append({
+                "trial": self.name,
+                "peak_bytes": peak_bytes,
+                "retained_bytes": retained,
+                "rss_bytes": rss_bytes(),
+                **{f"{k}_entries": count_entries(v) for k, v in _watched.items()},
+            })
+        return False
+
+
+def stage(name):
+    """Attribute allocations inside the block to simulator stage `name`."""
+    if not _enabled:
+        return _NULL
+    return _Frame(name, "stage")
+
+
+def trial(label=None):
+    """Record peak/retained bytes for one Monte Carlo trial."""
+    if not _enabled:
+        return _NULL
+    return _Frame(label if label is not None else len(_trials), "trial")
+
+
+def rss_bytes():
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def count_entries(obj):
+    """Leaf count of a nested dict (e.g. the talent multiplier table)."""
+    if isinstance(obj, dict):
+        return sum(count_entries(v) for v in obj.values()) if obj else 0
+    return 1
+
+
+def watch(name, obj):
+    """Sample `obj`'s leaf count (count_entries) at the end of every trial."""
+    _watched[name] = obj
+
+
+def is_enabled():
+    return _enabled
+
+
+def enable():
+    global _enabled, _owns_tracing
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _owns_tracing = True
+    _enabled = True
+
+
+def disable():
+    """Stop accounting; tracemalloc keeps running if someone else started it."""
+    global _enabled, _owns_tracing
+    _enabled = False
+    _stack.clear()
+    if _owns_tracing:
+        tracemalloc.stop()
+        _owns_tracing = False
+
+
+def reset():
+    _stages.clear()
+    _trials.clear()
+
+
+def stats():
+    return {"stages": {k: dict(v) for k, v in _stages.items()}, "trials": list(_trials)}
+
+
+@contextlib.contextmanager
+def tracking(print_summary: bool = False):
+    """Enable memory accounting for the block."""
+    already = _enabled
+    if not already:
+        reset()
+        enable()
+    try:
+        yield
+    finally:
+        if not already:
+            disable()
+        if print_summary:
+            print(report(), file=sys.stderr)
+
+
+def _fmt(n):
+    if abs(n) < 1024:
+        return f"{n}B"
+    for unit in ("KiB", "MiB", "GiB"):
+        n /= 1024
+        if abs(n) < 1024 or unit == "GiB":
+            return f"{n:.1f}{unit}"
+
+
+def report():
+    lines = [f"{'stage':<24} {'calls':>8} {'max peak':>12} {'retained':>12}"]
+    for name, rec in sorted(_stages.items(), key=lambda kv: kv[1]["peak_bytes"], reverse=True):
+        lines.append(f"{name:<24} {rec['calls']:>8,} {_fmt(rec['peak_bytes']):>12} {_fmt(rec['retained_bytes']):>12}")
+    if _trials:
+        peaks = [t["peak_bytes"] for t in _trials]
+        kept = [t["retained_bytes"] for t in _trials]
+        lines.append(
+            f"trials: {len(_trials)}, peak/trial max {_fmt(max(peaks))} mean {_fmt(sum(peaks) / len(peaks))}, "
+            f"retained/trial mean {_fmt(sum(kept) / len(kept))}, RSS {_fmt(_trials[-1]['rss_bytes'])}"
+        )
+    return "\n".join(lines)
+
+
+def _enable_from_env():
+    if os.environ.get("GIROS_MEMORY", "") not in ("", "0"):
+        enable()
+        atexit.register(lambda: print(report(), file=sys.stderr))
+
+
+_enable_from_env()
@@ -0,0 +1,245 @@
+# simulation/montecarlo.py
+import contextlib
+import math
+import os
+import random
+from statistics import NormalDist
+
+from simulation import memory
+
+
+def trial_seed(seed, trial):
+    """Deterministic per-trial seed so results don't depend on run order or resumes."""
+    return seed * 1_000_003 + trial
+
+
+class RunningStats:
+    """
+    Online mean/variance (Welford) for every numeric key a trial returns.
+    Small and picklable, so it doubles as the partial aggregate in checkpoints.
+    """
+
+    def __init__(self):
+        self.n = {}
+        self.mean = {}
+        self.m2 = {}
+
+    def add(self, values: dict):
+        for k, x in values.items():
+            n = self.n.get(k, 0) + 1
+            mean = self.mean.get(k, 0.0)
+            delta = x - mean
+            mean += delta / n
+            self.n[k] = n
+            self.mean[k] = mean
+            self.m2[k] = self.m2.get(k, 0.0) + delta * (x - mean)
+
+    def merge(self, other):
+        """Fold in another RunningStats (e.g. a separately run block of trials)."""
+        for k, n_b in other.n.items():
+            n_a = self.n.get(k, 0)
+            n = n_a + n_b
+            mean_a = self.mean.get(k, 0.0)
+            delta = other.mean[k] - mean_a
+            self.mean[k] = mean_a + delta * n_b / n
+            self.m2[k] = self.m2.get(k, 0.0) + other.m2[k] + delta * delta * n_a * n_b / n
+            self.n[k] = n
+        return self
+
+    def variance(self, key):
+        n = self.n.get(key, 0)
+        return self.m2[key] / (n - 1) if n > 1 else 0.0
+
+    def stderr(self, key):
+        n = self.n.get(key, 0)
+        return math.sqrt(self.variance(key) / n) if n else 0.0
+
+    def summary(self):
+        return {
+            k: {
+                "n": self.n[k],
+                "mean": self.mean[k],
+                "std": math.sqrt(self.variance(k)),
+                "stderr": self.stderr(k),
+            }
+            for k in self.mean
+        }
+
+
+def run_trials(trial_fn, trials, seed=0, checkpoint=None, start=0, store=None, run=None):
+    """
+    Run `trial_fn(trial_index) -> {name: float}` `trials` times and aggregate.
+
+    Each trial reseeds `random` from (seed, trial), so with a `checkpoint`
+    (simulation.checkpoint.Checkpointer) an interrupted run resumes after the
+    last completed trial and ends with exactly the same aggregates as an
+    uninterrupted one. With `start`, only trials start..trials-1 run: one
+    block of a longer run, to be combined with RunningStats.merge. With a
+    `store` (simulation.store.ResultStore) the aggregates are recorded as
+    one run, with `run` as its metadata (character, policy, resin_budget,
+    config, ...).
+    """
+    completed = start
+    stats = RunningStats()
+    saved = checkpoint.load() if checkpoint is not None else None
+    if saved:
+        completed, stats = saved["completed"], saved["stats"]
+
+    def snapshot():
+        return {"completed": completed, "stats": stats, "rng": random.getstate()}
+
+    for trial in range(completed, trials):
+        random.seed(trial_seed(seed, trial))
+        with memory.trial(trial):
+            values = trial_fn(trial)
+        stats.add(values)
+        completed = trial + 1
+        if checkpoint is not None:
+            checkpoint.maybe_save(snapshot)
+
+    if checkpoint is not None:
+        checkpoint.save(snapshot())
+    if store is not None:
+        _store_run(store, stats, trials - start, seed, run)
+    return stats
+
+
+def _store_run(store, stats, trials, seed, run):
+    store.add_run("montecarlo", stats.summary(), **{"trials": trials, "seed": seed, **(run or {})})
+    store.flush()
+
+
+def ranking_confidence(stats, keys, paired=False):
+    """
+    Rank `keys` by mean (best first) and return (ranking, p_correct), where
+    p_correct is a normal-approximation lower bound on P(the best key really
+    has the highest mean): 1 - sum over rivals of P(rival beats best).
+
+    With paired=True the trials also recorded the differences "a - b" (see
+    simulation.crn.paired_trial) and their stderr is used instead of
+    treating the keys as independent samples. A pair with no recorded
+    difference falls back to the independent (unpaired) stderr.
+    """
+    ranking = sorted(keys, key=lambda k: stats.mean.get(k, 0.0), reverse=True)
+    best = ranking[0]
+    p_wrong = 0.0
+    for k in ranking[1:]:
+        diff = stats.mean[best] - stats.mean[k]
+        pair = next((p for p in (f"{best} - {k}", f"{k} - {best}") if p in stats.n), None) if paired else None
+        if pair is not None:
+            se = stats.stderr(pair)
+        else:
+            se = math.hypot(stats.stderr(best), stats.stderr(k))
+        if se > 0:
+            p_wrong += 1 - NormalDist().cdf(diff / se)
+        elif diff <= 0:
+            p_wrong += 0.5  # exact tie
+    return ranking, max(0.0, 1.0 - p_wrong)
+
+
+def run_adaptive(
+        trial_fn,
+        keys=None,
+        seed=0,
+        batch_size=200,
+        min_trials=200,
+        max_trials=20_000,
+        confidence=0.95,
+        ci_width=None,
+        rel_ci_width=None,
+        p_correct=None,
+        paired=False,
+        checkpoint=None,
+        store=None,
+        run=None
+):
+    """
+    Sequential Monte Carlo: run `trial_fn(trial_index) -> {name: float}` in
+    batches of `batch_size` until every targeted criterion holds:
+
+    - ci_width:     full `confidence` interval width of each key's mean <= ci_width
+    - rel_ci_width: the same width relative to |mean| (e.g. 0.02 for ±1%)
+    - p_correct:    ranking_confidence(...) of `keys` >= p_correct
+
+    `keys` are the strategies being compared (default: every key a trial
+    returns). With no target given, p_correct=0.95 is used; `paired` is passed
+    to ranking_confidence. Trials are seeded
+    exactly like run_trials, so the first N trials match a fixed-N run, and
+    `checkpoint`, `store` and `run` work the same way.
+
+    Returns {"stats", "trials", "stopped": "converged"/"max_trials",
+             "half_widths", "ranking", "p_correct"}.
+    """
+    if ci_width is None and rel_ci_width is None and p_correct is None:
+        p_correct = 0.95
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    completed = 0
+    stats = RunningStats()
+    saved = checkpoint.load() if checkpoint is not None else None
+    if saved:
+        completed, stats = saved["completed"], saved["stats"]
+
+    def snapshot():
+        return {"completed": completed, "stats": stats, "rng": random.getstate()}
+
+    def check():
+        names = keys or list(stats.mean)
+        half = {k: z * stats.stderr(k) for k in names}
+        ranking, p = ranking_confidence(stats, names, paired) if len(names) > 1 else (names, 1.0)
+        ok = completed >= min_trials
+        if ci_width is not None:
+            ok = ok and all(2 * h <= ci_width for h in half.values())
+        if rel_ci_width is not None:
+            ok = ok and all(2 * half[k] <= rel_ci_width * abs(stats.mean[k]) for k in names)
+        if p_correct is not None:
+            ok = ok and p >= p_correct
+        return ok, half, ranking, p
+
+    while True:
+        converged, half, ranking, p = check() if completed else (False, {}, [], 0.0)
+        if converged or completed >= max_trials:
+            break
+        stop = min(completed + batch_size, max_trials)
+        for trial in range(completed, stop):
+            random.seed(trial_seed(seed, trial))
+            with memory.trial(trial):
+                values = trial_fn(trial)
+            stats.add(values)
+            completed = trial + 1
+            if checkpoint is not None:
+                checkpoint.maybe_save(snapshot)
+
+    if checkpoint is not None:
+        checkpoint.save(snapshot())
+    if store is not None:
+        _store_run(store, stats, completed, seed, run)
+    return {
+        "stats": stats,
+        "trials": completed,
+        "stopped": "converged" if converged else "max_trials",
+        "half_widths": half,
+        "ranking": ranking,
+        "p_correct": p,
+    }
+
+
+def artifact_vs_talent_trial(character_factory, multipliers, resin_budget=300, domain_level=4):
+    """
+    Trial function for run_trials/run_adaptive: one compare_artifact_vs_talent_strategy
+    run as {"artifact": artifact_delta, "talent": talent_delta}.
+    """
+    from simulation.simulator import compare_artifact_vs_talent_strategy
+
+    if memory.is_enabled():
+        memory.watch("multipliers", multipliers)
+
+    def trial(_):
+        # the comparison prints a full report per call
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            summary = compare_artifact_vs_talent_strategy(
+                character_factory, multipliers, resin_budget=resin_budget, domain_level=domain_level
+            )
+        return {"artifact": summary["artifact_delta"], "talent": summary["talent_delta"]}
+
+    return trial
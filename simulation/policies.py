@@ -1,5 +1,9 @@
 # policies.py
 class ResinPolicy:
+    def __init__(self, multipliers=None):
+        # simulate_with_policy reads the talent table from the policy
+        self.multipliers = multipliers
+
     def choose_activity(self, character):
         raise NotImplementedError
 
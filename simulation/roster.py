@@ -0,0 +1,267 @@
+# simulation/roster.py
+"""
+Roster-wide sweep: one analysis over every character at once.
+
+Every character in genshin_characters_v1.csv with a talent multiplier table
+and a default combo in character_defaults.csv (any character with a table,
+when a combo is given) is analysed on a process pool. The read-only Datasets
+tables are loaded once in the parent; forked workers inherit them, and other
+start methods load them once per worker. A character whose data is missing or
+whose analysis raises is kept as a "skipped" row with the reason, so one bad
+entry never fails the sweep.
+
+Analyses:
+    damage              expected combo damage at the given talent levels (default 10/10/10)
+    talent_curve        damage with all talents at 1..max_level (one row per level)
+    artifact_vs_talent  compare_artifact_vs_talent_strategy for a resin budget,
+                        seeded per character, from the given talent levels
+                        (default 1/1/1: at 10 there are no books left to use)
+
+All rows go to one pandas DataFrame (one column per field), written as
+.csv or .parquet by extension.
+
+    python -m simulation.roster talent_curve -o roster.parquet -w 8
+    python -m simulation.roster artifact_vs_talent --resin-budget 600 --seed 1 --store
+
+With a store (simulation.store.ResultStore) every analysed character is also
+recorded as one run; talent_curve damages are stored as damage_level_<n>.
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from core.datasets import Datasets, DATA_DIR
+
+ANALYSES = ("damage", "talent_curve", "artifact_vs_talent")
+TALENTS = ("AA", "Skill", "Burst")
+LOW_LEVELS = {"aa": 1, "skill": 1, "burst": 1}
+
+_DATASETS = None  # per-process tables; inherited from the parent when forked
+
+
+def _init_worker(data_dir):
+    global _DATASETS
+    if _DATASETS is None or _DATASETS.data_dir != data_dir:
+        _DATASETS = Datasets(data_dir)
+
+
+# ── roster ──
+def roster(datasets, characters=None, combo=None):
+    """
+    ([names to analyse], {name: skip reason}) in CSV order. Without a
+    `combo`, characters need their own default combo.
+    """
+    names = list(characters) if characters else list(datasets.character_rows)
+    eligible, skipped = [], {}
+    for name in names:
+        if name not in datasets.character_rows:
+            skipped[name] = "not in genshin_characters_v1.csv"
+        elif name not in datasets.multipliers:
+            skipped[name] = "no talent multipliers"
+        elif not combo and name not in datasets.default_combos:
+            skipped[name] = "no default combo in character_defaults.csv"
+        else:
+            eligible.append(name)
+    return eligible, skipped
+
+
+def _max_levels(multipliers, name):
+    table = multipliers[name]
+    return {t: max(table[t]) if table.get(t) else 0 for t in TALENTS}
+
+
+def _build(name, datasets, options, levels=None):
+    levels = levels or options.get("levels") or {}
+    char = datasets.make_character(
+        name,
+        weapon_name=options.get("weapon"),
+        aa_level=levels.get("aa", 10),
+        skill_level=levels.get("skill", 10),
+        burst_level=levels.get("burst", 10),
+        combo=options.get("combo"),
+    )
+    available = _max_levels(datasets.multipliers, name)
+    for talent, attr in zip(TALENTS, ("aa_level", "skill_level", "burst_level")):
+        if getattr(char, attr) not in datasets.multipliers[name].get(talent, {}):
+            raise ValueError(f"{talent} level {getattr(char, attr)} not in multipliers "
+                             f"(1..{available[talent]})")
+    return char
+
+
+def _damage(char, multipliers, stats=None):
+    return char.expected_damage_output(combo=char.default_combo, multipliers=multipliers, stats=stats,
+                                       enemy_level=100, enemy_resistance=0.1)
+
+
+# ── analyses ──
+def analyse_damage(name, datasets, options):
+    char = _build(name, datasets, options)
+    return [{"combo": char.default_combo, "damage": _damage(char, datasets.multipliers)}]
+
+
+def analyse_talent_curve(name, datasets, options):
+    char = _build(name, datasets, options, levels=LOW_LEVELS)
+    multipliers = datasets.multipliers
+    available = _max_levels(multipliers, name)
+    stats = char.compute_total_stats()  # talent levels do not change the totals
+    rows = []
+    for level in range(1, int(options.get("max_level", 10)) + 1):
+        char.aa_level = min(level, available["AA"])
+        char.skill_level = min(level, available["Skill"])
+        char.burst_level = min(level, available["Burst"])
+        rows.append({"combo": char.default_combo, "level": level, "damage": _damage(char, multipliers, stats)})
+    return rows
+
+
+def analyse_artifact_vs_talent(name, datasets, options):
+    from simulation.simulator import compare_artifact_vs_talent_strategy
+
+    # seeded by name, so a character's result does not depend on the worker or the roster
+    random.seed(f"{options.get('seed', 0)}:{name}")
+    summary = compare_artifact_vs_talent_strategy(
+        character_factory=lambda: _build(name, datasets, options, levels=options.get("levels") or LOW_LEVELS),
+        multipliers=datasets.multipliers,
+        resin_budget=int(options.get("resin_budget", 300)),
+        domain_level=int(options.get("domain_level", 4)),
+    )
+    return [{
+        "artifact_delta": summary["artifact_delta"],
+        "talent_delta": summary["talent_delta"],
+        "winner": "artifact" if summary["artifact_delta"] > summary["talent_delta"] else "talent",
+    }]
+
+
+ANALYSIS_FUNCS = {
+    "damage": analyse_damage,
+    "talent_curve": analyse_talent_curve,
+    "artifact_vs_talent": analyse_artifact_vs_talent,
+}
+
+
+def _run_character(name, analysis, options):
+    row = _DATASETS.character_rows[name]
+    head = {"character": name, "vision": row["vision"], "weapon_type": row["weapon_type"]}
+    start = time.perf_counter()
+    # simulators print progress/debug lines; keep them out of the output
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            rows = ANALYSIS_FUNCS[analysis](name, _DATASETS, options)
+        except Exception as e:
+            return [dict(head, status="skipped", reason=f"{type(e).__name__}: {e}")]
+    elapsed = time.perf_counter() - start
+    return [dict(head, status="ok", reason=None, **r, elapsed_s=elapsed) for r in rows]
+
+
+# ── driver ──
+def store_roster(store, df, analysis, options, data_dir=DATA_DIR):
+    """Record every analysed character of a roster table as one run."""
+    ok = df[df["status"] == "ok"]
+    numeric = [c for c in ok.select_dtypes("number").columns if c not in ("level", "elapsed_s")]
+    for name, rows in ok.groupby("character", sort=False):
+        results = {}
+        for _, row in rows.iterrows():
+            suffix = f"_level_{row['level']}" if "level" in row else ""
+            results.update({f"{c}{suffix}": row[c] for c in numeric if not pd.isna(row[c])})
+        store.add_run(
+            "roster", results, config={"analysis": analysis, **options}, data_dir=data_dir,
+            name=analysis, character=name, policy=analysis, metric="damage",
+            resin_budget=options.get("resin_budget") if analysis == "artifact_vs_talent" else None,
+            trials=1, seed=options.get("seed"),
+        )
+    store.flush()
+
+
+def run_roster(analysis="damage", workers=None, data_dir=DATA_DIR, characters=None, store=None, **options):
+    """
+    Run `analysis` for the whole roster (or `characters`) and return one
+    DataFrame. `options`: levels, weapon, combo, max_level, resin_budget,
+    domain_level, seed. With a simulation.store.ResultStore `store` the
+    results are also recorded there.
+    """
+    if analysis not in ANALYSES:
+        raise ValueError(f"Unknown analysis {analysis!r}; expected one of {ANALYSES}")
+    _init_worker(data_dir)
+    eligible, skipped = roster(_DATASETS, characters, options.get("combo"))
+
+    if workers == 1 or len(eligible) <= 1:
+        results = [_run_character(name, analysis, options) for name in eligible]
+    else:
+        workers = min(workers or os.cpu_count() or 1, len(eligible))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data_dir,)) as pool:
+            results = list(pool.map(_run_character, eligible, [analysis] * len(eligible),
+                                    [options] * len(eligible)))
+
+    rows = [r for rs in results for r in rs]
+    for name, reason in skipped.items():
+        row = _DATASETS.character_rows.get(name, {})
+        rows.append({"character": name, "vision": row.get("vision"), "weapon_type": row.get("weapon_type"),
+                     "status": "skipped", "reason": reason})
+    order = {name: i for i, name in enumerate(characters or _DATASETS.character_rows)}
+    rows.sort(key=lambda r: order.get(r["character"], len(order)))
+    df = pd.DataFrame(rows)
+    if "level" in df:
+        df["level"] = df["level"].astype("Int64")  # skipped rows would make it float
+    if store is not None:
+        store_roster(store, df, analysis, options, data_dir)
+    return df
+
+
+def write_table(df, path):
+    """Write the roster table; .parquet needs pyarrow (or fastparquet), anything else is CSV."""
+    if path.endswith(".parquet"):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run one GIROS analysis over the whole character roster.")
+    parser.add_argument("analysis", choices=ANALYSES)
+    parser.add_argument("-o", "--output", help=".csv or .parquet file (default: CSV on stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--characters", nargs="*", help="only these characters")
+    parser.add_argument("--levels", type=int, nargs=3, metavar=("AA", "SKILL", "BURST"),
+                        help="talent levels (default: 10 10 10; 1 1 1 for artifact_vs_talent)")
+    parser.add_argument("--weapon", help="weapon for every character (name substring)")
+    parser.add_argument("--combo", help="combo for every character (default: each one's default combo)")
+    parser.add_argument("--max-level", type=int, default=10, help="talent_curve: highest level")
+    parser.add_argument("--resin-budget", type=int, default=300)
+    parser.add_argument("--domain-level", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--store", nargs="?", const="", default=None, metavar="PATH",
+                        help="record results in the SQLite run store (default: .giros_runs.sqlite)")
+    args = parser.parse_args(argv)
+
+    store = None
+    if args.store is not None:
+        from simulation.store import ResultStore, STORE_PATH
+        store = ResultStore(args.store or STORE_PATH)
+
+    start = time.perf_counter()
+    df = run_roster(
+        args.analysis, workers=args.workers, data_dir=args.data_dir, characters=args.characters,
+        levels=dict(zip(("aa", "skill", "burst"), args.levels)) if args.levels else None,
+        weapon=args.weapon, combo=args.combo,
+        max_level=args.max_level, resin_budget=args.resin_budget, domain_level=args.domain_level,
+        seed=args.seed, store=store,
+    )
+    if store is not None:
+        store.close()
+    if args.output:
+        write_table(df, args.output)
+    else:
+        df.to_csv(sys.stdout, index=False)
+    ok = (df["status"] == "ok").groupby(df["character"]).any()
+    print(f"{int(ok.sum())} characters analysed, {int((~ok).sum())} skipped in "
+          f"{time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
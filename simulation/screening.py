@@ -0,0 +1,237 @@
+# simulation/screening.py
+"""
+Cheap pre-screening of artifact drops.
+
+Most drops are rejected, yet the exhaustive path pays a deepcopy and a full
+metric evaluation to find that out. DropScreen first computes an upper bound
+on metric_after / metric_before from the linear stat totals alone. Swapping
+one piece only changes those totals, and the metrics are sums of products of
+positive factors:
+
+    damage hit  = base stat × (1 + CR·CD) × (1 + DMG bonus) × constants
+    heal        = (HP × Σ Heal% + Σ HealFlat) × (1 + healing bonus) × ticks
+
+So every hit grows by at most max(ATK ratio, HP ratio) × crit ratio ×
+bonus ratio. The bonus ratio is taken at the smallest bonus any hit can have,
+because talent, Burst and salon buffs only add. HP→ATK modifiers (Hu Tao's
+E) are folded into the ATK ratio, reaction-tagged hits add the EM ratio of
+the amplifying factor, and the heal ratio is exact. When the
+bound is below 1 the drop cannot be accepted (acceptance needs after >
+before), so it is rejected without the full evaluation. A small margin
+absorbs float rounding, so accept/reject decisions are identical to the
+exhaustive path. The runners also take the "before" metric from
+metric_before, which reuses it until the build changes.
+
+    screen = DropScreen(multipliers, metric="damage")
+    simulate_with_policy(char, 600, MinMaxerPolicy(multipliers), screen=screen)
+    screen.stats()   # {"drops", "screened_out", "hit_rate", ...}
+"""
+import copy
+
+from core.character_buffs import combo_modifiers, furina_salon_bonus
+from core.reactions import em_bonus
+from core.summons import FURINA_SUMMONS
+from core.talents import compute_combo_hits
+from simulation.cache import character_fingerprint
+
+MARGIN = 1e-9
+SCREEN_METRICS = ("damage", "heal")
+
+
+def artifact_stats(artifact):
+    """An artifact's contribution to the totals, parsed as compute_total_stats does."""
+    out = {"hp": 0.0, "atk": 0.0, "flat_hp": 0.0, "flat_atk": 0.0, "crit_rate": 0.0, "crit_dmg": 0.0,
+           "em": 0.0, "healing_bonus": 0.0, "elemental": {}}
+    if not artifact:
+        return out
+    stat, val = artifact["main_stat"], artifact["main_stat_value"]
+    if stat == "Healing Bonus%":
+        out["healing_bonus"] += val / 100
+    elif stat.endswith("DMG Bonus"):
+        element = stat.replace(" DMG Bonus", "")
+        out["elemental"][element] = out["elemental"].get(element, 0.0) + val / 100
+    else:
+        _add_common(out, stat, val)
+    for sub, val in artifact["substats"].items():
+        _add_common(out, sub, val)
+    return out
+
+
+def _add_common(out, stat, val):
+    if stat == "HP%":
+        out["hp"] += val / 100
+    elif stat == "Flat HP":
+        out["flat_hp"] += val
+    elif stat == "ATK%":
+        out["atk"] += val / 100
+    elif stat == "Flat ATK":
+        out["flat_atk"] += val
+    elif stat == "CRIT Rate%":
+        out["crit_rate"] += val / 100
+    elif stat == "CRIT DMG%":
+        out["crit_dmg"] += val / 100
+    elif stat == "Elemental Mastery":
+        out["em"] += val
+
+
+class DropScreen:
+    """Upper-bound screen for the "damage" or "heal" metric (see module docstring)."""
+
+    def __init__(self, multipliers, metric="damage", combo=None, heal_skill="Burst", margin=MARGIN):
+        if metric not in SCREEN_METRICS:
+            raise ValueError(f"Unknown screen metric {metric!r}; expected one of {SCREEN_METRICS}")
+        self.multipliers = multipliers
+        self.metric = metric
+        self.combo = combo
+        self.heal_skill = heal_skill
+        self.margin = margin
+        self._profiles = {}
+        self._before = None
+        self.drops = 0
+        self.screened_out = 0
+        self.full_accepts = 0
+        self.full_rejects = 0
+
+    # ── combo profile ──
+    def profile(self, character):
+        """(scalings, elements, hp_to_atk, furina_summons, reacts) the metric's hits use."""
+        combo = self.combo if self.combo is not None else character.default_combo
+        key = (character.name, character.vision, combo, character.aa_level, character.burst_level,
+               character.skill_level)
+        prof = self._profiles.get(key)
+        if prof is None:
+            prof = self._profiles[key] = self._build_profile(character, combo)
+        return prof
+
+    def _build_profile(self, character, combo):
+        # mirrors the E handling in Character.expected_damage_output
+        original = combo
+        active, combo = combo_modifiers(character, combo, self.multipliers)
+        hp_to_atk = sum(coef for m, coef in active if m.source == "total_hp" and m.target == "flat_atk")
+        scalings, elements, reacts = set(), set(), False
+        summons = character.name == "Furina" and "E" in original
+        if summons:
+            table = self.multipliers[character.name]["Skill"][character.skill_level]
+            for hit_key, _, _ in FURINA_SUMMONS:
+                scalings.add("HP" if table.get(hit_key, {}).get("scaling") == "HP" else "ATK")
+            elements.add("Hydro")
+            combo = combo.replace("E", "", 1)
+        for _, scaling, reaction in compute_combo_hits(self.multipliers, character, combo, with_reactions=True):
+            if scaling == "BUFF":
+                continue
+            reacts = reacts or reaction is not None
+            scalings.add("HP" if scaling == "HP" else "ATK")
+            elements.add(character.vision if scaling != "Physical" else "Physical")
+        return frozenset(scalings), frozenset(elements), hp_to_atk, summons, reacts
+
+    # ── bounds ──
+    def bound(self, character, slot, new_artifact):
+        """Upper bound on metric(after) / metric(before) for equipping `new_artifact` in `slot`."""
+        try:
+            stats = character.compute_total_stats()
+            old = artifact_stats(character.artifacts.get(slot))
+            new = artifact_stats(new_artifact)
+            if self.metric == "heal":
+                return self._heal_bound(character, stats, old, new)
+            return self._damage_bound(character, stats, old, new)
+        except Exception:
+            # anything unusual goes to the full evaluation, which raises as before
+            return float("inf")
+
+    @staticmethod
+    def _totals(stats, old, new):
+        pct, flat = stats["percent_bonus"], stats["flat_bonus"]
+        hp = stats["base_hp"] * (1 + pct["hp"]) + flat["hp"]
+        hp2 = stats["base_hp"] * (1 + pct["hp"] - old["hp"] + new["hp"]) + flat["hp"] - old["flat_hp"] + new["flat_hp"]
+        atk = stats["base_atk"] * (1 + pct["atk"]) + flat["atk"]
+        atk2 = stats["base_atk"] * (1 + pct["atk"] - old["atk"] + new["atk"]) + flat["atk"] - old["flat_atk"] + new["flat_atk"]
+        return hp, hp2, atk, atk2
+
+    def _damage_bound(self, character, stats, old, new):
+        scalings, elements, hp_to_atk, summons, reacts = self.profile(character)
+        if not scalings:
+            return 0.0  # no damaging hits: 0 > 0 never accepts
+
+        hp, hp2, atk, atk2 = self._totals(stats, old, new)
+        if hp_to_atk:
+            atk, atk2 = atk + hp_to_atk * hp, atk2 + hp_to_atk * hp2
+        if hp <= 0 or atk <= 0:
+            return float("inf")
+        r_base = max((atk2 / atk) if "ATK" in scalings else 0.0, (hp2 / hp) if "HP" in scalings else 0.0)
+
+        cr, cd = stats["crit_rate"], stats["crit_dmg"]
+        cr2 = cr - old["crit_rate"] + new["crit_rate"]
+        cd2 = cd - old["crit_dmg"] + new["crit_dmg"]
+        r_crit = (1 + cr2 * cd2) / (1 + cr * cd)
+
+        r_bonus = 1.0
+        base_bonus = stats["elemental_dmg_bonus"]
+        for element in elements:
+            if element not in base_bonus:
+                continue
+            delta = new["elemental"].get(element, 0.0) - old["elemental"].get(element, 0.0)
+            if summons and element == "Hydro":
+                delta += max(0.0, furina_salon_bonus(hp2) - furina_salon_bonus(hp))
+            if delta > 0:
+                r_bonus = max(r_bonus, (1 + base_bonus[element] + delta) / (1 + base_bonus[element]))
+
+        # a reacted hit scales with 1 + em_bonus(EM); plain hits do not
+        r_em = 1.0
+        if reacts:
+            em = stats["elemental_mastery"]
+            r_em = max(1.0, (1 + em_bonus(em - old["em"] + new["em"])) / (1 + em_bonus(em)))
+        return r_base * r_crit * r_bonus * r_em
+
+    def _heal_bound(self, character, stats, old, new):
+        # same entries HealEffect sums (see heal_metric in simulation/batch.py)
+        level = getattr(character, f"{self.heal_skill.lower()}_level", character.burst_level)
+        entries = self.multipliers[character.name][self.heal_skill][level]
+        pct = sum(e["value"] / 100 for k, e in entries.items() if "Heal%" in k)
+        flat = sum(e["value"] for k, e in entries.items() if "HealFlat" in k)
+        hp, hp2, _, _ = self._totals(stats, old, new)
+        raw = hp * pct + flat
+        if raw <= 0:
+            return float("inf")
+        hb = stats["healing_bonus"]
+        hb2 = hb - old["healing_bonus"] + new["healing_bonus"]
+        return (hp2 * pct + flat) / raw * (1 + hb2) / (1 + hb)
+
+    # ── baseline ──
+    def metric_before(self, character, key, evaluate):
+        """
+        evaluate() for `character`'s current build, reused while the build
+        and `key` (the metric it belongs to) are unchanged. Rejected drops
+        leave the build as it was, so a run of them costs one evaluation.
+        """
+        build = character_fingerprint(character)
+        del build["books"]
+        if self._before is None or self._before[0] != key or self._before[1] != build:
+            self._before = (key, copy.deepcopy(build), evaluate())
+        return self._before[2]
+
+    # ── decisions ──
+    def rejects(self, character, slot, new_artifact):
+        """True when `new_artifact` provably cannot improve the metric."""
+        self.drops += 1
+        if self.bound(character, slot, new_artifact) < 1.0 - self.margin:
+            self.screened_out += 1
+            return True
+        return False
+
+    def record(self, accepted):
+        """Outcome of a drop that went through the full evaluation."""
+        if accepted:
+            self.full_accepts += 1
+        else:
+            self.full_rejects += 1
+
+    def stats(self):
+        rejected = self.screened_out + self.full_rejects
+        return {
+            "drops": self.drops,
+            "screened_out": self.screened_out,
+            "full_accepts": self.full_accepts,
+            "full_rejects": self.full_rejects,
+            "hit_rate": self.screened_out / self.drops if self.drops else 0.0,
+            "rejects_screened": self.screened_out / rejected if rejected else 0.0,
+        }
@@ -0,0 +1,290 @@
+# simulation/search.py
+"""
+Parameter search for simulate_with_metric policies.
+
+    python -m simulation.search scenarios.jsonl --space space.json --method halving -w 4 --cache
+
+Scenarios are batch scenarios (see simulation/batch.py: character, weapon,
+artifacts, levels, combo, metric, resin_budget, domain_level, seed, trials).
+The space maps simulate_with_metric arguments to candidate values:
+
+    {"policy": ["threshold_then_switch"],
+     "threshold": [25, 50, 100, 200], "primary": ["artifact", "talent"]}
+
+With method "random", a [lo, hi] pair of numbers is sampled uniformly, and
+any other list is sampled as a choice. Dicts (e.g. threshold_stats) are single
+values, so list several dicts to search over them.
+
+Every candidate is scored by its mean metric gain over the same trials:
+trial t runs on simulation.crn.DropStreams(seed, t) for every candidate, so
+candidates see identical drops and their differences are paired. Work is
+split into (candidate, block) chunks of BLOCK_TRIALS trials (trials
+k·BLOCK_TRIALS up to the next multiple), each run with
+simulation.montecarlo.run_trials on a process pool and stored in the result
+cache when one is given. Re-running a search, or extending it to more
+trials (including halving's next rung), only computes the blocks that are
+not cached yet; a trailing partial block is recomputed once it grows.
+
+    grid / random   every candidate gets `trials` trials
+    halving         successive halving: all candidates start with
+                    `min_trials`, the best 1/eta advance to eta× the trials,
+                    until one is left or `trials` is reached
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import math
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from core.datasets import Datasets, DATA_DIR
+from simulation.batch import build_character, read_scenarios, scenario_config, scenario_metric
+from simulation.crn import DropStreams, policy_strategies
+from simulation.montecarlo import RunningStats, run_trials
+
+BLOCK_TRIALS = 20   # trials per cached chunk
+
+_DATASETS = None  # per-process tables, filled by _init_worker
+
+
+# ── Candidates ──────────────────────────────────────────────────────────────
+def grid(space):
+    """Every combination of the space's values, in a stable order."""
+    keys = sorted(space)
+    for values in itertools.product(*(space[k] for k in keys)):
+        yield dict(zip(keys, values))
+
+
+def sample(space, n, seed=0):
+    """`n` distinct random candidates; [lo, hi] number pairs are sampled uniformly."""
+    rng = random.Random(seed)
+    seen, out = set(), []
+    for _ in range(n * 20):
+        if len(out) == n:
+            break
+        params = {}
+        for k in sorted(space):
+            values = space[k]
+            if len(values) == 2 and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+                lo, hi = values
+                params[k] = rng.randint(lo, hi) if isinstance(lo, int) and isinstance(hi, int) else rng.uniform(lo, hi)
+            else:
+                params[k] = rng.choice(values)
+        key = json.dumps(params, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            out.append(params)
+    return out
+
+
+# ── Evaluation ──────────────────────────────────────────────────────────────
+def blocks(start, stop, size=BLOCK_TRIALS):
+    """[start, stop) cut at multiples of `size`, so chunks line up across runs."""
+    out = []
+    while start < stop:
+        end = min(stop, (start // size + 1) * size)
+        out.append((start, end))
+        start = end
+    return out
+
+
+def evaluate_chunk(scenario, params, start, stop, datasets):
+    """RunningStats of policy `params`'s metric gain over trials [start, stop) of `scenario`."""
+    multipliers = datasets.multipliers
+    seed = int(scenario.get("seed", 0))
+    run = policy_strategies(
+        lambda: build_character(scenario, datasets),
+        multipliers,
+        scenario_metric(scenario, datasets),
+        {"candidate": params},
+        resin_budget=int(scenario.get("resin_budget", 300)),
+        domain_level=int(scenario.get("domain_level", 4)),
+    )["candidate"]
+    return run_trials(lambda t: {"gain": run(DropStreams(seed, t))}, stop, seed=seed, start=start)
+
+
+def _init_worker(data_dir):
+    global _DATASETS
+    _DATASETS = Datasets(data_dir)
+
+
+def _run_chunk(scenario, params, start, stop):
+    # simulators print debug lines; keep worker output quiet
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            return evaluate_chunk(scenario, params, start, stop, _DATASETS)
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+
+
+class _Evaluator:
+    """Runs chunks on a pool (or inline with workers=1), going through the cache."""
+
+    def __init__(self, workers, data_dir, cache):
+        self.cache = cache
+        self.data = None
+        self.pool = None
+        if cache is not None:
+            from simulation.cache import data_hash
+            self.data = data_hash(data_dir)
+        if workers == 1:
+            _init_worker(data_dir)
+        else:
+            self.pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                            initializer=_init_worker, initargs=(data_dir,))
+
+    def run(self, jobs):
+        """jobs: [(scenario, params, start, stop)] → list of RunningStats (or error dicts)."""
+        results = [None] * len(jobs)
+        keys = {}
+        todo = []
+        for i, job in enumerate(jobs):
+            if self.cache is not None:
+                scenario, params, start, stop = job
+                keys[i] = self.cache.key({"fn": "search_chunk", "scenario": scenario_config(scenario),
+                                          "params": params, "start": start, "stop": stop}, self.data)
+                hit = self.cache.get(keys[i])
+                if hit is not None:
+                    results[i] = hit
+                    continue
+            todo.append(i)
+
+        if self.pool is None:
+            done = [_run_chunk(*jobs[i]) for i in todo]
+        else:
+            done = list(self.pool.map(_run_chunk, *zip(*(jobs[i] for i in todo)))) if todo else []
+        for i, block in zip(todo, done):
+            results[i] = block
+            if self.cache is not None and not isinstance(block, dict):
+                self.cache.put(keys[i], block)
+        return results
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+def _leaderboard(candidates, stats):
+    rows = []
+    for i, params in enumerate(candidates):
+        s = stats[i]
+        if s is None:
+            continue
+        rows.append({"params": params, "trials": s.n.get("gain", 0),
+                     "mean": s.mean.get("gain", 0.0), "stderr": s.stderr("gain")})
+    rows.sort(key=lambda r: r["mean"], reverse=True)
+    return rows
+
+
+def search_scenario(scenario, candidates, evaluator, method="halving", trials=200, min_trials=20, eta=3):
+    """Score `candidates` on one scenario; returns the leaderboard (best first) and errors."""
+    stats = [RunningStats() for _ in candidates]
+    errors = {}
+    done = [0] * len(candidates)
+    alive = list(range(len(candidates)))
+
+    def advance(indices, target):
+        jobs, owners = [], []
+        for i in indices:
+            for start, stop in blocks(done[i], target):
+                jobs.append((scenario, candidates[i], start, stop))
+                owners.append(i)
+        for i, block in zip(owners, evaluator.run(jobs)):
+            if stats[i] is None:
+                continue
+            if isinstance(block, dict):
+                errors[i] = block["error"]
+                stats[i] = None
+                continue
+            stats[i].merge(block)
+        for i in indices:
+            done[i] = max(done[i], target)
+
+    if method == "halving":
+        budget = min(min_trials, trials)
+        while True:
+            advance(alive, budget)
+            alive = [i for i in alive if stats[i] is not None]
+            if len(alive) <= 1 or budget >= trials:
+                break
+            alive.sort(key=lambda i: stats[i].mean["gain"], reverse=True)
+            alive = alive[:max(1, math.ceil(len(alive) / eta))]
+            budget = min(trials, budget * eta)
+    else:
+        advance(alive, trials)
+
+    board = _leaderboard(candidates, stats)
+    # pruned candidates have fewer trials; rank survivors (most trials) first
+    board.sort(key=lambda r: (r["trials"], r["mean"]), reverse=True)
+    return board, {json.dumps(candidates[i], sort_keys=True): e for i, e in errors.items()}
+
+
+def search(scenarios, space, method="halving", n_random=50, trials=200, min_trials=20, eta=3,
+           workers=None, data_dir=DATA_DIR, cache=None, top=5):
+    """
+    Yield one summary per scenario: {"scenario", "character", "resin_budget",
+    "best", "leaderboard", "errors"}. See the module docstring for methods.
+    """
+    if method == "random":
+        candidates = sample(space, n_random, seed=0)
+    elif method in ("grid", "halving"):
+        candidates = list(grid(space))
+    else:
+        raise ValueError(f"Unknown search method {method!r}")
+
+    evaluator = _Evaluator(workers, data_dir, cache)
+    try:
+        for scenario in scenarios:
+            board, errors = search_scenario(scenario, candidates, evaluator, method=method,
+                                            trials=trials, min_trials=min_trials, eta=eta)
+            yield {
+                "scenario": scenario.get("id"),
+                "character": scenario["character"],
+                "resin_budget": int(scenario.get("resin_budget", 300)),
+                "best": board[0] if board else None,
+                "leaderboard": board[:top],
+                "errors": errors,
+            }
+    finally:
+        evaluator.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search simulate_with_metric policy parameters.")
+    parser.add_argument("scenarios", help="JSONL batch scenarios (character, budget, metric, seed, ...)")
+    parser.add_argument("--space", required=True, help="JSON file or inline JSON mapping parameter -> values")
+    parser.add_argument("--method", choices=("grid", "random", "halving"), default="halving")
+    parser.add_argument("--n-random", type=int, default=50, help="candidates for --method random")
+    parser.add_argument("--trials", type=int, default=200, help="trials per candidate (max for halving)")
+    parser.add_argument("--min-trials", type=int, default=20, help="first-rung trials for halving")
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--cache", nargs="?", const="", default=None, metavar="DIR")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.space):
+        with open(args.space, encoding='utf-8') as f:
+            space = json.load(f)
+    else:
+        space = json.loads(args.space)
+
+    cache = None
+    if args.cache is not None:
+        from simulation.cache import ResultCache, CACHE_DIR
+        cache = ResultCache(args.cache or CACHE_DIR)
+
+    for summary in search(read_scenarios(args.scenarios), space, method=args.method, n_random=args.n_random,
+                          trials=args.trials, min_trials=args.min_trials, eta=args.eta,
+                          workers=args.workers, data_dir=args.data_dir, cache=cache, top=args.top):
+        print(json.dumps(summary), flush=True)
+    if cache is not None:
+        print(f"cache: {cache.hits} hits, {cache.misses} misses", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+# simulation/service.py
+"""
+Local evaluation service: damage, heal and upgrade-probability queries over
+HTTP/JSON, stdlib only.
+
+    python -m simulation.service --port 8765
+
+    POST /damage               {"character": "Hu Tao", "weapon": "Homa", "artifacts": {...},
+                                "levels": {"aa": 10, "skill": 10, "burst": 10}, "combo": "E12N1C",
+                                "enemy_level": 100, "enemy_resistance": 0.1}
+    POST /heal                 {...build..., "heal_skill": "Burst", "interval": 2.0, "duration": 12.0}
+    POST /upgrade-probability  {...build..., "slot": "Sands", "samples": 200, "seed": 0,
+                                "metric": "damage"}
+    GET  /stats                p50/p99 latency per endpoint and batch sizes
+    GET  /health
+
+Build keys are the batch scenario keys (character, weapon, artifacts, levels,
+combo, skill). Levels and skills are checked against the multiplier table,
+and a build it cannot score gets a 400. The datasets are loaded once at startup, and built
+characters stay warm in an LRU keyed by the build. Combo plans are cached in
+core.talents.compile_combo_plan.
+
+Requests that arrive within `window_ms` of each other (up to `max_batch`) are
+evaluated as one batch on a single evaluation thread: a build shared by
+several requests is looked up once, and identical queries are evaluated once.
+The event loop keeps accepting connections meanwhile.
+"""
+import argparse
+import asyncio
+import contextlib
+import copy
+import json
+import os
+import random
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from core.datasets import Datasets, DATA_DIR
+from core.summons import HealEffect
+from simulation.artifact import simulate_artifact
+from simulation.batch import METRICS, build_character
+
+BUILD_KEYS = ("character", "weapon", "artifacts", "levels", "combo", "skill")
+SLOTS = ("Flower", "Feather", "Sands", "Goblet", "Circlet")
+TALENTS = {"aa": "AA", "skill": "Skill", "burst": "Burst"}
+
+
+def _canonical(payload, keys=None):
+    if keys is not None:
+        payload = {k: payload.get(k) for k in keys}
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"))
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), -(-len(sorted_values) * q // 100)))
+    return sorted_values[int(rank) - 1]
+
+
+class LatencyRecorder:
+    """Rolling window of request latencies per endpoint."""
+
+    def __init__(self, window=10_000):
+        self.window = window
+        self.samples = {}
+        self.counts = {}
+        self.batch_sizes = deque(maxlen=window)
+
+    def add(self, endpoint, seconds):
+        self.samples.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+        self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+
+    def summary(self):
+        out = {}
+        for endpoint, values in self.samples.items():
+            ordered = sorted(values)
+            out[endpoint] = {
+                "count": self.counts[endpoint],
+                "p50_ms": percentile(ordered, 50) * 1e3,
+                "p99_ms": percentile(ordered, 99) * 1e3,
+                "mean_ms": sum(ordered) / len(ordered) * 1e3,
+            }
+        sizes = self.batch_sizes
+        return {
+            "endpoints": out,
+            "batches": {
+                "count": len(sizes),
+                "mean_size": sum(sizes) / len(sizes) if sizes else 0.0,
+                "max_size": max(sizes, default=0),
+            },
+        }
+
+
+class Evaluator:
+    """Warm datasets + character cache; evaluates one batch of same-kind queries."""
+
+    def __init__(self, datasets, max_characters=256):
+        self.datasets = datasets
+        self.max_characters = max_characters
+        self._characters = OrderedDict()
+
+    def validate(self, payload):
+        """
+        Reject builds the multiplier table cannot score: a missing level
+        would otherwise look up an empty entry and evaluate to 0.
+        """
+        name = payload["character"]
+        table = self.datasets.multipliers.get(name)
+        if not table:
+            raise ValueError(f"No talent multipliers for {name!r}")
+        levels = payload.get("levels") or {}
+        if not isinstance(levels, dict):
+            raise ValueError(f"levels must be an object, got {levels!r}")
+        for key, level in levels.items():
+            talent = TALENTS.get(key)
+            if talent is None:
+                raise ValueError(f"Unknown talent {key!r}; expected one of {tuple(TALENTS)}")
+            available = table.get(talent, {})
+            if isinstance(level, bool) or level not in available:
+                raise ValueError(f"{talent} level {level!r} not in multipliers for {name} "
+                                 f"(1..{max(available, default=0)})")
+        skill = payload.get("skill", "AA")
+        if skill not in TALENTS.values():
+            raise ValueError(f"Unknown skill {skill!r}; expected one of {tuple(TALENTS.values())}")
+
+    def character(self, payload):
+        key = _canonical(payload, BUILD_KEYS)
+        char = self._characters.get(key)
+        if char is None:
+            self.validate(payload)
+            char = build_character(payload, self.datasets)
+            self._characters[key] = char
+            if len(self._characters) > self.max_characters:
+                self._characters.popitem(last=False)
+        else:
+            self._characters.move_to_end(key)
+        return char
+
+    def damage(self, char, payload):
+        return {"damage": char.expected_damage_output(
+            combo=payload.get("combo") or char.default_combo,
+            multipliers=self.datasets.multipliers,
+            character_level=payload.get("character_level", 90),
+            enemy_level=payload.get("enemy_level", 100),
+            enemy_resistance=payload.get("enemy_resistance", 0.1),
+        )}
+
+    def heal(self, char, payload):
+        skill = payload.get("heal_skill", "Burst")
+        if skill not in ("Burst", "Skill"):
+            raise ValueError(f"Unknown heal_skill {skill!r}; expected 'Burst' or 'Skill'")
+        level = char.burst_level if skill == "Burst" else char.skill_level
+        he = HealEffect(char, self.datasets.multipliers, skill, level,
+                        interval=payload.get("interval", 2.0), duration=payload.get("duration", 12.0))
+        return {"heal": he.total_heal()}
+
+    def upgrade_probability(self, char, payload):
+        """P(a random drop for `slot` beats the equipped piece) and the mean gain when it does."""
+        slot = payload.get("slot", "Sands")
+        if slot not in SLOTS:
+            raise ValueError(f"Unknown slot {slot!r}")
+        samples = int(payload.get("samples", 200))
+        metric_fn = METRICS[payload.get("metric", "damage")](self.datasets.multipliers)
+
+        random.seed(payload.get("seed", 0))
+        base = copy.deepcopy(char)
+        before = metric_fn(base)
+        hits, gain = 0, 0.0
+        for _ in range(samples):
+            test = copy.deepcopy(char)
+            test.artifacts[slot] = simulate_artifact(slot)
+            test.sync_stats(test.compute_total_stats())
+            delta = metric_fn(test) - before
+            if delta > 0:
+                hits += 1
+                gain += delta
+        return {
+            "probability": hits / samples if samples else 0.0,
+            "mean_gain_if_upgrade": gain / hits if hits else 0.0,
+            "metric_before": before,
+            "samples": samples,
+        }
+
+    def evaluate_batch(self, kind, payloads):
+        """Results (or {"error": ...}) in request order."""
+        fn = getattr(self, kind.replace("-", "_"))
+        results = {}
+        out = []
+        # Summon.total_damage prints a debug line per summon
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for payload in payloads:
+                key = _canonical(payload)
+                if key not in results:
+                    try:
+                        results[key] = fn(self.character(payload), payload)
+                    except Exception as e:
+                        results[key] = {"error": f"{type(e).__name__}: {e}"}
+                out.append(results[key])
+        return out
+
+
+class MicroBatcher:
+    """
+    Queue per query kind. The first request of a batch opens a `window_ms`
+    window; the batch is flushed when the window closes or `max_batch`
+    requests are queued, whichever comes first.
+    """
+
+    def __init__(self, evaluator, latency, window_ms=2.0, max_batch=64):
+        self.evaluator = evaluator
+        self.latency = latency
+        self.window = window_ms / 1e3
+        self.max_batch = max_batch
+        self._pending = {}   # kind -> [(payload, future)]
+        self._timers = {}
+        # one thread: the model mutates shared characters and the global RNG
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="giros-eval")
+
+    def submit(self, kind, payload):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        queue = self._pending.setdefault(kind, [])
+        queue.append((payload, fut))
+        if len(queue) >= self.max_batch:
+            self._flush(kind)
+        elif kind not in self._timers:
+            self._timers[kind] = loop.call_later(self.window, self._flush, kind)
+        return fut
+
+    def _flush(self, kind):
+        timer = self._timers.pop(kind, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(kind, [])
+        if batch:
+            asyncio.ensure_future(self._run(kind, batch))
+
+    async def _run(self, kind, batch):
+        self.latency.batch_sizes.append(len(batch))
+        loop = asyncio.get_running_loop()
+        payloads = [p for p, _ in batch]
+        try:
+            results = await loop.run_in_executor(self._executor, self.evaluator.evaluate_batch, kind, payloads)
+        except Exception as e:
+            results = [{"error": f"{type(e).__name__}: {e}"}] * len(batch)
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+# ── HTTP ────────────────────────────────────────────────────────────────────
+QUERY_ENDPOINTS = {"/damage": "damage", "/heal": "heal", "/upgrade-probability": "upgrade-probability"}
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class EvaluationService:
+    def __init__(self, datasets=None, window_ms=2.0, max_batch=64, data_dir=DATA_DIR):
+        self.latency = LatencyRecorder()
+        self.evaluator = Evaluator(datasets or Datasets(data_dir))
+        self.batcher = MicroBatcher(self.evaluator, self.latency, window_ms=window_ms, max_batch=max_batch)
+        self._warm_up()
+
+    def _warm_up(self):
+        # compile the default combo plans before the first request
+        from core.talents import compile_combo_plan
+        for defaults in self.evaluator.datasets.default_combos.values():
+            combo = defaults.get("combo")
+            if combo:
+                compile_combo_plan(combo.replace("E", ""))
+
+    async def route(self, method, path, body):
+        if path in QUERY_ENDPOINTS:
+            if method != "POST":
+                return 405, {"error": "use POST"}
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError as e:
+                return 400, {"error": f"invalid JSON: {e}"}
+            if not isinstance(payload, dict) or "character" not in payload:
+                return 400, {"error": "body must be a JSON object with a 'character'"}
+            result = await self.batcher.submit(QUERY_ENDPOINTS[path], payload)
+            return (400 if "error" in result else 200), result
+        if path == "/stats":
+            return 200, self.latency.summary()
+        if path == "/health":
+            return 200, {"status": "ok"}
+        return 404, {"error": f"no route {path}"}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "malformed request line"}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+
+                start = time.perf_counter()
+                path = target.split("?", 1)[0]
+                try:
+                    status, payload = await self.route(method, path, body)
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                if path in QUERY_ENDPOINTS:
+                    self.latency.add(path, time.perf_counter() - start)
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode()
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        server = await asyncio.start_server(self.handle, host, port)
+        addr = server.sockets[0].getsockname()
+        print(f"GIROS evaluation service on http://{addr[0]}:{addr[1]}", file=sys.stderr)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.batcher.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve GIROS damage/heal/upgrade queries on localhost.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--window-ms", type=float, default=2.0, help="micro-batching window")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    args = parser.parse_args(argv)
+
+    service = EvaluationService(window_ms=args.window_ms, max_batch=args.max_batch, data_dir=args.data_dir)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
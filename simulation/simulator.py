@@ -1,43 +1,69 @@
 # simulation/simulator.py
 from simulation.artifact import simulate_artifact
 from simulation.talent_books import simulate_multiple_talent_runs
+from simulation.checkpoint import restore_character
+from simulation import memory
 import copy
 import random
 
-def simulate_artifact_farm(character, resin_spent=20, artifact_type=None, multipliers=None):
+def simulate_artifact_farm(character, resin_spent=20, artifact_type=None, multipliers=None, rng=None, tier_rng=None,
+                           screen=None):
+    """
+    One artifact drop, equipped if it raises expected damage. With a
+    `screen` (simulation.screening.DropScreen) drops that provably cannot
+    help are rejected before the what-if evaluation.
+    """
+    rng = rng or random
     if artifact_type is None:
-        artifact_type = random.choice(["Flower", "Feather", "Sands", "Goblet", "Circlet"])
+        artifact_type = rng.choice(["Flower", "Feather", "Sands", "Goblet", "Circlet"])
 
     if multipliers is None:
         raise ValueError("Talent multipliers must be provided.")
-    result = {}
+    if screen is not None and screen.metric != "damage":
+        raise ValueError(f"simulate_artifact_farm needs a 'damage' DropScreen, got {screen.metric!r}")
+
+    def baseline():
+        # 1) Baseline DPS on a fresh copy
+        char_before = copy.deepcopy(character)
+        stats = char_before.compute_total_stats()
+        char_before.sync_stats(stats)
+        return char_before.expected_damage_output(
+            combo=char_before.default_combo,
+            multipliers=multipliers,
+            crit_rate=char_before.crit_rate,
+            crit_dmg=char_before.crit_dmg,
+            enemy_level=100,
+            enemy_resistance=0.1,
+            stats=stats
+        )
+
+    with memory.stage("what_if"):
+        dmg_before = screen.metric_before(character, "damage", baseline) if screen is not None else baseline()
 
-    # 1) Baseline DPS on a fresh copy
-    char_before = copy.deepcopy(character)
-    char_before.sync_stats(char_before.compute_total_stats())
-    dmg_before = char_before.expected_damage_output(
-        combo=char_before.default_combo,
-        multipliers=multipliers,
-        crit_rate=char_before.crit_rate,
-        crit_dmg=char_before.crit_dmg,
-        enemy_level=100,
-        enemy_resistance=0.1
-    )
     # Simulate drop
-    new_artifact = simulate_artifact(artifact_type)
-
-    # 3) Test DPS on another copy with the new piece in that slot
-    char_test = copy.deepcopy(character)
-    char_test.artifacts[artifact_type] = new_artifact
-    char_test.sync_stats(char_test.compute_total_stats())
-    dmg_after = char_test.expected_damage_output(
-        combo=char_test.default_combo,
-        multipliers=multipliers,
-        crit_rate=char_test.crit_rate,
-        crit_dmg=char_test.crit_dmg,
-        enemy_level=100,
-        enemy_resistance=0.1
-    )
+    with memory.stage("artifact_generation"):
+        new_artifact = simulate_artifact(artifact_type, rng=rng, tier_rng=tier_rng)
+
+    if screen is not None and screen.rejects(character, artifact_type, new_artifact):
+        dmg_after = dmg_before
+    else:
+        with memory.stage("what_if"):
+            # 3) Test DPS on another copy with the new piece in that slot
+            char_test = copy.deepcopy(character)
+            char_test.artifacts[artifact_type] = new_artifact
+            stats = char_test.compute_total_stats()
+            char_test.sync_stats(stats)
+            dmg_after = char_test.expected_damage_output(
+                combo=char_test.default_combo,
+                multipliers=multipliers,
+                crit_rate=char_test.crit_rate,
+                crit_dmg=char_test.crit_dmg,
+                enemy_level=100,
+                enemy_resistance=0.1,
+                stats=stats
+            )
+        if screen is not None:
+            screen.record(dmg_after > dmg_before)
 
     # 4) Accept or reject
     accepted = (dmg_after > dmg_before)
@@ -48,21 +74,23 @@ def simulate_artifact_farm(character, resin_spent=20, artifact_type=None, multip
     else:
         dmg_after = dmg_before
 
-    return {
-        "resin_spent": resin_spent,
-        "activity": "artifact_farm",
-        "artifact_type": artifact_type,
-        "artifact": new_artifact,
-        "accepted": accepted,
-        "damage_before": dmg_before,
-        "damage_after": dmg_after,
-        "dps_gain": dmg_after - dmg_before,
-        "upgrade_counts": new_artifact["upgrades"]
-    }
+    with memory.stage("result_recording"):
+        result = {
+            "resin_spent": resin_spent,
+            "activity": "artifact_farm",
+            "artifact_type": artifact_type,
+            "artifact": new_artifact,
+            "accepted": accepted,
+            "damage_before": dmg_before,
+            "damage_after": dmg_after,
+            "dps_gain": dmg_after - dmg_before,
+            "upgrade_counts": new_artifact["upgrades"]
+        }
+    return result
 
 import copy
 
-def simulate_talent_farm(character, resin_spent=60, domain_level=4, multipliers=None):
+def simulate_talent_farm(character, resin_spent=60, domain_level=4, multipliers=None, rng=None):
     from simulation.talent_books import simulate_multiple_talent_runs
 
     if multipliers is None:
@@ -70,7 +98,7 @@ def simulate_talent_farm(character, resin_spent=60, domain_level=4, multipliers=
 
     # --- 1) Farm books ---
     runs = resin_spent // 20
-    books = simulate_multiple_talent_runs(runs=runs, domain_level=domain_level)
+    books = simulate_multiple_talent_runs(runs=runs, domain_level=domain_level, rng=rng or random)
     # init inventory if needed
     if not hasattr(character, "book_inventory"):
         character.book_inventory = {"Teachings":0,"Guides":0,"Philosophies":0}
@@ -83,16 +111,19 @@ def simulate_talent_farm(character, resin_spent=60, domain_level=4, multipliers=
                 + character.book_inventory["Philosophies"] * 9)
 
     # --- 2) Baseline DPS ---
-    char_before = copy.deepcopy(character)
-    char_before.sync_stats(char_before.compute_total_stats())
-    dmg_before = char_before.expected_damage_output(
-        combo=char_before.default_combo,
-        multipliers=multipliers,
-        crit_rate=char_before.crit_rate,
-        crit_dmg=char_before.crit_dmg,
-        enemy_level=100,
-        enemy_resistance=0.1
-    )
+    with memory.stage("what_if"):
+        char_before = copy.deepcopy(character)
+        stats = char_before.compute_total_stats()
+        char_before.sync_stats(stats)
+        dmg_before = char_before.expected_damage_output(
+            combo=char_before.default_combo,
+            multipliers=multipliers,
+            crit_rate=char_before.crit_rate,
+            crit_dmg=char_before.crit_dmg,
+            enemy_level=100,
+            enemy_resistance=0.1,
+            stats=stats
+        )
 
     # cost table
     upgrade_costs = {1:3,2:6,3:12,4:18,5:27,6:36,7:54,8:108,9:144}
@@ -110,17 +141,20 @@ def simulate_talent_farm(character, resin_spent=60, domain_level=4, multipliers=
                 continue
 
             # simulate bumping that one talent by 1
-            test = copy.deepcopy(character)
-            setattr(test, talent.lower()+"_level", lvl+1)
-            test.sync_stats(test.compute_total_stats())
-            d_after = test.expected_damage_output(
-                combo=test.default_combo,
-                multipliers=multipliers,
-                crit_rate=test.crit_rate,
-                crit_dmg=test.crit_dmg,
-                enemy_level=100,
-                enemy_resistance=0.1
-            )
+            with memory.stage("what_if"):
+                test = copy.deepcopy(character)
+                setattr(test, talent.lower()+"_level", lvl+1)
+                stats = test.compute_total_stats()
+                test.sync_stats(stats)
+                d_after = test.expected_damage_output(
+                    combo=test.default_combo,
+                    multipliers=multipliers,
+                    crit_rate=test.crit_rate,
+                    crit_dmg=test.crit_dmg,
+                    enemy_level=100,
+                    enemy_resistance=0.1,
+                    stats=stats
+                )
             gains[talent] = d_after - dmg_before
 
         if not gains:
@@ -142,34 +176,63 @@ def simulate_talent_farm(character, resin_spent=60, domain_level=4, multipliers=
         setattr(character, best.lower()+"_level", lvl+1)
 
     # --- 4) Final DPS ---
-    character.sync_stats(character.compute_total_stats())
+    stats = character.compute_total_stats()
+    character.sync_stats(stats)
     dmg_after = character.expected_damage_output(
         combo=character.default_combo,
         multipliers=multipliers,
         crit_rate=character.crit_rate,
         crit_dmg=character.crit_dmg,
         enemy_level=100,
-        enemy_resistance=0.1
+        enemy_resistance=0.1,
+        stats=stats
     )
 
-    return {
-        "resin_spent": resin_spent,
-        "activity": "talent_farm",
-        "books_gained": books,
-        "book_inventory": dict(character.book_inventory),
-        "damage_before": dmg_before,
-        "damage_after": dmg_after,
-        "dps_gain": dmg_after - dmg_before,
-        "talent_levels": {
-            "AA": character.aa_level,
-            "Skill": character.skill_level,
-            "Burst": character.burst_level
+    with memory.stage("result_recording"):
+        result = {
+            "resin_spent": resin_spent,
+            "activity": "talent_farm",
+            "books_gained": books,
+            "book_inventory": dict(character.book_inventory),
+            "damage_before": dmg_before,
+            "damage_after": dmg_after,
+            "dps_gain": dmg_after - dmg_before,
+            "talent_levels": {
+                "AA": character.aa_level,
+                "Skill": character.skill_level,
+                "Burst": character.burst_level
+            }
         }
-    }
+    return result
 
-def simulate_with_policy(character, resin_budget, policy, domain_level=4):
-    results = []
+def iter_with_policy(character, resin_budget, policy, domain_level=4, checkpoint=None, streams=None, screen=None):
+    """
+    Generator form of simulate_with_policy: yields each step record as soon as
+    it is simulated. Stop consuming (break / .close()) to end the run early.
+    With a `checkpoint`, resumes from / periodically saves the character, RNG
+    state and remaining resin (see iter_with_metric). `streams` is an optional
+    simulation.crn.DropStreams supplying the artifact/book draws, and
+    `screen` an optional simulation.screening.DropScreen for artifact drops.
+    """
     resin_remaining = resin_budget
+    saved = checkpoint.load() if checkpoint is not None else None
+    if saved:
+        restore_character(character, saved["character"])
+        random.setstate(saved["rng"])
+        if streams is not None:
+            streams.setstate(saved["streams"])
+        if saved["done"]:
+            return
+        resin_remaining = saved["resin"]
+
+    def snapshot(done=False):
+        return {"character": character, "rng": random.getstate(), "resin": resin_remaining, "done": done,
+                "streams": streams.getstate() if streams is not None else None}
+
+    draws = streams.artifact_kwargs() if streams is not None else {}
+    if screen is not None:
+        draws = dict(draws, screen=screen)
+    book_draws = streams.book_kwargs() if streams is not None else {}
 
     while resin_remaining >= 20:
         activity = policy.choose_activity(character)
@@ -178,10 +241,12 @@ def simulate_with_policy(character, resin_budget, policy, domain_level=4):
             result = simulate_artifact_farm(
                 character,
                 resin_spent = 20,
-                multipliers=policy.multipliers
+                multipliers=policy.multipliers,
+                **draws
             )
         elif activity == "talent_farm":
-            result = simulate_talent_farm(character, resin_spent=20, domain_level=domain_level, multipliers=policy.multipliers)
+            result = simulate_talent_farm(character, resin_spent=20, domain_level=domain_level, multipliers=policy.multipliers,
+                                          **book_draws)
         else:
             break
 
@@ -194,17 +259,29 @@ def simulate_with_policy(character, resin_budget, policy, domain_level=4):
         result['accepted'] = accepted
         result['resin_remaining'] = resin_remaining
         result['dps'] = result['damage_after']
-        results.append(result)
+        yield result
 
         if accepted or activity == "talent_farm":
             resin_remaining -= result['resin_spent']
         else:
             break
+        if checkpoint is not None:
+            checkpoint.maybe_save(snapshot)
 
+    if checkpoint is not None:
+        checkpoint.save(snapshot(done=True))
+
+
+def simulate_with_policy(character, resin_budget, policy, domain_level=4, checkpoint=None, streams=None, screen=None):
+    results = []
+    for result in iter_with_policy(character, resin_budget, policy, domain_level=domain_level, checkpoint=checkpoint,
+                                   streams=streams, screen=screen):
+        with memory.stage("result_recording"):
+            results.append(result)
     return results
 
 
-def compare_artifact_vs_talent_strategy(character_factory, multipliers, resin_budget=300, domain_level=4):
+def compare_artifact_vs_talent_strategy(character_factory, multipliers, resin_budget=300, domain_level=4, streams=None):
     """
     Compares DPS improvement from farming artifacts vs. talents using a fixed resin budget.
 
@@ -213,6 +290,7 @@ def compare_artifact_vs_talent_strategy(character_factory, multipliers, resin_bu
     - multipliers: Talent multiplier data.
     - resin_budget: Total resin to spend.
     - domain_level: Domain level for talent farming.
+    - streams: optional simulation.crn.DropStreams for the artifact/book draws.
     """
     from simulation.simulator import simulate_artifact_farm, simulate_talent_farm
     import copy
@@ -237,8 +315,9 @@ def compare_artifact_vs_talent_strategy(character_factory, multipliers, resin_bu
     )
 
     # === Simulate artifact farming ===
+    draws = streams.artifact_kwargs() if streams is not None else {}
     for _ in range(resin_budget // 20):
-        simulate_artifact_farm(char_artifacts, resin_spent=20, multipliers=multipliers)
+        simulate_artifact_farm(char_artifacts, resin_spent=20, multipliers=multipliers, **draws)
 
     char_artifacts.sync_stats(char_artifacts.compute_total_stats())  # Sync after upgrades
 
@@ -260,7 +339,8 @@ def compare_artifact_vs_talent_strategy(character_factory, multipliers, resin_bu
         char_talents,
         resin_spent=resin_budget,
         domain_level=domain_level,
-        multipliers=multipliers
+        multipliers=multipliers,
+        **(streams.book_kwargs() if streams is not None else {})
     )
 
     # === Output comparison ===
@@ -333,30 +413,51 @@ def simulate_artifact_farm_heal(
     multipliers = None,
     metric_fn = None,
     domain_level: int = None,
+    rng = None,
+    tier_rng = None,
+    screen = None,
     **kwargs
 ):
     """
     Like simulate_artifact_farm, but accept an upgrade only if it improves metric_fn.
-    Returns a dict with metric_before/after/gain.
+    Returns a dict with metric_before/after/gain. A `screen` must screen
+    for the same metric as metric_fn, i.e. metric_fn comes from
+    simulation.batch.damage_metric / heal_metric (which tag it).
     """
     if multipliers is None or metric_fn is None:
         raise ValueError("Must provide multipliers and metric_fn.")
+    if screen is not None and getattr(metric_fn, "screen_metric", None) != screen.metric:
+        raise ValueError(f"DropScreen screens the {screen.metric!r} metric but metric_fn is "
+                         f"{getattr(metric_fn, 'screen_metric', None)!r}; "
+                         f"use simulation.batch.{screen.metric}_metric")
 
     # pick a slot
+    rng = rng or random
     if artifact_type is None:
-        artifact_type = random.choice(["Flower","Feather","Sands","Goblet","Circlet"])
+        artifact_type = rng.choice(["Flower","Feather","Sands","Goblet","Circlet"])
 
     # baseline metric
-    before = metric_fn(character)
+    with memory.stage("what_if"):
+        if screen is not None:
+            before = screen.metric_before(character, metric_fn, lambda: metric_fn(character))
+        else:
+            before = metric_fn(character)
 
     # roll new artifact
-    new_art = simulate_artifact(artifact_type)
+    with memory.stage("artifact_generation"):
+        new_art = simulate_artifact(artifact_type, rng=rng, tier_rng=tier_rng)
 
     # test on a copy
-    test = copy.deepcopy(character)
-    test.artifacts[artifact_type] = new_art
-    test.sync_stats(test.compute_total_stats())
-    after = metric_fn(test)
+    if screen is not None and screen.rejects(character, artifact_type, new_art):
+        after = before
+    else:
+        with memory.stage("what_if"):
+            test = copy.deepcopy(character)
+            test.artifacts[artifact_type] = new_art
+            test.sync_stats(test.compute_total_stats())
+            after = metric_fn(test)
+        if screen is not None:
+            screen.record(after > before)
 
     accepted = (after > before)
     if accepted:
@@ -368,17 +469,19 @@ def simulate_artifact_farm_heal(
         gain = 0.0
         after = before
 
-    return {
-        "resin_spent": resin_spent,
-        "activity": "artifact_farm_heal",
-        "artifact_type": artifact_type,
-        "artifact": new_art,
-        "accepted": accepted,
-        "metric_before": before,
-        "metric_after": after,
-        "metric_gain": gain,
-        "upgrade_counts": new_art["upgrades"],
-    }
+    with memory.stage("result_recording"):
+        result = {
+            "resin_spent": resin_spent,
+            "activity": "artifact_farm_heal",
+            "artifact_type": artifact_type,
+            "artifact": new_art,
+            "accepted": accepted,
+            "metric_before": before,
+            "metric_after": after,
+            "metric_gain": gain,
+            "upgrade_counts": new_art["upgrades"],
+        }
+    return result
 
 
 def simulate_talent_farm_heal(
@@ -387,6 +490,7 @@ def simulate_talent_farm_heal(
     domain_level: int = 4,
     multipliers = None,
     metric_fn = None,
+    rng = None,
 ):
     """
     Like simulate_talent_farm, but greedily pick the single talent‐up
@@ -397,7 +501,7 @@ def simulate_talent_farm_heal(
 
     # 1) Farm books
     runs = resin_spent // 20
-    books = simulate_multiple_talent_runs(runs=runs, domain_level=domain_level)
+    books = simulate_multiple_talent_runs(runs=runs, domain_level=domain_level, rng=rng or random)
     if not hasattr(character, "book_inventory"):
         character.book_inventory = {"Teachings":0,"Guides":0,"Philosophies":0}
     for tier, qty in books.items():
@@ -425,10 +529,11 @@ def simulate_talent_farm_heal(
                 continue
 
             # simulate one‐level bump
-            test = copy.deepcopy(character)
-            setattr(test, tal.lower()+"_level", lvl+1)
-            test.sync_stats(test.compute_total_stats())
-            after = metric_fn(test)
+            with memory.stage("what_if"):
+                test = copy.deepcopy(character)
+                setattr(test, tal.lower()+"_level", lvl+1)
+                test.sync_stats(test.compute_total_stats())
+                after = metric_fn(test)
             gain = after - before
 
             if gain > best_gain:
@@ -451,23 +556,25 @@ def simulate_talent_farm_heal(
         before += best_gain
 
     after = metric_fn(character)
-    return {
-        "resin_spent": resin_spent,
-        "activity": "talent_farm_heal",
-        "books_gained": books,
-        "book_inventory": dict(character.book_inventory),
-        "metric_before": before,
-        "metric_after": after,
-        "metric_gain": after - before,
-        "talent_levels": {
-            "AA": character.aa_level,
-            "Skill": character.skill_level,
-            "Burst": character.burst_level
+    with memory.stage("result_recording"):
+        result = {
+            "resin_spent": resin_spent,
+            "activity": "talent_farm_heal",
+            "books_gained": books,
+            "book_inventory": dict(character.book_inventory),
+            "metric_before": before,
+            "metric_after": after,
+            "metric_gain": after - before,
+            "talent_levels": {
+                "AA": character.aa_level,
+                "Skill": character.skill_level,
+                "Burst": character.burst_level
+            }
         }
-    }
+    return result
 
 
-def simulate_with_metric(
+def iter_with_metric(
         character,
         resin_budget: int,
         multipliers,
@@ -478,10 +585,27 @@ def simulate_with_metric(
         policy: str = "greedy_swap",
         threshold: float = None,   # for threshold_then_switch
         primary: str = "artifact", # for threshold_then_switch
-        threshold_stats: dict = None  # for stat_threshold_then_swap
+        threshold_stats: dict = None,  # for stat_threshold_then_swap
+        checkpoint=None,              # simulation.checkpoint.Checkpointer
+        streams=None,                 # simulation.crn.DropStreams
+        screen=None                   # simulation.screening.DropScreen
 ):
     """
     Generic loop: spend resin in 20-pt chunks, choosing actions per `policy`.
+    Yields each step record as it happens; stop consuming (break / .close())
+    to end the run early. simulate_with_metric collects them into a list.
+
+    With a `checkpoint`, the character, RNG state, remaining resin and policy
+    phase are snapshotted between steps. If the checkpoint already holds a
+    snapshot the run resumes from it (restoring `character` in place) and
+    only the steps after the snapshot are yielded.
+
+    With `streams`, artifact drops, roll tiers and book drops come from its
+    dedicated generators instead of the global `random`. Runners must then
+    accept `rng` (and `tier_rng` for the artifact runner).
+
+    With `screen`, it is passed to the artifact runner, which must then
+    accept a `screen` argument (both built-in artifact runners do).
 
     Policies:
       - "artifact_only"
@@ -493,18 +617,53 @@ def simulate_with_metric(
             (character.compute_total_stats() or attributes),
             then farm the other runner until no metric gain.
     """
-    results = []
     resin = resin_budget
-    current = metric_fn(character)
+    phase = "main"   # "secondary" / "fallback" once a policy moves on
+    saved = checkpoint.load() if checkpoint is not None else None
+    if saved:
+        restore_character(character, saved["character"])
+        random.setstate(saved["rng"])
+        if streams is not None:
+            streams.setstate(saved["streams"])
+        if saved["done"]:
+            return
+        resin, current = saved["resin"], saved["current"]
+        primary, phase = saved["primary"], saved["phase"]
+    else:
+        current = metric_fn(character)
+
+    def snapshot(done=False):
+        return {
+            "character": character,
+            "rng": random.getstate(),
+            "resin": resin,
+            "current": current,
+            "primary": primary,
+            "phase": phase,
+            "done": done,
+            "streams": streams.getstate() if streams is not None else None,
+        }
+
+    def tick():
+        if checkpoint is not None:
+            checkpoint.maybe_save(snapshot)
+
+    draws = {}
+    if streams is not None:
+        draws = {artifact_runner: streams.artifact_kwargs(), talent_runner: streams.book_kwargs()}
+    if screen is not None:
+        draws[artifact_runner] = dict(draws.get(artifact_runner, {}), screen=screen)
 
     def run_step(runner, **kwargs):
         nonlocal current
         before = current
-        out = runner(**kwargs)
-        after = metric_fn(character)
-        out["metric_before"] = before
-        out["metric_after"]  = after
-        out["metric_gain"]   = after - before
+        out = runner(**kwargs, **draws.get(runner, {}))
+        with memory.stage("what_if"):
+            after = metric_fn(character)
+        with memory.stage("result_recording"):
+            out["metric_before"] = before
+            out["metric_after"]  = after
+            out["metric_gain"]   = after - before
         current = after
         return out, after - before
 
@@ -521,7 +680,7 @@ def simulate_with_metric(
             sec_name = "artifact" if primary == "talent" else "talent"
 
             # Phase 1: farm primary until stats met
-            while resin >= 20:
+            while resin >= 20 and phase != "secondary":
                 stats = character.compute_total_stats()
                 if all(
                         stats.get(k, getattr(character, k, None)) >= v
@@ -549,10 +708,12 @@ def simulate_with_metric(
                     )
 
                 out["activity"] = f"{prim_name}_farm"
-                results.append(out)
+                yield out
                 resin -= 20
+                tick()
 
             # Phase 2: once thresholds met, farm secondary until no gain
+            phase = "secondary"
             while resin >= 20:
                 # again, drop domain_level for artifact runner
                 if sec_runner is artifact_runner:
@@ -576,10 +737,11 @@ def simulate_with_metric(
                 if gain <= 0:
                     break
                 out["activity"] = f"{sec_name}_farm"
-                results.append(out)
+                yield out
                 resin -= 20
+                tick()
 
-            return results
+            break
 
         # ── artifact_only ──
         if policy == "artifact_only":
@@ -593,8 +755,9 @@ def simulate_with_metric(
             if gain <= 0:
                 break
             out["activity"] = "artifact_only"
-            results.append(out)
+            yield out
             resin -= 20
+            tick()
 
         # ── talent_only ──
         elif policy == "talent_only":
@@ -607,39 +770,45 @@ def simulate_with_metric(
                 domain_level=domain_level
             )
             out["activity"] = "talent_only"
-            results.append(out)
+            yield out
             resin -= 20
+            tick()
 
         # ── greedy_swap ──
         elif policy == "greedy_swap":
-            # 1) Try artifact first
-            out, gain = run_step(
-                artifact_runner,
-                character=character,
-                resin_spent=20,
-                multipliers=multipliers,
-                metric_fn=metric_fn
-            )
-            if gain > 0:
-                out["activity"] = "artifact_farm"
-                results.append(out)
-                resin -= 20
-                continue
+            if phase == "main":
+                # 1) Try artifact first
+                out, gain = run_step(
+                    artifact_runner,
+                    character=character,
+                    resin_spent=20,
+                    multipliers=multipliers,
+                    metric_fn=metric_fn
+                )
+                if gain > 0:
+                    out["activity"] = "artifact_farm"
+                    yield out
+                    resin -= 20
+                    tick()
+                    continue
+
+                # 2) Then try talent
+                out, gain = run_step(
+                    talent_runner,
+                    character=character,
+                    resin_spent=20,
+                    multipliers=multipliers,
+                    metric_fn=metric_fn,
+                    domain_level=domain_level
+                )
+                if gain > 0:
+                    out["activity"] = "talent_farm"
+                    yield out
+                    resin -= 20
+                    tick()
+                    continue
 
-            # 2) Then try talent
-            out, gain = run_step(
-                talent_runner,
-                character=character,
-                resin_spent=20,
-                multipliers=multipliers,
-                metric_fn=metric_fn,
-                domain_level=domain_level
-            )
-            if gain > 0:
-                out["activity"] = "talent_farm"
-                results.append(out)
-                resin -= 20
-                continue
+                phase = "fallback"
 
             # 3) Neither gave gain → FALLBACK: bump **only Burst** to 10
             while resin >= 20 and character.burst_level < 10:
@@ -652,8 +821,9 @@ def simulate_with_metric(
                     domain_level=domain_level
                 )
                 out["activity"] = "talent_farm_fallback"
-                results.append(out)
+                yield out
                 resin -= 20
+                tick()
 
             # 4) Once Burst is LEVEL 10, burn all remaining resin on artifacts
             while resin >= 20:
@@ -665,8 +835,9 @@ def simulate_with_metric(
                     metric_fn=metric_fn
                 )
                 out["activity"] = "artifact_farm_fallback"
-                results.append(out)
+                yield out
                 resin -= 20
+                tick()
 
             break
 
@@ -686,15 +857,57 @@ def simulate_with_metric(
                 domain_level=domain_level
             )
             out["activity"] = f"{name_prim}_farm"
-            results.append(out)
+            yield out
             resin -= 20
             if gain < threshold:
                 primary = "talent" if primary=="artifact" else "artifact"
+            tick()
             continue
 
         else:
             raise ValueError(f"Unknown policy '{policy}'")
 
+    if checkpoint is not None:
+        checkpoint.save(snapshot(done=True))
+
+
+def simulate_with_metric(
+        character,
+        resin_budget: int,
+        multipliers,
+        metric_fn,
+        artifact_runner,
+        talent_runner,
+        domain_level: int = 4,
+        policy: str = "greedy_swap",
+        threshold: float = None,
+        primary: str = "artifact",
+        threshold_stats: dict = None,
+        checkpoint=None,
+        streams=None,
+        screen=None
+):
+    """List-returning wrapper around iter_with_metric (same arguments)."""
+    steps = iter_with_metric(
+        character,
+        resin_budget,
+        multipliers,
+        metric_fn,
+        artifact_runner,
+        talent_runner,
+        domain_level=domain_level,
+        policy=policy,
+        threshold=threshold,
+        primary=primary,
+        threshold_stats=threshold_stats,
+        checkpoint=checkpoint,
+        streams=streams,
+        screen=screen
+    )
+    results = []
+    for out in steps:
+        with memory.stage("result_recording"):
+            results.append(out)
     return results
 
 
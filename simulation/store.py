@@ -0,0 +1,234 @@
+# simulation/store.py
+"""
+SQLite store of past runs: metadata plus aggregate results, for queries
+such as "all Hu Tao runs with budget ≥ 1000 where talent beat artifacts".
+
+    runs      one row per run: source ("batch", "roster", "montecarlo"),
+              name, character, policy, metric, resin_budget, trials, seed,
+              data_version / code_version (simulation.cache hashes),
+              config (canonical JSON), created
+    results   one row per (run, key): n, mean, std, stderr, the
+              RunningStats.summary() of that key over the run's trials
+
+runs is indexed on character, policy, resin_budget and data_version, and
+results on (key, mean). The database is in WAL mode with a busy timeout, and
+runs are inserted in batches of `batch_size` per transaction. Several
+processes can therefore write to one store while others read it.
+
+    with ResultStore("runs.sqlite") as store:
+        store.find(character="Hu Tao", min_budget=1000)
+        store.query('''SELECT r.* FROM runs r
+                       JOIN results t ON t.run_id = r.id AND t.key = 'talent_delta'
+                       JOIN results a ON a.run_id = r.id AND a.key = 'artifact_delta'
+                       WHERE r.character = ? AND r.resin_budget >= ? AND t.mean > a.mean''',
+                    ("Hu Tao", 1000))
+
+    python -m simulation.batch scenarios.jsonl --store          # default: .giros_runs.sqlite
+    python -m simulation.store find --character "Hu Tao" --min-budget 1000
+    python -m simulation.store sql "SELECT policy, COUNT(*) FROM runs GROUP BY policy"
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+from simulation.cache import REPO_DIR, canonical_json, code_hash, data_hash
+from simulation.montecarlo import RunningStats
+
+STORE_PATH = os.environ.get("GIROS_STORE", os.path.join(REPO_DIR, ".giros_runs.sqlite"))
+BATCH_SIZE = 500
+RUN_FIELDS = ("source", "name", "character", "policy", "metric", "resin_budget", "trials", "seed",
+              "data_version", "code_version", "config", "created")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    name TEXT,
+    character TEXT,
+    policy TEXT,
+    metric TEXT,
+    resin_budget INTEGER,
+    trials INTEGER,
+    seed INTEGER,
+    data_version TEXT,
+    code_version TEXT,
+    config TEXT,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    n INTEGER,
+    mean REAL,
+    std REAL,
+    stderr REAL,
+    PRIMARY KEY (run_id, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS runs_character ON runs(character, resin_budget);
+CREATE INDEX IF NOT EXISTS runs_policy ON runs(policy, resin_budget);
+CREATE INDEX IF NOT EXISTS runs_budget ON runs(resin_budget);
+CREATE INDEX IF NOT EXISTS runs_data_version ON runs(data_version);
+CREATE INDEX IF NOT EXISTS results_key ON results(key, mean);
+"""
+
+
+def summarize(rows, skip=()):
+    """RunningStats summary of the numeric fields of per-trial result dicts."""
+    stats = RunningStats()
+    for row in rows:
+        stats.add({k: float(v) for k, v in row.items()
+                   if k not in skip and isinstance(v, (int, float))})
+    return stats.summary()
+
+
+class ResultStore:
+    def __init__(self, path=STORE_PATH, batch_size=BATCH_SIZE, timeout=30.0):
+        self.path = path
+        self.batch_size = batch_size
+        # isolation_level=None: transactions are explicit (BEGIN IMMEDIATE in flush)
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self._pending = []
+        self._versions = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ── writes ──
+    def versions(self, data_dir=None):
+        """(data_version, code_version) for runs on `data_dir`, hashed once per store."""
+        if data_dir not in self._versions:
+            self._versions[data_dir] = (data_hash(data_dir), code_hash())
+        return self._versions[data_dir]
+
+    def add_run(self, source, results, config=None, data_dir=None, **meta):
+        """
+        Queue one run. `results` maps keys to a RunningStats.summary() entry
+        or a plain number; `meta` sets the other runs columns (character,
+        policy, resin_budget, ...). Written on the next flush, which happens
+        automatically every `batch_size` runs.
+        """
+        unknown = set(meta) - set(RUN_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown run fields {sorted(unknown)}; expected some of {RUN_FIELDS}")
+        data_version, code_version = self.versions(data_dir)
+        run = {"data_version": data_version, "code_version": code_version, "created": time.time(), **meta,
+               "source": source, "config": canonical_json(config) if config is not None else None}
+        rows = []
+        for key, value in results.items():
+            if isinstance(value, dict):
+                rows.append((key, value.get("n"), value.get("mean"), value.get("std"), value.get("stderr")))
+            else:
+                rows.append((key, 1, float(value), 0.0, 0.0))
+        self._pending.append((tuple(run.get(f) for f in RUN_FIELDS), rows))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write the queued runs in one transaction."""
+        if not self._pending:
+            return
+        insert_run = f"INSERT INTO runs ({', '.join(RUN_FIELDS)}) VALUES ({', '.join('?' * len(RUN_FIELDS))})"
+        # IMMEDIATE takes the write lock up front, so concurrent writers queue on
+        # the busy timeout instead of failing to upgrade a read lock
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            results = []
+            for values, rows in self._pending:
+                run_id = self.conn.execute(insert_run, values).lastrowid
+                results += [(run_id, *row) for row in rows]
+            self.conn.executemany(
+                "INSERT INTO results (run_id, key, n, mean, std, stderr) VALUES (?, ?, ?, ?, ?, ?)", results)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self._pending = []
+
+    def close(self):
+        if self.conn is None:
+            return
+        self.flush()
+        self.conn.close()
+        self.conn = None
+
+    # ── queries ──
+    def query(self, sql, params=()):
+        """Rows of any SQL query as dicts."""
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def find(self, character=None, policy=None, source=None, metric=None, data_version=None,
+             min_budget=None, max_budget=None, limit=None):
+        """
+        Runs matching every given filter (newest first), each with
+        "results": {key: {"n", "mean", "std", "stderr"}}.
+        """
+        where, params = [], []
+        for column, value in (("character", character), ("policy", policy), ("source", source),
+                              ("metric", metric), ("data_version", data_version)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if min_budget is not None:
+            where.append("resin_budget >= ?")
+            params.append(min_budget)
+        if max_budget is not None:
+            where.append("resin_budget <= ?")
+            params.append(max_budget)
+        sql = "SELECT * FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id DESC"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        runs = self.query(sql, params)
+        by_id = {run["id"]: run for run in runs}
+        for run in runs:
+            run["results"] = {}
+        ids = list(by_id)
+        for i in range(0, len(ids), 900):  # stay under SQLite's bound-parameter limit
+            chunk = ids[i:i + 900]
+            for row in self.conn.execute(
+                    f"SELECT * FROM results WHERE run_id IN ({', '.join('?' * len(chunk))})", chunk):
+                by_id[row["run_id"]]["results"][row["key"]] = {
+                    "n": row["n"], "mean": row["mean"], "std": row["std"], "stderr": row["stderr"]}
+        return runs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the GIROS run store.")
+    parser.add_argument("--store", default=STORE_PATH, help="SQLite file (default: %(default)s)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    find = sub.add_parser("find", help="runs matching indexed filters")
+    for name in ("character", "policy", "source", "metric", "data-version"):
+        find.add_argument(f"--{name}")
+    find.add_argument("--min-budget", type=int)
+    find.add_argument("--max-budget", type=int)
+    find.add_argument("--limit", type=int)
+    sql = sub.add_parser("sql", help="run an SQL query")
+    sql.add_argument("query")
+    sql.add_argument("params", nargs="*")
+    args = parser.parse_args(argv)
+
+    with ResultStore(args.store) as store:
+        if args.command == "find":
+            rows = store.find(character=args.character, policy=args.policy, source=args.source,
+                              metric=args.metric, data_version=args.data_version, min_budget=args.min_budget,
+                              max_budget=args.max_budget, limit=args.limit)
+        else:
+            rows = store.query(args.query, args.params)
+    for row in rows:
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@ import random
 
 import random
 
-def simulate_talent_book_run(domain_level=4):
+def simulate_talent_book_run(domain_level=4, rng=random):
     """
     Simulates one run of a talent book domain using the wiki’s two‐roll model:
       1) First roll produces *only* 2★ Teachings (range & avg from the table).
@@ -11,20 +11,20 @@ def simulate_talent_book_run(domain_level=4):
     """
     # --- pick your first‐roll Teaching count from the table --- #
     if domain_level == 1:
-        first_teach = random.randint(3, 4)       # ★★ Range 3–4, avg 3.2
+        first_teach = rng.randint(3, 4)       # ★★ Range 3–4, avg 3.2
         pack_min, pack_max = 0, 0                # domain I has no second roll
         p_guides, p_phils = 0, 0
     elif domain_level == 2:
-        first_teach = random.randint(2, 3)       # ★★ Range 2–3, avg 2.5
+        first_teach = rng.randint(2, 3)       # ★★ Range 2–3, avg 2.5
         pack_min, pack_max = 0, 0
         p_guides, p_phils = 0, 0
     elif domain_level == 3:
-        first_teach = random.randint(1, 2)       # ★★ Range 1–2, avg 1.8
+        first_teach = rng.randint(1, 2)       # ★★ Range 1–2, avg 1.8
         pack_min, pack_max = 2, 3                # second‐roll 2–3 packs
         # overall avg guides=2.0, phils≈0.05 ⇒ p3≈2.0/2.5, p4≈0.05/2.5
         p_guides, p_phils = 2.0/2.5, 0.05/2.5
     elif domain_level == 4:
-        first_teach = random.randint(2, 3)       # ★★ Range 2–3, avg 2.2
+        first_teach = rng.randint(2, 3)       # ★★ Range 2–3, avg 2.2
         pack_min, pack_max = 2, 4                # second‐roll 2–4 packs
         # overall avg guides=1.98, phils=0.22 ⇒ total packs avg≈3
         # so p_guides≈1.98/3, p_phils≈0.22/3
@@ -38,8 +38,8 @@ def simulate_talent_book_run(domain_level=4):
     philosophies = 0
 
     # --- second roll: drop between pack_min–pack_max packs, each random rarity --- #
-    for _ in range(random.randint(pack_min, pack_max)):
-        r = random.random()
+    for _ in range(rng.randint(pack_min, pack_max)):
+        r = rng.random()
         if r < p_guides:
             guides += 1
         elif r < p_guides + p_phils:
@@ -53,13 +53,13 @@ def simulate_talent_book_run(domain_level=4):
         'Philosophies': philosophies
     }
 
-def simulate_multiple_talent_runs(runs=3, domain_level=4):
+def simulate_multiple_talent_runs(runs=3, domain_level=4, rng=random):
     """
     Simulates multiple talent domain runs at a given domain level.
     """
     total = {'Teachings': 0, 'Guides': 0, 'Philosophies': 0}
     for _ in range(runs):
-        result = simulate_talent_book_run(domain_level=domain_level)
+        result = simulate_talent_book_run(domain_level=domain_level, rng=rng)
         for k in total:
             total[k] += result[k]
     return total
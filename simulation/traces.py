@@ -0,0 +1,193 @@
+# simulation/traces.py
+"""
+Columnar (Parquet / Arrow) traces of simulation steps.
+
+Step records from iter_with_metric / iter_with_policy nest the artifact,
+book and talent dicts, which makes turning them into DataFrames slow and
+memory-heavy. A TraceWriter flattens every record into one row of a fixed
+schema and writes the rows straight to disk:
+
+    run, trial, step                         which run the row belongs to
+    activity, artifact_type, artifact.main_stat
+                                             dictionary-encoded strings
+    resin_*, damage_*, dps*, metric_*, accepted
+    artifact.main_stat_value, artifact.substats.<stat>, artifact.upgrades.<stat>
+    books_gained.<tier>, book_inventory.<tier>, talent_levels.<talent>
+
+A column a step does not have is null (talent steps have no artifact, heal
+runners no damage_*); keys outside the schema are dropped. Rows are buffered
+per column and flushed as one row group every `row_group_size` rows, so a
+trace of millions of steps never sits in memory at once. ".parquet" paths
+write Parquet, ".arrow" / ".feather" the Arrow IPC file format. pyarrow is
+only imported when a trace is written or read.
+
+    with TraceWriter("trace.parquet") as writer:
+        for _ in traced(iter_with_metric(char, 600, ...), writer, run="hutao-greedy"):
+            pass
+    df = read_trace("trace.parquet", columns=["step", "activity", "metric_after"])
+"""
+import os
+
+ROW_GROUP_SIZE = 65_536
+
+SUBSTATS = ('Flat HP', 'Flat ATK', 'Flat DEF', 'HP%', 'ATK%', 'DEF%', 'Energy Recharge%', 'Elemental Mastery',
+            'CRIT Rate%', 'CRIT DMG%')
+BOOKS = ("Teachings", "Guides", "Philosophies")
+TALENTS = ("AA", "Skill", "Burst")
+
+CATEGORIES = ("run", "activity", "artifact_type", "artifact.main_stat")
+FLOATS = ("resin_spent", "resin_remaining", "damage_before", "damage_after", "dps_gain", "dps",
+          "metric_before", "metric_after", "metric_gain", "artifact.main_stat_value",
+          *(f"artifact.substats.{s}" for s in SUBSTATS))
+INTS = ("trial", "step",
+        *(f"artifact.upgrades.{s}" for s in SUBSTATS),
+        *(f"books_gained.{b}" for b in BOOKS),
+        *(f"book_inventory.{b}" for b in BOOKS),
+        *(f"talent_levels.{t}" for t in TALENTS))
+BOOLS = ("accepted",)
+COLUMNS = ("run", "trial", "step", "activity", "artifact_type", "accepted",
+           *(c for c in FLOATS if not c.startswith("artifact.")), "artifact.main_stat",
+           *(c for c in FLOATS if c.startswith("artifact.")),
+           *(c for c in INTS if c not in ("trial", "step")))
+FORMATS = {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("Columnar traces need pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+def _format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Unknown trace format {ext!r}; expected one of {sorted(FORMATS)}")
+    return FORMATS[ext]
+
+
+def trace_schema():
+    pa = _pyarrow()
+    fields = []
+    for name in COLUMNS:
+        if name in CATEGORIES:
+            fields.append(pa.field(name, pa.dictionary(pa.int32(), pa.string())))
+        elif name in FLOATS:
+            fields.append(pa.field(name, pa.float64()))
+        elif name in INTS:
+            fields.append(pa.field(name, pa.int64()))
+        else:
+            fields.append(pa.field(name, pa.bool_()))
+    return pa.schema(fields)
+
+
+def _flatten(record, prefix, out):
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            _flatten(value, f"{name}.", out)
+        else:
+            out[name] = value
+
+
+def _row(record, run, trial, step):
+    flat = {"run": run, "trial": trial, "step": step}
+    _flatten(record, "", flat)
+    return tuple(map(flat.get, COLUMNS))
+
+
+def flatten_step(record, run=None, trial=0, step=0):
+    """One step record as a {column: value} row of the trace schema."""
+    return dict(zip(COLUMNS, _row(record, run, trial, step)))
+
+
+class TraceWriter:
+    """Streams flattened step rows to a Parquet / Arrow file in row groups."""
+
+    def __init__(self, path, row_group_size=ROW_GROUP_SIZE):
+        self.path = path
+        self.format = _format(path)
+        self.row_group_size = row_group_size
+        self.schema = trace_schema()
+        self.rows = 0
+        self._buffer = []  # row tuples, transposed on flush
+        self._steps = {}  # (run, trial) -> next step index
+        pa = _pyarrow()
+        if self.format == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, self.schema)
+        else:
+            self._sink = pa.OSFile(path, "wb")
+            self._writer = pa.ipc.new_file(self._sink, self.schema)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, record, run=None, trial=0):
+        """Append one step record; steps are numbered per (run, trial)."""
+        step = self._steps.get((run, trial), 0)
+        self._steps[run, trial] = step + 1
+        self._append(_row(record, run, trial, step))
+
+    def write_row(self, row):
+        """Append a row already produced by flatten_step."""
+        self._append(tuple(map(row.get, COLUMNS)))
+
+    def _append(self, row):
+        self._buffer.append(row)
+        if len(self._buffer) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        pa = _pyarrow()
+        columns = [pa.array(values, type=field.type) for values, field in zip(zip(*self._buffer), self.schema)]
+        table = pa.Table.from_arrays(columns, schema=self.schema)
+        if self.format == "parquet":
+            self._writer.write_table(table, row_group_size=len(self._buffer))
+        else:
+            for batch in table.to_batches():
+                self._writer.write_batch(batch)
+        self.rows += len(self._buffer)
+        self._buffer = []
+
+    def close(self):
+        if self._writer is None:
+            return
+        self.flush()
+        self._writer.close()
+        if self.format == "arrow":
+            self._sink.close()
+        self._writer = None
+
+
+def traced(steps, writer, run=None, trial=0):
+    """Pass a step iterator through, writing every step to `writer`."""
+    for step in steps:
+        writer.write(step, run=run, trial=trial)
+        yield step
+
+
+def read_trace(path, columns=None):
+    """
+    A trace as a pandas DataFrame. Dictionary columns load as categoricals,
+    integer columns as nullable Int64 (steps without them stay <NA>).
+    """
+    pa = _pyarrow()
+    import pandas as pd
+    types = {pa.int64(): pd.Int64Dtype()}.get
+    if _format(path) == "parquet":
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, columns=list(columns) if columns else None)
+    else:
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+            if columns:
+                table = table.select(list(columns))
+            return table.to_pandas(types_mapper=types)
+    return table.to_pandas(types_mapper=types)
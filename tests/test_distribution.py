@@ -0,0 +1,43 @@
+import contextlib
+import os
+
+import numpy as np
+import pytest
+
+from benchmarks.hot_paths import ARTIFACTS
+from core.datasets import Datasets
+from core.distribution import combo_hits, fft_distribution
+
+
+@pytest.fixture(scope="module")
+def hu_tao_hits():
+    datasets = Datasets()
+    hu_tao = datasets.make_character("Hu Tao", weapon_name="Homa", artifacts=ARTIFACTS,
+                                     aa_level=10, skill_level=10, burst_level=10)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        hits = combo_hits(hu_tao, datasets.multipliers, combo="E12N1C")
+        mean = hu_tao.expected_damage_output(combo="E12N1C", multipliers=datasets.multipliers,
+                                             enemy_level=100, enemy_resistance=0.1)
+    return hits, mean
+
+
+@pytest.mark.parametrize("bins", [2 ** 12, 2 ** 16])
+def test_fft_grid_does_not_wrap(hu_tao_hits, bins):
+    hits, mean = hu_tao_hits
+    dist = fft_distribution(hits, bins)
+    n_hits = sum(hits.values())
+    low = sum(min(values) * count for (values, _), count in hits.items())
+    top = sum(max(values) * count for (values, _), count in hits.items())
+    # every hit's mass moves at most one point down, so nothing lies below this
+    assert dist.pmf[:int(low / dist.step) - n_hits].sum() < 1e-12
+    assert (np.arange(len(dist.pmf)) * dist.step * dist.pmf).sum() == pytest.approx(mean, rel=1e-12)
+
+    all_crit = np.prod([probs[-1] ** count for (_, probs), count in hits.items()])
+    lo, hi = dist.exceedance_bounds(top)
+    assert lo - 1e-12 <= all_crit <= hi + 1e-12
+
+
+def test_fft_rejects_too_few_bins(hu_tao_hits):
+    hits, _ = hu_tao_hits
+    with pytest.raises(ValueError):
+        fft_distribution(hits, sum(hits.values()) + 1)
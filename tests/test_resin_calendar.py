@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from benchmarks.hot_paths import ARTIFACTS
+from core.datasets import Datasets
+from simulation.resin_calendar import (ACCOUNT_DTYPE, SLOTS, new_accounts, pack_character, run_calendar,
+                                       unpack_character)
+
+
+def test_pack_round_trip_keeps_artifacts():
+    hu_tao = Datasets().make_character("Hu Tao", weapon_name="Homa", artifacts=ARTIFACTS)
+    row = np.zeros(1, dtype=ACCOUNT_DTYPE)[0]
+    pack_character(hu_tao, row)
+    restored = unpack_character(hu_tao, row)
+    assert restored.artifacts["Goblet"]["main_stat"] == "Pyro DMG Bonus"
+    stats, expected = restored.compute_total_stats(), hu_tao.compute_total_stats()
+    # values are stored as float32
+    assert stats["elemental_dmg_bonus"]["Pyro"] == pytest.approx(expected["elemental_dmg_bonus"]["Pyro"])
+    assert stats["total_hp"] == pytest.approx(expected["total_hp"])
+
+
+def test_unpack_keeps_empty_slots():
+    bare = Datasets().make_character("Hu Tao", weapon_name="Homa")
+    row = np.zeros(1, dtype=ACCOUNT_DTYPE)[0]
+    pack_character(bare, row)
+    assert unpack_character(bare, row).artifacts == dict.fromkeys(SLOTS)
+
+
+def test_calendar_with_equipped_artifacts():
+    scenario = {"character": "Hu Tao", "weapon": "Homa", "artifacts": ARTIFACTS, "policy": "minmaxer", "seed": 1}
+    accounts, history = run_calendar(scenario, n_accounts=2, days=2, workers=1, record_every=1)
+    assert sorted(history) == [0, 1, 2]
+    # one login a day: 180 regenerated, 160 kept
+    assert accounts["wasted"].tolist() == [40, 40]
+    assert accounts["rewards"].tolist() == [16, 16]  # all spent as Condensed Resin
+
+
+def test_accounts_start_empty():
+    bare = Datasets().make_character("Hu Tao", weapon_name="Homa")
+    assert new_accounts(bare, 3)["resin"].tolist() == [0, 0, 0]
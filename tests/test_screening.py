@@ -0,0 +1,63 @@
+import copy
+import random
+
+import pytest
+
+from core.datasets import Datasets
+from simulation.batch import damage_metric, heal_metric
+from simulation.screening import DropScreen
+from simulation.simulator import simulate_artifact_farm, simulate_artifact_farm_heal, simulate_talent_farm
+
+
+def _drops(character, runner, seed, drops=120, **kwargs):
+    """(slot, accepted, metric before) per drop of `runner` on `character`."""
+    rng = random.Random(seed)
+    out = []
+    for _ in range(drops):
+        res = runner(character, rng=rng, tier_rng=rng, **kwargs)
+        out.append((res["artifact_type"], res["accepted"], res.get("damage_before", res.get("metric_before"))))
+    return out
+
+
+@pytest.mark.parametrize("name, metric", [("Hu Tao", "damage"), ("Bennett", "heal")])
+def test_screened_decisions_match_exhaustive(name, metric):
+    datasets = Datasets()
+    m = datasets.multipliers
+    if metric == "damage":
+        runner, kwargs = simulate_artifact_farm, {"multipliers": m}
+    else:
+        runner, kwargs = simulate_artifact_farm_heal, {"multipliers": m, "metric_fn": heal_metric(m)}
+
+    plain, fast = datasets.make_character(name), datasets.make_character(name)
+    screen = DropScreen(m, metric=metric)
+    assert _drops(fast, runner, seed=3, screen=screen, **kwargs) == _drops(plain, runner, seed=3, **kwargs)
+    assert fast.artifacts == plain.artifacts
+    assert screen.stats()["screened_out"] > 0
+
+
+def test_cached_baseline_follows_build_changes():
+    datasets = Datasets()
+    m = datasets.multipliers
+    hu_tao = datasets.make_character("Hu Tao")
+    screen = DropScreen(m)
+    rng = random.Random(5)
+    for _ in range(20):
+        fresh = copy.deepcopy(hu_tao)
+        fresh.sync_stats(fresh.compute_total_stats())
+        res = simulate_artifact_farm(hu_tao, multipliers=m, rng=rng, screen=screen)
+        assert res["damage_before"] == pytest.approx(damage_metric(m)(fresh))
+        simulate_talent_farm(hu_tao, multipliers=m, rng=rng)
+
+
+def test_runners_reject_a_screen_for_another_metric():
+    datasets = Datasets()
+    m = datasets.multipliers
+    bennett = datasets.make_character("Bennett")
+    with pytest.raises(ValueError):
+        simulate_artifact_farm(bennett, multipliers=m, screen=DropScreen(m, metric="heal"))
+    with pytest.raises(ValueError):
+        simulate_artifact_farm_heal(bennett, multipliers=m, metric_fn=damage_metric(m),
+                                    screen=DropScreen(m, metric="heal"))
+    with pytest.raises(ValueError):
+        simulate_artifact_farm_heal(bennett, multipliers=m, metric_fn=lambda c: 0.0,
+                                    screen=DropScreen(m, metric="heal"))
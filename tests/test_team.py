@@ -0,0 +1,41 @@
+import pytest
+
+from benchmarks.hot_paths import ARTIFACTS
+from core.datasets import Datasets
+from core.team import Team
+
+
+def _party():
+    datasets = Datasets()
+    hu_tao = datasets.make_character("Hu Tao", weapon_name="Homa", artifacts=ARTIFACTS)
+    bennett = datasets.make_character("Bennett", artifacts=ARTIFACTS)
+    return datasets.multipliers, hu_tao, bennett
+
+
+def test_party_buffs_reach_the_caster():
+    m, hu_tao, bennett = _party()
+    team = Team([hu_tao, bennett], m, combos={"Hu Tao": "E12N1C", "Bennett": "N5 Q"})
+    members = team.evaluate()["members"]
+    solo = {c.name: c.expected_damage_output(combo=combo, multipliers=m)
+            for c, combo in ((hu_tao, "E12N1C"), (bennett, "N5 Q"))}
+    assert members["Hu Tao"] > solo["Hu Tao"]
+    assert members["Bennett"] > solo["Bennett"]
+
+
+def test_furina_fanfare_counts_once_on_her_summons():
+    datasets = Datasets()
+    m = datasets.multipliers
+    furina = datasets.make_character("Furina", weapon_name="Splendor", artifacts=ARTIFACTS)
+    # in a team her summons carry Fanfare whatever the order; Q before E must not add it twice
+    qe = Team([furina], m, combos={"Furina": "QE"}).damage()
+    assert qe == pytest.approx(Team([furina], m, combos={"Furina": "EQ"}).damage())
+    assert qe > furina.expected_damage_output(combo="QE", multipliers=m)
+
+
+def test_duplicate_members_are_rejected():
+    m, hu_tao, bennett = _party()
+    with pytest.raises(ValueError):
+        Team([hu_tao, hu_tao], m)
+    team = Team([hu_tao, bennett], m)
+    with pytest.raises(ValueError):
+        team.with_member(1, hu_tao)